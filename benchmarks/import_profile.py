@@ -0,0 +1,141 @@
+"""Import-time profile for Liora entry points.
+
+Imports each target in a fresh interpreter under ``-X importtime`` and reports
+wall time, peak RSS, the slowest packages and which provider SDKs were pulled
+in. None of the SDKs should load until a provider is actually used.
+
+    python -m benchmarks.import_profile [--target liora] [--top 15] [--repeat 3] [--fail-on-heavy]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = ["liora", "liora.server", "liora.batch"]
+
+# Provider SDKs and clients that should only load on first use
+HEAVY_MODULES = [
+    "google.generativeai",
+    "langchain_google_genai",
+    "langchain_tavily",
+    "langchain_core",
+    "wikipedia",
+    "requests",
+]
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "elapsed_s": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy_loaded": [name for name in {heavy!r} if name in sys.modules],
+    "module_count": len(sys.modules)
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse ``-X importtime`` lines into {name, self_us, cumulative_us, depth}"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            entries.append({
+                "name": name.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(name) - len(name.lstrip())) // 2
+            })
+        except ValueError:
+            continue
+    return entries
+
+
+def profile_target(target: str) -> Dict:
+    """Import one module in a fresh interpreter and collect timings"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c",
+         PROBE.format(target=target, heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{completed.stderr[-2000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(completed.stderr)
+    return result
+
+
+def package_totals(imports: List[Dict]) -> Dict[str, int]:
+    """Self time summed by top-level package"""
+    totals = defaultdict(int)
+    for entry in imports:
+        totals[entry["name"].split(".")[0]] += entry["self_us"]
+    return dict(totals)
+
+
+def print_report(target: str, runs: List[Dict], top: int):
+    elapsed = [run["elapsed_s"] for run in runs]
+    last = runs[-1]
+    print(f"\n== import {target}")
+    print(f"wall time     median {statistics.median(elapsed) * 1000:.0f} ms "
+          f"(min {min(elapsed) * 1000:.0f}, max {max(elapsed) * 1000:.0f}, {len(runs)} runs)")
+    print(f"peak RSS      {last['max_rss_kb'] / 1024:.1f} MB")
+    print(f"modules       {last['module_count']}")
+    print(f"provider SDKs {', '.join(last['heavy_loaded']) or 'none loaded'}")
+
+    print("slowest packages (self time):")
+    for name, self_us in sorted(package_totals(last["imports"]).items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    print("slowest direct imports (cumulative):")
+    direct = [entry for entry in last["imports"] if entry["depth"] <= 1]
+    for entry in sorted(direct, key=lambda item: -item["cumulative_us"])[:top]:
+        print(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['name']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of Liora entry points")
+    parser.add_argument("--target", action="append", help="Module to import (repeatable)")
+    parser.add_argument("--top", type=int, default=10, help="Rows per table")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target")
+    parser.add_argument("--json", help="Also write raw results to this file")
+    parser.add_argument("--fail-on-heavy", action="store_true",
+                        help="Exit non-zero if any provider SDK is loaded at import time")
+    args = parser.parse_args()
+
+    results = {}
+    heavy_found = False
+    for target in args.target or DEFAULT_TARGETS:
+        runs = [profile_target(target) for _ in range(max(1, args.repeat))]
+        print_report(target, runs, args.top)
+        heavy_found = heavy_found or bool(runs[-1]["heavy_loaded"])
+        results[target] = {
+            "elapsed_s": [run["elapsed_s"] for run in runs],
+            "max_rss_kb": runs[-1]["max_rss_kb"],
+            "module_count": runs[-1]["module_count"],
+            "heavy_loaded": runs[-1]["heavy_loaded"],
+            "packages_self_us": package_totals(runs[-1]["imports"])
+        }
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.fail_on_heavy and heavy_found:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
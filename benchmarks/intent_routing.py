@@ -0,0 +1,125 @@
+"""Routing accuracy and latency over a labeled prompt set.
+
+Compares the old substring keyword lists from app.py with the compiled
+IntentRouter, with and without the local classifier.
+
+    python -m benchmarks.intent_routing [--data PATH] [--heldout PATH] [--iterations N]
+
+The rules are tuned against --data. --heldout is reported separately and is
+never used to tune them: its accuracy is the one to trust, and a fix for a
+misrouted held-out prompt adds the prompt (or its lesson) to --data first.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from intent_router import INTENT_CHAT, INTENT_SEARCH, INTENT_TIME, INTENTS, build_default_router
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), "data", "intent_prompts.jsonl")
+DEFAULT_HELDOUT = os.path.join(os.path.dirname(__file__), "data", "intent_heldout.jsonl")
+
+# Keyword lists as they were in generate_response_stream / generate_response_with_search
+LEGACY_SEARCH_KEYWORDS = [
+    "latest", "news", "today", "current", "recent", "update", "what happened",
+    "weather", "stock", "price", "trending", "viral", "breaking", "just in",
+    "time", "date", "current time", "current date", "what time", "what date",
+    "kenya", "nairobi", "east africa"
+]
+LEGACY_TIME_KEYWORDS = ["time", "date", "current time", "current date", "what time", "what date"]
+
+
+def legacy_route(prompt: str) -> str:
+    lowered = prompt.lower()
+    if not any(keyword in lowered for keyword in LEGACY_SEARCH_KEYWORDS):
+        return INTENT_CHAT
+    if any(keyword in lowered for keyword in LEGACY_TIME_KEYWORDS):
+        return INTENT_TIME
+    return INTENT_SEARCH
+
+
+def load_labeled_prompts(path: str) -> List[Tuple[str, str]]:
+    examples = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                examples.append((record["prompt"], record["intent"]))
+    return examples
+
+
+def evaluate(name: str, route: Callable[[str], str], examples: List[Tuple[str, str]],
+             iterations: int) -> Dict:
+    predictions = [route(prompt) for prompt, _ in examples]
+    correct = sum(1 for prediction, (_, label) in zip(predictions, examples) if prediction == label)
+    confusion = Counter((label, prediction) for prediction, (_, label) in zip(predictions, examples))
+
+    # Needless search routing costs a Tavily round trip and a second LLM call
+    false_search = sum(1 for prediction, (_, label) in zip(predictions, examples)
+                       if label == INTENT_CHAT and prediction != INTENT_CHAT)
+
+    timings = []
+    for _ in range(iterations):
+        for prompt, _ in examples:
+            started = time.perf_counter()
+            route(prompt)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    return {
+        "name": name,
+        "accuracy": correct / len(examples),
+        "false_search_routes": false_search,
+        "confusion": confusion,
+        "mean_us": statistics.mean(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+        "misrouted": [(prompt, label, prediction) for prediction, (prompt, label) in zip(predictions, examples)
+                      if prediction != label]
+    }
+
+
+def print_report(result: Dict, verbose: bool):
+    print(f"\n== {result['name']}")
+    print(f"accuracy            {result['accuracy']:.1%}")
+    print(f"chat sent off-path  {result['false_search_routes']}")
+    print(f"latency mean/p50/p99  {result['mean_us']:.1f} / {result['p50_us']:.1f} / {result['p99_us']:.1f} us")
+    print("confusion (label -> predicted):")
+    for label in INTENTS:
+        row = "  ".join(f"{predicted}={result['confusion'].get((label, predicted), 0):<3}" for predicted in INTENTS)
+        print(f"  {label:<7} {row}")
+    if verbose and result["misrouted"]:
+        print("misrouted:")
+        for prompt, label, prediction in result["misrouted"]:
+            print(f"  [{label} -> {prediction}] {prompt}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent routing accuracy and latency")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL file with prompt/intent pairs")
+    parser.add_argument("--heldout", default=DEFAULT_HELDOUT,
+                        help="Prompt/intent pairs the rules are not tuned on; empty to skip")
+    parser.add_argument("--iterations", type=int, default=200, help="Timing passes over the prompt set")
+    parser.add_argument("--verbose", action="store_true", help="List misrouted prompts")
+    args = parser.parse_args()
+
+    rules_only = build_default_router(use_classifier=False)
+    with_classifier = build_default_router(use_classifier=True)
+
+    for path in filter(None, [args.data, args.heldout]):
+        examples = load_labeled_prompts(path)
+        print(f"\n{len(examples)} labeled prompts from {path}")
+        for name, route in [
+            ("legacy substring keywords", legacy_route),
+            ("compiled rules", lambda prompt: rules_only.route(prompt).intent),
+            ("compiled rules + classifier", lambda prompt: with_classifier.route(prompt).intent),
+        ]:
+            print_report(evaluate(name, route, examples, args.iterations), args.verbose)
+
+
+if __name__ == "__main__":
+    main()
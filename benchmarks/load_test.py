@@ -0,0 +1,290 @@
+"""Multi-user load test of one Liora worker against local stand-ins.
+
+Simulated users each hold a session, send a message drawn from a mix of
+search-routed, Wikipedia-triggering and plain chat prompts, wait for the
+full reply, then think for an exponentially distributed pause before the
+next one. Turns run on a bounded worker pool shared by all users, as in
+liora.server, so queueing shows up in the latency numbers.
+
+The user count ramps through --users; each step runs for --duration
+seconds and reports throughput, latency percentiles and the error rate.
+The saturation point is the first step where throughput stops scaling
+with users, p95 latency blows past --latency-factor times the single-step
+baseline, or errors exceed --max-error-rate.
+
+    python -m benchmarks.load_test [--users 1,2,4,8,16,32,64] [--duration 20] [--think 2.0]
+                                   [--workers 32] [--profile realistic] [--error-rate F]
+                                   [--mix search=0.3,wikipedia=0.2,chat=0.5] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.pipeline import PROFILES, percentile
+from liora.personalities import PERSONALITY_MODES
+from liora.session import LioraSession
+from liora.storage import ConversationStore
+from liora.stubs import StubLatency, build_stub_engine
+from providers import ProviderError
+from search_cache import answer_cache, search_cache
+
+SUBJECTS = [
+    "the Kenyan shilling", "Nairobi traffic", "electric cars", "the Champions League", "Bitcoin",
+    "the Mars rover", "coffee prices", "the Safari Rally", "solar panels", "the AI act",
+    "Lake Victoria", "the marathon record", "smartphone launches", "the housing market", "tea exports"
+]
+
+# Templates per message kind; subjects are mixed in so caches see realistic repetition, not one query
+MESSAGE_TEMPLATES = {
+    "search": [
+        "what's the latest news about {subject}",
+        "any breaking updates on {subject} today",
+        "current price trends for {subject}",
+    ],
+    "wikipedia": [
+        "tell me about {subject}",
+        "explain {subject} like I'm five",
+        "what is the history of {subject}",
+    ],
+    "chat": [
+        "hey Liora, how's your day going?",
+        "I can't decide what to cook tonight",
+        "give me a pep talk, I have an exam tomorrow",
+        "do you think {subject} is overrated?",
+        "haha that's hilarious, tell me more",
+    ],
+}
+
+DEFAULT_MIX = {"search": 0.3, "wikipedia": 0.2, "chat": 0.5}
+DEFAULT_USERS = [1, 2, 4, 8, 16, 32, 64]
+
+
+class TurnSample:
+    __slots__ = ("kind", "latency", "ttft", "queued", "error")
+
+    def __init__(self, kind: str, latency: float, ttft: Optional[float], queued: float, error: Optional[str]):
+        self.kind = kind
+        self.latency = latency
+        self.ttft = ttft
+        self.queued = queued
+        self.error = error
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in MESSAGE_TEMPLATES:
+            raise argparse.ArgumentTypeError(f"Unknown message kind {kind!r}; use {', '.join(MESSAGE_TEMPLATES)}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def draw_message(rng: random.Random, mix: Dict[str, float]) -> Tuple[str, str]:
+    kind = rng.choices(list(mix), weights=list(mix.values()))[0]
+    return kind, rng.choice(MESSAGE_TEMPLATES[kind]).format(subject=rng.choice(SUBJECTS))
+
+
+class LoadStep:
+    """One ramp step: a fixed number of users hammering the engine for a fixed time"""
+
+    def __init__(self, engine, store: ConversationStore, executor: ThreadPoolExecutor, users: int,
+                 duration: float, think: float, mix: Dict[str, float], seed: int):
+        self.engine = engine
+        self.store = store
+        self.executor = executor
+        self.users = users
+        self.duration = duration
+        self.think = think
+        self.mix = mix
+        self.seed = seed
+        self.samples: List[TurnSample] = []
+        self._lock = threading.Lock()
+
+    def run(self) -> Dict:
+        deadline = time.monotonic() + self.duration
+        threads = [
+            threading.Thread(target=self.user_loop, args=(user, deadline), daemon=True)
+            for user in range(self.users)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(time.monotonic() - started)
+
+    def user_loop(self, user: int, deadline: float):
+        rng = random.Random(self.seed * 100003 + user)
+        session = LioraSession(liora_mode=PERSONALITY_MODES[user % len(PERSONALITY_MODES)])
+        # Users arrive spread over one think time rather than all at once
+        time.sleep(min(rng.uniform(0, self.think), max(0.0, deadline - time.monotonic())))
+        while time.monotonic() < deadline:
+            kind, message = draw_message(rng, self.mix)
+            submitted = time.perf_counter()
+            sample = self.executor.submit(self.run_turn, session, kind, message, submitted).result()
+            with self._lock:
+                self.samples.append(sample)
+            pause = rng.expovariate(1.0 / self.think) if self.think > 0 else 0.0
+            time.sleep(min(pause, max(0.0, deadline - time.monotonic())))
+
+    def run_turn(self, session: LioraSession, kind: str, message: str, submitted: float) -> TurnSample:
+        started = time.perf_counter()
+        first_token = None
+        error = None
+        try:
+            for _ in self.engine.run_turn(session, self.store, message):
+                if first_token is None:
+                    first_token = time.perf_counter() - submitted
+        except ProviderError as e:
+            error = type(e).__name__
+        except Exception as e:
+            error = f"unexpected {type(e).__name__}"
+        return TurnSample(kind, time.perf_counter() - submitted, first_token, started - submitted, error)
+
+    def report(self, elapsed: float) -> Dict:
+        completed = [sample for sample in self.samples if sample.error is None]
+        latencies = [sample.latency for sample in completed]
+        ttfts = [sample.ttft for sample in completed if sample.ttft is not None]
+        by_kind = {}
+        for kind in MESSAGE_TEMPLATES:
+            kind_latencies = [sample.latency for sample in completed if sample.kind == kind]
+            if kind_latencies:
+                by_kind[kind] = {"turns": len(kind_latencies),
+                                 "p50_ms": percentile(kind_latencies, 50) * 1000}
+        return {
+            "users": self.users,
+            "elapsed_s": elapsed,
+            "turns": len(self.samples),
+            "completed": len(completed),
+            "errors": len(self.samples) - len(completed),
+            "error_rate": (len(self.samples) - len(completed)) / len(self.samples) if self.samples else 0.0,
+            "throughput": len(completed) / elapsed if elapsed else 0.0,
+            "latency_p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+            "latency_p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+            "latency_p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+            "ttft_p50_ms": percentile(ttfts, 50) * 1000 if ttfts else None,
+            "queue_mean_ms": statistics.mean(sample.queued for sample in self.samples) * 1000 if self.samples else 0.0,
+            "by_kind": by_kind,
+        }
+
+
+def saturation_reason(step: Dict, previous: Optional[Dict], baseline: Dict, latency_factor: float,
+                      max_error_rate: float, min_scaling: float) -> Optional[str]:
+    """Why a step counts as saturated, or None while the worker still keeps up"""
+    if step["error_rate"] > max_error_rate:
+        return f"error rate {step['error_rate']:.1%} > {max_error_rate:.1%}"
+    if step["latency_p95_ms"] is None:
+        return "no turns completed"
+    if baseline["latency_p95_ms"] and step["latency_p95_ms"] > baseline["latency_p95_ms"] * latency_factor:
+        return f"p95 {step['latency_p95_ms']:.0f} ms > {latency_factor:g}x baseline"
+    if previous and previous["throughput"] > 0:
+        # Throughput should grow roughly with users while think time dominates
+        expected = previous["throughput"] * (step["users"] / previous["users"])
+        gained = step["throughput"] - previous["throughput"]
+        if gained < (expected - previous["throughput"]) * min_scaling:
+            return f"throughput {step['throughput']:.1f}/s vs {expected:.1f}/s if it scaled"
+    return None
+
+
+def print_step(step: Dict, reason: Optional[str]):
+    def ms(value):
+        return f"{value:.0f}" if value is not None else "-"
+
+    print(f"{step['users']:>5} {step['completed']:>6} {step['throughput']:>8.2f} "
+          f"{ms(step['ttft_p50_ms']):>8} {ms(step['latency_p50_ms']):>8} {ms(step['latency_p95_ms']):>8} "
+          f"{ms(step['latency_p99_ms']):>8} {step['queue_mean_ms']:>8.0f} {step['error_rate']:>7.1%}"
+          f"{'  <- ' + reason if reason else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp simulated users against one worker with stub providers")
+    parser.add_argument("--users", default=",".join(map(str, DEFAULT_USERS)),
+                        help="Comma-separated user counts to ramp through")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per step")
+    parser.add_argument("--think", type=float, default=2.0, help="Mean think time between messages (seconds)")
+    parser.add_argument("--workers", type=int, default=32, help="Turns generated concurrently, as in liora.server")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic", help="Stub latency profile")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of model calls that fail")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Message kind weights")
+    parser.add_argument("--latency-factor", type=float, default=2.0,
+                        help="p95 growth over the first step that counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--min-scaling", type=float, default=0.5,
+                        help="Fraction of the ideal throughput gain a step must achieve")
+    parser.add_argument("--keep-going", action="store_true", help="Run every step even after saturation")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    users = [int(count) for count in args.users.split(",") if count.strip()]
+
+    # Learning files and the conversation store land in a scratch directory
+    original_cwd = os.getcwd()
+    steps = []
+    saturation = None
+    with tempfile.TemporaryDirectory(prefix="liora-load-") as scratch:
+        os.chdir(scratch)
+        try:
+            from conversation_intelligence import ConversationIntelligence
+
+            latency = StubLatency(error_rate=args.error_rate, seed=args.seed, **PROFILES[args.profile])
+            search_cache.clear()
+            answer_cache.clear()
+            engine = build_stub_engine(latency, conversations_file="load_conversations.pkl",
+                                       intelligence=ConversationIntelligence())
+            store = ConversationStore("load_conversations.pkl", autoload=False)
+
+            if not args.json:
+                print(f"profile {args.profile}, {args.workers} workers, think {args.think:g}s, "
+                      f"{args.duration:g}s per step, mix {args.mix}")
+                print(f"{'users':>5} {'turns':>6} {'turns/s':>8} {'ttft50':>8} {'p50':>8} {'p95':>8} "
+                      f"{'p99':>8} {'queue':>8} {'errors':>7}   (ms)")
+
+            with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="liora-load") as executor:
+                for index, count in enumerate(users):
+                    step = LoadStep(engine, store, executor, count, args.duration, args.think, args.mix,
+                                    args.seed + index).run()
+                    reason = saturation_reason(step, steps[-1] if steps else None, steps[0] if steps else step,
+                                               args.latency_factor, args.max_error_rate, args.min_scaling)
+                    step["saturated"] = reason
+                    steps.append(step)
+                    if not args.json:
+                        print_step(step, reason)
+                    if reason and saturation is None:
+                        saturation = step
+                        if not args.keep_going:
+                            break
+        finally:
+            os.chdir(original_cwd)
+
+    healthy = [step for step in steps if not step["saturated"]]
+    summary = {
+        "steps": steps,
+        "saturated_at_users": saturation["users"] if saturation else None,
+        "max_healthy_users": healthy[-1]["users"] if healthy else None,
+        "max_healthy_throughput": max((step["throughput"] for step in healthy), default=0.0),
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    if saturation:
+        print(f"\nSaturated at {saturation['users']} users ({saturation['saturated']}); "
+              f"last healthy step {summary['max_healthy_users']} users at "
+              f"{summary['max_healthy_throughput']:.2f} turns/s")
+    else:
+        print(f"\nNo saturation up to {steps[-1]['users']} users "
+              f"({summary['max_healthy_throughput']:.2f} turns/s); ramp further with --users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""End-to-end turn latency, CPU and memory against local stand-ins.
+
+Drives LioraEngine.run_turn over the labeled prompt mix (chat, search, time)
+with every provider replaced by liora.stubs, so the numbers are Liora's own
+cost plus whatever latency the stub profile injects.
+
+    python -m benchmarks.pipeline [--profile overhead|realistic] [--sessions N] [--turns N]
+                                  [--error-rate F] [--save-baseline] [--check] [--tolerance F]
+                                  [--replay CASSETTE [--replay-speed F]]
+
+The "overhead" profile has zero provider latency and isolates Liora's own
+work; "realistic" approximates the hosted providers. --save-baseline writes
+the results to benchmarks/baselines/pipeline.json; --check compares against
+it and exits non-zero when a metric regresses beyond --tolerance. --replay
+runs a "replay" profile on traffic recorded with liora.cassettes instead, so
+prompt-building or routing changes can be compared on identical responses.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.intent_routing import DEFAULT_DATA, load_labeled_prompts
+from liora.cassettes import Cassette, build_replay_engine
+from liora.personalities import PERSONALITY_MODES
+from liora.session import LioraSession
+from liora.storage import ConversationStore
+from liora.stubs import StubLatency, build_stub_engine
+from providers import ProviderError
+from search_cache import answer_cache, search_cache
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "pipeline.json")
+
+PROFILES = {
+    "overhead": dict(first_token_latency=0.0, tokens_per_second=0.0, search_latency=0.0, wikipedia_latency=0.0),
+    "realistic": dict(first_token_latency=0.3, tokens_per_second=50.0, search_latency=0.2, wikipedia_latency=0.1),
+}
+
+# Lower is better for every tracked metric; (name, absolute slack) so
+# sub-millisecond jitter on tiny numbers is not reported as a regression
+TRACKED_METRICS = [
+    ("ttft_p50_ms", 2.0),
+    ("ttft_p95_ms", 5.0),
+    ("latency_p50_ms", 2.0),
+    ("latency_p95_ms", 5.0),
+    ("cpu_per_turn_ms", 1.0),
+    ("memory_per_session_kb", 16.0),
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_sessions(engine, store: ConversationStore, prompts: List[str], sessions: int, turns: int,
+                 first_session: int = 0) -> Dict[str, List[float]]:
+    """Run sessions × turns through the engine, timing every turn"""
+    modes = list(PERSONALITY_MODES)
+    samples = {"ttft": [], "latency": [], "cpu": [], "errors": 0}
+    for s in range(first_session, first_session + sessions):
+        session = LioraSession(liora_mode=modes[s % len(modes)])
+        for t in range(turns):
+            prompt = prompts[(s * turns + t) % len(prompts)]
+            started = time.perf_counter()
+            cpu_started = time.process_time()
+            first_token = None
+            try:
+                for _ in engine.run_turn(session, store, prompt):
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+            except ProviderError:
+                samples["errors"] += 1
+                continue
+            samples["latency"].append(time.perf_counter() - started)
+            samples["cpu"].append(time.process_time() - cpu_started)
+            samples["ttft"].append(first_token if first_token is not None else samples["latency"][-1])
+    return samples
+
+
+def run_profile(name: str, prompts: List[str], sessions: int, turns: int, error_rate: float,
+                memory_sessions: int, seed: int, cassette=None, replay_speed: float = 0.0) -> Dict:
+    # Imported here: the module loads learning files from the working directory
+    from conversation_intelligence import ConversationIntelligence
+    from liora.memory import LongTermMemory
+
+    search_cache.clear()
+    answer_cache.clear()
+    # Built before timing starts; the first build imports NumPy
+    long_term_memory = LongTermMemory(f"bench_memory_{name}")
+    if cassette is not None:
+        cassette.rewind()
+        engine = build_replay_engine(cassette, replay_speed, conversations_file="bench_conversations.pkl",
+                                     intelligence=ConversationIntelligence(), memory=long_term_memory)
+    else:
+        latency = StubLatency(error_rate=error_rate, seed=seed, **PROFILES[name])
+        engine = build_stub_engine(latency, conversations_file="bench_conversations.pkl",
+                                   intelligence=ConversationIntelligence(), memory=long_term_memory)
+    store = ConversationStore("bench_conversations.pkl", autoload=False)
+
+    cache_before = search_cache.stats()
+    samples = run_sessions(engine, store, prompts, sessions, turns)
+    cache_after = search_cache.stats()
+
+    # Memory is measured in a separate pass, since tracemalloc slows every allocation
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run_sessions(engine, store, prompts, memory_sessions, turns, first_session=sessions)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    long_term_memory.close()
+
+    completed = len(samples["latency"])
+    if not completed:
+        raise SystemExit(f"Every turn failed in profile {name}; lower --error-rate")
+    return {
+        "profile": name,
+        "turns": completed,
+        "errors": samples["errors"],
+        "ttft_p50_ms": percentile(samples["ttft"], 50) * 1000,
+        "ttft_p95_ms": percentile(samples["ttft"], 95) * 1000,
+        "latency_p50_ms": percentile(samples["latency"], 50) * 1000,
+        "latency_p95_ms": percentile(samples["latency"], 95) * 1000,
+        "latency_mean_ms": statistics.mean(samples["latency"]) * 1000,
+        "cpu_per_turn_ms": statistics.mean(samples["cpu"]) * 1000,
+        "memory_per_session_kb": retained / memory_sessions / 1024,
+        "search_cache": {key: cache_after[key] - cache_before[key] for key in ("hits", "misses")},
+    }
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics in result that are worse than the baseline by more than the tolerance"""
+    regressions = []
+    for metric, slack in TRACKED_METRICS:
+        if metric not in baseline:
+            continue
+        limit = max(baseline[metric] * (1 + tolerance), baseline[metric] + slack)
+        if result[metric] > limit:
+            regressions.append(f"{result['profile']}.{metric}: {result[metric]:.2f} > {limit:.2f} "
+                               f"(baseline {baseline[metric]:.2f})")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(path: str, results: List[Dict], args):
+    baseline = load_baseline(path)
+    baseline.setdefault("profiles", {})
+    for result in results:
+        baseline["profiles"][result["profile"]] = {
+            key: round(value, 3) if isinstance(value, float) else value
+            for key, value in result.items() if key != "search_cache"
+        }
+    baseline["environment"] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "sessions": args.sessions,
+        "turns": args.turns,
+        "recorded_at": time.strftime("%Y-%m-%d"),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_report(result: Dict, baseline: Dict):
+    def against(metric):
+        if metric not in baseline or not baseline[metric]:
+            return ""
+        return f"  ({(result[metric] / baseline[metric] - 1):+.0%} vs baseline)"
+
+    print(f"\n== {result['profile']}: {result['turns']} turns, {result['errors']} failed")
+    print(f"ttft p50/p95        {result['ttft_p50_ms']:.1f} / {result['ttft_p95_ms']:.1f} ms{against('ttft_p50_ms')}")
+    print(f"turn p50/p95/mean   {result['latency_p50_ms']:.1f} / {result['latency_p95_ms']:.1f} / "
+          f"{result['latency_mean_ms']:.1f} ms{against('latency_p50_ms')}")
+    print(f"cpu per turn        {result['cpu_per_turn_ms']:.2f} ms{against('cpu_per_turn_ms')}")
+    print(f"memory per session  {result['memory_per_session_kb']:.1f} KiB{against('memory_per_session_kb')}")
+    cache = result["search_cache"]
+    print(f"search cache        {cache['hits']} hits / {cache['misses']} misses")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat pipeline against local stand-ins")
+    parser.add_argument("--profile", choices=sorted(PROFILES), action="append",
+                        help="Latency profile to run (repeatable; default: all)")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="JSONL prompt set (prompt/intent pairs)")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=6, help="Turns per session")
+    parser.add_argument("--memory-sessions", type=int, default=4, help="Sessions in the traced memory pass")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of model calls that fail")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the baseline")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown as a fraction")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Answer provider calls from a recorded cassette")
+    parser.add_argument("--replay-speed", type=float, default=0.0,
+                        help="Replay delays: 1 as recorded, 0 none (measures Liora alone)")
+    args = parser.parse_args()
+
+    prompts = [prompt for prompt, _ in load_labeled_prompts(os.path.abspath(args.data))]
+    cassette = Cassette(os.path.abspath(args.replay)).load() if args.replay else None
+    baseline_path = os.path.abspath(args.baseline)
+    baseline = load_baseline(baseline_path).get("profiles", {})
+
+    # Learning files and the conversation store land in a scratch directory
+    original_cwd = os.getcwd()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="liora-bench-") as scratch:
+        os.chdir(scratch)
+        try:
+            if cassette is not None:
+                results.append(run_profile("replay", prompts, args.sessions, args.turns, args.error_rate,
+                                           args.memory_sessions, args.seed, cassette, args.replay_speed))
+            for name in args.profile or ([] if cassette is not None else sorted(PROFILES)):
+                results.append(run_profile(name, prompts, args.sessions, args.turns, args.error_rate,
+                                           args.memory_sessions, args.seed))
+        finally:
+            os.chdir(original_cwd)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(prompts)} prompts, {args.sessions} sessions x {args.turns} turns per profile")
+        for result in results:
+            print_report(result, baseline.get(result["profile"], {}))
+
+    if args.save_baseline:
+        save_baseline(baseline_path, results, args)
+        print(f"\nBaseline written to {baseline_path}")
+
+    if args.check:
+        regressions = [regression for result in results
+                       for regression in compare(result, baseline.get(result["profile"], {}), args.tolerance)]
+        if regressions:
+            print("\nRegressions:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
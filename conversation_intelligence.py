@@ -1,18 +1,58 @@
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import re
 from collections import defaultdict, Counter
 import pickle
 
+# Keyword tables behind topic, sentiment, engagement and style detection. Matching is by
+# substring of the lowercased text; liora.reanalysis applies the same tables in bulk.
+TOPIC_KEYWORDS = {
+    'technology': ['ai', 'programming', 'computer', 'software', 'tech', 'code'],
+    'science': ['science', 'research', 'experiment', 'discovery', 'theory'],
+    'entertainment': ['movie', 'music', 'game', 'show', 'entertainment', 'fun'],
+    'personal': ['life', 'family', 'friend', 'personal', 'experience'],
+    'work': ['work', 'job', 'career', 'business', 'professional'],
+    'education': ['learn', 'study', 'education', 'school', 'knowledge'],
+    'current_events': ['news', 'current', 'recent', 'today', 'latest'],
+    'philosophy': ['think', 'philosophy', 'meaning', 'purpose', 'existence']
+}
+POSITIVE_WORDS = ['good', 'great', 'awesome', 'amazing', 'love', 'like', 'happy', 'excited', 'wonderful']
+NEGATIVE_WORDS = ['bad', 'terrible', 'hate', 'dislike', 'sad', 'angry', 'frustrated', 'awful']
+ENGAGEMENT_INDICATORS = {
+    'high': ['!', '?', 'wow', 'amazing', 'really', 'tell me more', 'interesting'],
+    'medium': ['ok', 'sure', 'yes', 'no', 'maybe'],
+    'low': ['...', 'hmm', 'idk', 'whatever', 'fine']
+}
+FORMAL_INDICATORS = ['please', 'thank you', 'would you', 'could you', 'kindly']
+CASUAL_INDICATORS = ['hey', 'hi', 'cool', 'awesome', 'lol', 'omg', 'btw']
+TECHNICAL_INDICATORS = ['algorithm', 'function', 'method', 'parameter', 'variable', 'class']
+# Phrases in a reply that count toward its effectiveness score
+ENGAGING_PHRASES = ['interesting', 'fascinating', 'tell me more', 'what do you think']
+
+EFFECTIVE_RESPONSE_THRESHOLD = 0.7
+
+# Weights and length thresholds of assess_response_effectiveness; liora.reanalysis uses the same ones
+EFFECTIVENESS_BASE = 0.5
+TOPIC_OVERLAP_WEIGHT = 0.2
+LENGTH_PENALTY = 0.1
+SHORT_MESSAGE_CHARS = 50    # a short message ...
+VERBOSE_REPLY_CHARS = 200   # ... answered with more than this is too verbose
+LONG_MESSAGE_CHARS = 100    # a long message ...
+BRIEF_REPLY_CHARS = 50      # ... answered with less than this is too brief
+ENGAGING_BONUS = 0.1
+SENTIMENT_MATCH_BONUS = 0.1
+
+
 class ConversationIntelligence:
     """Enhanced conversation intelligence with learning capabilities"""
     
-    def __init__(self):
-        self.learning_data_file = "liora_learning_data.pkl"
-        self.conversation_patterns_file = "conversation_patterns.json"
-        self.user_preferences_file = "user_preferences.json"
+    def __init__(self, data_dir: str = ""):
+        self.learning_data_file = os.path.join(data_dir, "liora_learning_data.pkl")
+        self.conversation_patterns_file = os.path.join(data_dir, "conversation_patterns.json")
+        self.user_preferences_file = os.path.join(data_dir, "user_preferences.json")
         
         # Initialize learning data
         self.learning_data = self.load_learning_data()
@@ -33,6 +73,12 @@ class ConversationIntelligence:
         self.learning_rate = 0.1
         self.memory_decay = 0.95
         self.min_interactions_for_learning = 5
+        self.max_effective_responses = 200
+        self.few_shot_examples = 2
+        self._example_index = None
+        # Learning runs on the learning queue's worker while request threads read the same
+        # state for guidance and insights; every read, update and save holds this lock
+        self.lock = threading.RLock()
     
     def load_learning_data(self) -> Dict:
         """Load learning data from file"""
@@ -46,20 +92,21 @@ class ConversationIntelligence:
     
     def save_learning_data(self):
         """Save learning data to file"""
-        try:
-            learning_data = {
-                'interaction_count': self.interaction_count,
-                'successful_responses': self.successful_responses,
-                'user_satisfaction_scores': self.user_satisfaction_scores,
-                'topic_frequency': self.topic_frequency,
-                'response_effectiveness': self.response_effectiveness,
-                'user_engagement_patterns': self.user_engagement_patterns,
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.learning_data_file, 'wb') as f:
-                pickle.dump(learning_data, f)
-        except Exception as e:
-            print(f"Error saving learning data: {e}")
+        with self.lock:
+            try:
+                learning_data = {
+                    'interaction_count': self.interaction_count,
+                    'successful_responses': self.successful_responses,
+                    'user_satisfaction_scores': self.user_satisfaction_scores,
+                    'topic_frequency': self.topic_frequency,
+                    'response_effectiveness': self.response_effectiveness,
+                    'user_engagement_patterns': self.user_engagement_patterns,
+                    'last_updated': datetime.now().isoformat()
+                }
+                with open(self.learning_data_file, 'wb') as f:
+                    pickle.dump(learning_data, f)
+            except Exception as e:
+                print(f"Error saving learning data: {e}")
     
     def load_conversation_patterns(self) -> Dict:
         """Load conversation patterns from file"""
@@ -78,11 +125,19 @@ class ConversationIntelligence:
     
     def save_conversation_patterns(self):
         """Save conversation patterns to file"""
-        try:
-            with open(self.conversation_patterns_file, 'w') as f:
-                json.dump(self.conversation_patterns, f, indent=2)
-        except Exception as e:
-            print(f"Error saving conversation patterns: {e}")
+        with self.lock:
+            try:
+                with open(self.conversation_patterns_file, 'w') as f:
+                    json.dump(self.conversation_patterns, f, indent=2)
+            except Exception as e:
+                print(f"Error saving conversation patterns: {e}")
+    
+    def save_all(self):
+        """Save learning data, conversation patterns and user preferences"""
+        with self.lock:
+            self.save_learning_data()
+            self.save_conversation_patterns()
+            self.save_user_preferences()
     
     def load_user_preferences(self) -> Dict:
         """Load user preferences from file"""
@@ -102,11 +157,12 @@ class ConversationIntelligence:
     
     def save_user_preferences(self):
         """Save user preferences to file"""
-        try:
-            with open(self.user_preferences_file, 'w') as f:
-                json.dump(self.user_preferences, f, indent=2)
-        except Exception as e:
-            print(f"Error saving user preferences: {e}")
+        with self.lock:
+            try:
+                with open(self.user_preferences_file, 'w') as f:
+                    json.dump(self.user_preferences, f, indent=2)
+            except Exception as e:
+                print(f"Error saving user preferences: {e}")
     
     def analyze_conversation(self, conversation_history: str) -> Dict:
         """Analyze conversation for learning opportunities"""
@@ -122,21 +178,10 @@ class ConversationIntelligence:
     def extract_topics(self, text: str) -> List[str]:
         """Extract main topics from conversation"""
         # Simple topic extraction based on keywords
-        topic_keywords = {
-            'technology': ['ai', 'programming', 'computer', 'software', 'tech', 'code'],
-            'science': ['science', 'research', 'experiment', 'discovery', 'theory'],
-            'entertainment': ['movie', 'music', 'game', 'show', 'entertainment', 'fun'],
-            'personal': ['life', 'family', 'friend', 'personal', 'experience'],
-            'work': ['work', 'job', 'career', 'business', 'professional'],
-            'education': ['learn', 'study', 'education', 'school', 'knowledge'],
-            'current_events': ['news', 'current', 'recent', 'today', 'latest'],
-            'philosophy': ['think', 'philosophy', 'meaning', 'purpose', 'existence']
-        }
-        
         text_lower = text.lower()
         found_topics = []
         
-        for topic, keywords in topic_keywords.items():
+        for topic, keywords in TOPIC_KEYWORDS.items():
             if any(keyword in text_lower for keyword in keywords):
                 found_topics.append(topic)
         
@@ -144,12 +189,9 @@ class ConversationIntelligence:
     
     def analyze_sentiment(self, text: str) -> str:
         """Analyze sentiment of conversation"""
-        positive_words = ['good', 'great', 'awesome', 'amazing', 'love', 'like', 'happy', 'excited', 'wonderful']
-        negative_words = ['bad', 'terrible', 'hate', 'dislike', 'sad', 'angry', 'frustrated', 'awful']
-        
         text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        positive_count = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+        negative_count = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
         
         if positive_count > negative_count:
             return 'positive'
@@ -160,16 +202,10 @@ class ConversationIntelligence:
     
     def assess_engagement(self, text: str) -> str:
         """Assess user engagement level"""
-        engagement_indicators = {
-            'high': ['!', '?', 'wow', 'amazing', 'really', 'tell me more', 'interesting'],
-            'medium': ['ok', 'sure', 'yes', 'no', 'maybe'],
-            'low': ['...', 'hmm', 'idk', 'whatever', 'fine']
-        }
-        
         text_lower = text.lower()
         scores = {}
         
-        for level, indicators in engagement_indicators.items():
+        for level, indicators in ENGAGEMENT_INDICATORS.items():
             scores[level] = sum(1 for indicator in indicators if indicator in text_lower)
         
         max_score = max(scores.values())
@@ -197,15 +233,11 @@ class ConversationIntelligence:
     
     def detect_communication_style(self, text: str) -> str:
         """Detect user's communication style"""
-        formal_indicators = ['please', 'thank you', 'would you', 'could you', 'kindly']
-        casual_indicators = ['hey', 'hi', 'cool', 'awesome', 'lol', 'omg', 'btw']
-        technical_indicators = ['algorithm', 'function', 'method', 'parameter', 'variable', 'class']
-        
         text_lower = text.lower()
         
-        formal_score = sum(1 for indicator in formal_indicators if indicator in text_lower)
-        casual_score = sum(1 for indicator in casual_indicators if indicator in text_lower)
-        technical_score = sum(1 for indicator in technical_indicators if indicator in text_lower)
+        formal_score = sum(1 for indicator in FORMAL_INDICATORS if indicator in text_lower)
+        casual_score = sum(1 for indicator in CASUAL_INDICATORS if indicator in text_lower)
+        technical_score = sum(1 for indicator in TECHNICAL_INDICATORS if indicator in text_lower)
         
         if technical_score > max(formal_score, casual_score):
             return 'technical'
@@ -215,54 +247,97 @@ class ConversationIntelligence:
             return 'casual'
     
     def learn_from_interaction(self, user_message: str, assistant_response: str, 
-                             conversation_history: str, user_feedback: Optional[str] = None):
-        """Learn from each interaction to improve future responses"""
-        # Increment interaction count
-        self.interaction_count += 1
-        
-        # Analyze the interaction
-        analysis = self.analyze_conversation(conversation_history)
-        
-        # Update topic frequency
-        for topic in analysis['topics']:
-            self.topic_frequency[topic] += 1
-        
-        # Assess response effectiveness
-        effectiveness_score = self.assess_response_effectiveness(user_message, assistant_response, analysis)
-        
-        # Store effective response patterns
-        if effectiveness_score > 0.7:  # High effectiveness threshold
-            self.conversation_patterns['effective_responses'].append({
-                'user_message': user_message,
-                'assistant_response': assistant_response,
-                'context': analysis,
-                'effectiveness_score': effectiveness_score,
-                'timestamp': datetime.now().isoformat()
-            })
-        
-        # Update user preferences based on communication style
-        detected_style = analysis['user_communication_style']
-        if detected_style != self.user_preferences.get('communication_style'):
-            self.user_preferences['communication_style'] = detected_style
-        
-        # Learn from user feedback if provided
-        if user_feedback:
-            self.learn_from_feedback(user_feedback, effectiveness_score)
-        
-        # Update engagement patterns
-        self.user_engagement_patterns[analysis['engagement_level']] = \
-            self.user_engagement_patterns.get(analysis['engagement_level'], 0) + 1
-        
-        # Save learning data periodically
-        if self.interaction_count % 10 == 0:  # Save every 10 interactions
-            self.save_learning_data()
-            self.save_conversation_patterns()
-            self.save_user_preferences()
+                             conversation_history: str, user_feedback: Optional[str] = None, save: bool = True):
+        """Learn from each interaction to improve future responses
+
+        With save=False the caller persists the learning state itself (see
+        liora.learning_queue).
+        """
+        with self.lock:
+            # Increment interaction count
+            self.interaction_count += 1
+        
+            # Analyze the interaction
+            analysis = self.analyze_conversation(conversation_history)
+        
+            # Update topic frequency
+            for topic in analysis['topics']:
+                self.topic_frequency[topic] += 1
+        
+            # Assess response effectiveness
+            effectiveness_score = self.assess_response_effectiveness(user_message, assistant_response, analysis)
+        
+            # Store effective response patterns
+            if effectiveness_score > EFFECTIVE_RESPONSE_THRESHOLD:
+                self.add_effective_response({
+                    'user_message': user_message,
+                    'assistant_response': assistant_response,
+                    'context': analysis,
+                    'effectiveness_score': effectiveness_score,
+                    'timestamp': datetime.now().isoformat()
+                })
+        
+            # Update user preferences based on communication style
+            detected_style = analysis['user_communication_style']
+            if detected_style != self.user_preferences.get('communication_style'):
+                self.user_preferences['communication_style'] = detected_style
+        
+            # Learn from user feedback if provided
+            if user_feedback:
+                self.learn_from_feedback(user_feedback, effectiveness_score)
+        
+            # Update engagement patterns
+            self.user_engagement_patterns[analysis['engagement_level']] = \
+                self.user_engagement_patterns.get(analysis['engagement_level'], 0) + 1
+        
+            # Save learning data periodically
+            if save and self.interaction_count % 10 == 0:  # Save every 10 interactions
+                self.save_all()
     
+    def add_effective_response(self, example: Dict):
+        """Store an effective exchange, evicting the oldest beyond max_effective_responses"""
+        examples = self.conversation_patterns['effective_responses']
+        examples.append(example)
+        if self._example_index is not None:
+            self._example_index.add(example)
+        while len(examples) > self.max_effective_responses:
+            evicted = examples.pop(0)
+            if self._example_index is not None:
+                self._example_index.discard(evicted)
+
+    def replace_patterns(self, key: str, value):
+        """Overwrite one learned pattern, keeping the few-shot example index in step"""
+        with self.lock:
+            self.conversation_patterns[key] = value
+            if key == 'effective_responses' and self._example_index is not None:
+                self._example_index.rebuild(value)
+
+    def get_example_index(self):
+        """Similarity index over effective responses, built on first use"""
+        if self._example_index is None:
+            # Imported here so loading the learning data does not pull in NumPy
+            from example_index import ExampleIndex
+            index = ExampleIndex()
+            index.rebuild(self.conversation_patterns['effective_responses'])
+            self._example_index = index
+        return self._example_index
+
+    def get_few_shot_examples(self, user_message: str) -> List[Dict]:
+        """Past effective exchanges most similar to the user's message"""
+        matches = self.get_example_index().search(user_message, k=self.few_shot_examples)
+        return [
+            {
+                'user_message': example['user_message'],
+                'assistant_response': example['assistant_response'],
+                'similarity': score
+            }
+            for example, score in matches
+        ]
+
     def assess_response_effectiveness(self, user_message: str, assistant_response: str, 
                                    analysis: Dict) -> float:
         """Assess how effective the assistant's response was"""
-        effectiveness_score = 0.5  # Base score
+        effectiveness_score = EFFECTIVENESS_BASE
         
         # Check if response addresses user's question/topic
         user_topics = self.extract_topics(user_message)
@@ -270,65 +345,68 @@ class ConversationIntelligence:
         
         if user_topics and response_topics:
             topic_overlap = len(set(user_topics) & set(response_topics))
-            effectiveness_score += 0.2 * (topic_overlap / len(user_topics))
+            effectiveness_score += TOPIC_OVERLAP_WEIGHT * (topic_overlap / len(user_topics))
         
         # Check response length appropriateness
         user_message_length = len(user_message)
         response_length = len(assistant_response)
         
-        if user_message_length < 50 and response_length > 200:
-            effectiveness_score -= 0.1  # Too verbose for short question
-        elif user_message_length > 100 and response_length < 50:
-            effectiveness_score -= 0.1  # Too brief for complex question
+        if user_message_length < SHORT_MESSAGE_CHARS and response_length > VERBOSE_REPLY_CHARS:
+            effectiveness_score -= LENGTH_PENALTY  # Too verbose for short question
+        elif user_message_length > LONG_MESSAGE_CHARS and response_length < BRIEF_REPLY_CHARS:
+            effectiveness_score -= LENGTH_PENALTY  # Too brief for complex question
         
         # Check for engagement indicators in response
-        engagement_words = ['interesting', 'fascinating', 'tell me more', 'what do you think']
-        if any(word in assistant_response.lower() for word in engagement_words):
-            effectiveness_score += 0.1
+        if any(word in assistant_response.lower() for word in ENGAGING_PHRASES):
+            effectiveness_score += ENGAGING_BONUS
         
         # Check sentiment alignment
         user_sentiment = self.analyze_sentiment(user_message)
         response_sentiment = self.analyze_sentiment(assistant_response)
         
         if user_sentiment == response_sentiment:
-            effectiveness_score += 0.1
+            effectiveness_score += SENTIMENT_MATCH_BONUS
         
         return min(1.0, max(0.0, effectiveness_score))
     
     def learn_from_feedback(self, feedback: str, effectiveness_score: float):
         """Learn from explicit user feedback"""
-        feedback_lower = feedback.lower()
-        
-        if any(word in feedback_lower for word in ['good', 'great', 'excellent', 'perfect']):
-            self.successful_responses += 1
-            self.user_satisfaction_scores.append(1.0)
-        elif any(word in feedback_lower for word in ['bad', 'terrible', 'wrong', 'incorrect']):
-            self.user_satisfaction_scores.append(0.0)
-        else:
-            self.user_satisfaction_scores.append(effectiveness_score)
+        with self.lock:
+            feedback_lower = feedback.lower()
+        
+            if any(word in feedback_lower for word in ['good', 'great', 'excellent', 'perfect']):
+                self.successful_responses += 1
+                self.user_satisfaction_scores.append(1.0)
+            elif any(word in feedback_lower for word in ['bad', 'terrible', 'wrong', 'incorrect']):
+                self.user_satisfaction_scores.append(0.0)
+            else:
+                self.user_satisfaction_scores.append(effectiveness_score)
         
-        # Keep only recent satisfaction scores (last 100)
-        if len(self.user_satisfaction_scores) > 100:
-            self.user_satisfaction_scores = self.user_satisfaction_scores[-100:]
+            # Keep only recent satisfaction scores (last 100)
+            if len(self.user_satisfaction_scores) > 100:
+                self.user_satisfaction_scores = self.user_satisfaction_scores[-100:]
     
     def get_adaptive_response_guidance(self, user_message: str, conversation_history: str) -> Dict:
         """Get adaptive guidance for crafting responses based on learned patterns"""
-        analysis = self.analyze_conversation(conversation_history)
-        
-        guidance = {
-            'preferred_topics': self.get_user_preferred_topics(),
-            'communication_style': self.user_preferences.get('communication_style', 'casual'),
-            'response_length': self.determine_optimal_response_length(user_message, analysis),
-            'engagement_strategy': self.get_engagement_strategy(analysis),
-            'personality_adjustment': self.get_personality_adjustment(analysis),
-            'conversation_context': analysis
-        }
+        with self.lock:
+            analysis = self.analyze_conversation(conversation_history)
+        
+            guidance = {
+                'preferred_topics': self.get_user_preferred_topics(),
+                'communication_style': self.user_preferences.get('communication_style', 'casual'),
+                'response_length': self.determine_optimal_response_length(user_message, analysis),
+                'engagement_strategy': self.get_engagement_strategy(analysis),
+                'personality_adjustment': self.get_personality_adjustment(analysis),
+                'few_shot_examples': self.get_few_shot_examples(user_message),
+                'conversation_context': analysis
+            }
         
-        return guidance
+            return guidance
     
     def get_user_preferred_topics(self) -> List[str]:
         """Get user's preferred topics based on learning"""
-        return [topic for topic, count in self.topic_frequency.most_common(5)]
+        with self.lock:
+            return [topic for topic, count in self.topic_frequency.most_common(5)]
     
     def determine_optimal_response_length(self, user_message: str, analysis: Dict) -> str:
         """Determine optimal response length based on user patterns"""
@@ -381,16 +459,17 @@ class ConversationIntelligence:
     
     def get_learning_insights(self) -> Dict:
         """Get insights about Liora's learning progress"""
-        avg_satisfaction = sum(self.user_satisfaction_scores) / max(len(self.user_satisfaction_scores), 1)
-        
-        return {
-            'total_interactions': self.interaction_count,
-            'success_rate': self.successful_responses / max(self.interaction_count, 1),
-            'average_satisfaction': avg_satisfaction,
-            'top_topics': self.get_user_preferred_topics(),
-            'engagement_distribution': dict(self.user_engagement_patterns),
-            'learning_progress': 'beginner' if self.interaction_count < 50 else 'intermediate' if self.interaction_count < 200 else 'advanced'
-        }
+        with self.lock:
+            avg_satisfaction = sum(self.user_satisfaction_scores) / max(len(self.user_satisfaction_scores), 1)
+        
+            return {
+                'total_interactions': self.interaction_count,
+                'success_rate': self.successful_responses / max(self.interaction_count, 1),
+                'average_satisfaction': avg_satisfaction,
+                'top_topics': self.get_user_preferred_topics(),
+                'engagement_distribution': dict(self.user_engagement_patterns),
+                'learning_progress': 'beginner' if self.interaction_count < 50 else 'intermediate' if self.interaction_count < 200 else 'advanced'
+            }
     
     def decide_wikipedia_introduction(self, prompt: str, conversation_history: str) -> Tuple[bool, Optional[str]]:
         """Enhanced decision making for Wikipedia introductions with learning"""
@@ -0,0 +1,99 @@
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from title_generator import STOPWORDS
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'+#-]*")
+
+
+class ExampleIndex:
+    """Nearest-neighbour index over past exchanges, by hashed TF-IDF of the user message
+
+    Each example is one row of log term frequencies over hashed buckets.
+    Document frequencies are kept up to date as rows are added and
+    discarded, so IDF weights are applied at query time and nothing is
+    ever refit. Freed rows are reused by later additions.
+    """
+
+    def __init__(self, dim: int = 1024, capacity: int = 64):
+        self.dim = dim
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.document_frequency = np.zeros(dim, dtype=np.float32)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.examples: List[Optional[Dict]] = [None] * capacity
+        self._slots: Dict[int, int] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def term_vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in TOKEN_PATTERN.findall(text.lower()):
+            if word not in STOPWORDS:
+                vector[zlib.crc32(word.encode('utf-8')) % self.dim] += 1.0
+        return np.log1p(vector)
+
+    def add(self, example: Dict):
+        """Index an example by its user message"""
+        row = self.term_vector(example.get('user_message', ''))
+        with self._lock:
+            if id(example) in self._slots:
+                return
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+            self.matrix[slot] = row
+            self.document_frequency += row > 0
+            self.live[slot] = True
+            self.examples[slot] = example
+            self._slots[id(example)] = slot
+
+    def discard(self, example: Dict):
+        """Drop an example, e.g. when it is evicted from the pattern store"""
+        with self._lock:
+            slot = self._slots.pop(id(example), None)
+            if slot is None:
+                return
+            self.document_frequency -= self.matrix[slot] > 0
+            self.matrix[slot] = 0
+            self.live[slot] = False
+            self.examples[slot] = None
+            self._free.append(slot)
+
+    def rebuild(self, examples: List[Dict]):
+        for example in [example for example in self.examples if example is not None]:
+            self.discard(example)
+        for example in examples:
+            self.add(example)
+
+    def search(self, text: str, k: int = 2, min_score: float = 0.2) -> List[Tuple[Dict, float]]:
+        """(example, cosine similarity) for the k most similar examples, best first"""
+        query = self.term_vector(text)
+        if not query.any():
+            return []
+        with self._lock:
+            if not self._slots:
+                return []
+            idf = np.log((1 + len(self._slots)) / (1 + self.document_frequency)) + 1
+            weighted_query = query * idf
+            weighted_query /= np.linalg.norm(weighted_query)
+            # ||row * idf|| for every row in one product, instead of materializing the weighted matrix
+            norms = np.sqrt((self.matrix ** 2) @ (idf ** 2))
+            scores = (self.matrix @ (idf * weighted_query)) / np.where(norms > 0, norms, 1)
+            scores[~self.live] = -1
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.examples[slot], float(scores[slot])) for slot in top if scores[slot] >= min_score]
+
+    def _grow(self):
+        capacity = len(self.examples)
+        self.matrix = np.vstack([self.matrix, np.zeros((capacity, self.dim), dtype=np.float32)])
+        self.live = np.concatenate([self.live, np.zeros(capacity, dtype=bool)])
+        self.examples.extend([None] * capacity)
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def __len__(self) -> int:
+        return len(self._slots)
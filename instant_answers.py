@@ -0,0 +1,335 @@
+import ast
+import operator
+import random
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytz
+
+from intent_router import INTENT_SEARCH, INTENT_TIME, RoutingDecision
+from search_cache import answer_cache
+
+DEFAULT_TIMEZONE = ('Kenya', 'Africa/Nairobi')
+
+# Place names users ask about, mapped to IANA zones
+PLACE_TIMEZONES = {
+    'kenya': 'Africa/Nairobi', 'nairobi': 'Africa/Nairobi', 'mombasa': 'Africa/Nairobi',
+    'kisumu': 'Africa/Nairobi', 'east africa': 'Africa/Nairobi', 'uganda': 'Africa/Kampala',
+    'kampala': 'Africa/Kampala', 'tanzania': 'Africa/Dar_es_Salaam', 'dar es salaam': 'Africa/Dar_es_Salaam',
+    'rwanda': 'Africa/Kigali', 'kigali': 'Africa/Kigali', 'ethiopia': 'Africa/Addis_Ababa',
+    'addis ababa': 'Africa/Addis_Ababa', 'nigeria': 'Africa/Lagos', 'lagos': 'Africa/Lagos',
+    'south africa': 'Africa/Johannesburg', 'johannesburg': 'Africa/Johannesburg', 'cairo': 'Africa/Cairo',
+    'egypt': 'Africa/Cairo', 'london': 'Europe/London', 'uk': 'Europe/London', 'paris': 'Europe/Paris',
+    'berlin': 'Europe/Berlin', 'madrid': 'Europe/Madrid', 'rome': 'Europe/Rome', 'moscow': 'Europe/Moscow',
+    'dubai': 'Asia/Dubai', 'india': 'Asia/Kolkata', 'mumbai': 'Asia/Kolkata', 'delhi': 'Asia/Kolkata',
+    'china': 'Asia/Shanghai', 'beijing': 'Asia/Shanghai', 'shanghai': 'Asia/Shanghai',
+    'hong kong': 'Asia/Hong_Kong', 'singapore': 'Asia/Singapore', 'tokyo': 'Asia/Tokyo', 'japan': 'Asia/Tokyo',
+    'seoul': 'Asia/Seoul', 'sydney': 'Australia/Sydney', 'new york': 'America/New_York',
+    'nyc': 'America/New_York', 'toronto': 'America/Toronto', 'chicago': 'America/Chicago',
+    'los angeles': 'America/Los_Angeles', 'la': 'America/Los_Angeles', 'san francisco': 'America/Los_Angeles',
+    'mexico city': 'America/Mexico_City', 'sao paulo': 'America/Sao_Paulo', 'brazil': 'America/Sao_Paulo',
+    'utc': 'UTC', 'gmt': 'UTC'
+}
+PLACE_PATTERN = re.compile(
+    r"\b(?:in|at|for)\s+(" + "|".join(sorted((re.escape(p) for p in PLACE_TIMEZONES), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+DATE_ONLY_PATTERN = re.compile(r"\b(?:date|day|month|year)\b", re.IGNORECASE)
+TIME_WORD_PATTERN = re.compile(r"\btime\b", re.IGNORECASE)
+
+# The lead-in, trailing "=" or "?" is what marks a calculation: a bare "24/7", "50/50"
+# or "1990-2000" in chat is not one
+ARITHMETIC_PATTERN = re.compile(
+    r"^\s*((?:what(?:'s|s| is)|calculate|compute|evaluate|solve|how much is)\s+)?"
+    r"([-+*/().%^x×÷\d\s,]+?)\s*(=)?\s*(\?)?\s*$",
+    re.IGNORECASE
+)
+# Only commas that separate thousands, so "1,2" is not read as 12
+THOUSANDS_SEPARATOR = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+ARITHMETIC_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.USub: operator.neg, ast.UAdd: operator.pos
+}
+
+# Unit name -> (dimension, factor to the base unit of that dimension)
+UNITS = {
+    'm': ('length', 1.0), 'meter': ('length', 1.0), 'metre': ('length', 1.0),
+    'km': ('length', 1000.0), 'kilometer': ('length', 1000.0), 'kilometre': ('length', 1000.0),
+    'cm': ('length', 0.01), 'centimeter': ('length', 0.01), 'centimetre': ('length', 0.01),
+    'mm': ('length', 0.001), 'millimeter': ('length', 0.001), 'millimetre': ('length', 0.001),
+    'mi': ('length', 1609.344), 'mile': ('length', 1609.344),
+    'ft': ('length', 0.3048), 'foot': ('length', 0.3048), 'feet': ('length', 0.3048),
+    'in': ('length', 0.0254), 'inch': ('length', 0.0254), 'inches': ('length', 0.0254),
+    'yd': ('length', 0.9144), 'yard': ('length', 0.9144),
+    'kg': ('mass', 1.0), 'kilogram': ('mass', 1.0), 'g': ('mass', 0.001), 'gram': ('mass', 0.001),
+    'lb': ('mass', 0.45359237), 'lbs': ('mass', 0.45359237), 'pound': ('mass', 0.45359237),
+    'oz': ('mass', 0.028349523125), 'ounce': ('mass', 0.028349523125),
+    'stone': ('mass', 6.35029318), 'ton': ('mass', 1000.0), 'tonne': ('mass', 1000.0),
+    'l': ('volume', 1.0), 'liter': ('volume', 1.0), 'litre': ('volume', 1.0),
+    'ml': ('volume', 0.001), 'milliliter': ('volume', 0.001), 'millilitre': ('volume', 0.001),
+    'gallon': ('volume', 3.785411784), 'gal': ('volume', 3.785411784), 'cup': ('volume', 0.2365882365),
+    'pint': ('volume', 0.473176473),
+    'kph': ('speed', 1.0), 'km/h': ('speed', 1.0), 'kmh': ('speed', 1.0), 'mph': ('speed', 1.609344),
+    'knot': ('speed', 1.852), 'm/s': ('speed', 3.6),
+    'c': ('temperature', None), 'celsius': ('temperature', None), '°c': ('temperature', None),
+    'f': ('temperature', None), 'fahrenheit': ('temperature', None), '°f': ('temperature', None),
+    'k': ('temperature', None), 'kelvin': ('temperature', None)
+}
+UNIT_TOKEN = r"(°?[a-z]+(?:/[a-z]+)?)"
+CONVERSION_PATTERNS = [
+    # "convert 5 km to miles", "5km in miles", "what is 100 f in c"
+    re.compile(r"(?:convert\s+|what(?:'s|s| is)\s+)?(-?\d+(?:\.\d+)?)\s*" + UNIT_TOKEN
+               + r"\s+(?:to|in|into|as)\s+" + UNIT_TOKEN + r"\s*\??$", re.IGNORECASE),
+    # "how many feet in 3 meters"
+    re.compile(r"how\s+many\s+" + UNIT_TOKEN + r"\s+(?:are\s+)?in\s+(-?\d+(?:\.\d+)?)\s*" + UNIT_TOKEN
+               + r"\s*\??$", re.IGNORECASE),
+]
+
+# Per-personality templates; each kind may list several variants
+INSTANT_ANSWER_TEMPLATES = {
+    "Sarcastic & Funny": {
+        'time': ["""Oh hey there! Well well well, look who's asking about time like they don't have a phone! 😏
+
+The current date and time in {place} is: **{datetime}** ({zone})
+
+There you go, your time-telling AI at your service! Though I must say, asking an AI for the time is peak {year} energy. What's next, asking me to set your alarm? 😂
+
+What else can I help you with, time-conscious human?"""],
+        'date': ["*checks imaginary calendar* It's **{date}** in {place}, darling. Another day, another chance to ask me things your phone already knows. 😏"],
+        'arithmetic': ["*adjusts imaginary glasses* {expression} = **{result}**. Math: the one thing I do without drama. Well, mostly. 🧮😏",
+                       "*taps calculator dramatically* That's **{result}**. You're welcome, and your math teacher would be so proud. 😂"],
+        'conversion': ["*whips out a tape measure* {value} {from_unit} is **{result} {to_unit}**. The metric system sends its regards. 📏😏"],
+        'fact': ["*flips through my notes* I literally just looked this up, so here you go:\n\n{answer}"]
+    },
+    "Neutral Researcher": {
+        'time': ["The current date and time in {place} is **{datetime}** ({zone})."],
+        'date': ["Today's date in {place} is **{date}**."],
+        'arithmetic': ["{expression} = **{result}**."],
+        'conversion': ["{value} {from_unit} equals **{result} {to_unit}**."],
+        'fact': ["Based on a recent search:\n\n{answer}"]
+    },
+    "Creative Storyteller": {
+        'time': ["✨ *the clock tower chimes* In {place}, the hands of time point to **{datetime}** ({zone}). What story shall we write in this moment?"],
+        'date': ["🌟 *turns a page of the great calendar* In {place}, today is **{date}** — a fresh chapter waiting for its first line!"],
+        'arithmetic': ["💫 *numbers dance into place* {expression} gracefully becomes **{result}**!"],
+        'conversion': ["🎨 *reshapes the measure like clay* {value} {from_unit} transforms into **{result} {to_unit}**!"],
+        'fact': ["📜 *unrolls a freshly written scroll*\n\n{answer}"]
+    },
+    "Wise Mentor": {
+        'time': ["*breathes deeply* In {place}, it is **{datetime}** ({zone}). Time is a river; this is merely where it flows now."],
+        'date': ["*smiles serenely* Today in {place} is **{date}**. Each day is a new beginning."],
+        'arithmetic': ["*nods calmly* {expression} = **{result}**. Some truths are simple."],
+        'conversion': ["*bows respectfully* {value} {from_unit} is **{result} {to_unit}**. The measure changes; the thing itself does not."],
+        'fact': ["*opens arms warmly* I reflected on this recently:\n\n{answer}"]
+    }
+}
+
+
+def format_number(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer() and abs(value) < 1e15:
+        return f"{int(value):,}"
+    return f"{value:,.6g}" if abs(value) >= 1e6 or abs(value) < 1e-4 else f"{round(value, 4):,}"
+
+
+class InstantAnswerProvider:
+    """Base class for deterministic answerers that never call a model"""
+
+    kind = ''
+
+    def match(self, prompt: str, decision: Optional[RoutingDecision], personality_mode: str) -> Optional[Dict]:
+        """Return template variables if this provider can answer the prompt"""
+        raise NotImplementedError
+
+
+class TimeProvider(InstantAnswerProvider):
+    """Current time or date in a named place"""
+
+    kind = 'time'
+
+    def __init__(self):
+        # pytz zone objects are built once instead of on every question
+        self.zones = {zone: pytz.timezone(zone) for zone in set(PLACE_TIMEZONES.values())}
+        self.zones.setdefault(DEFAULT_TIMEZONE[1], pytz.timezone(DEFAULT_TIMEZONE[1]))
+
+    def match(self, prompt, decision, personality_mode):
+        # A time rule must have matched: the classifier alone is not enough to answer with the clock
+        if decision is None or decision.intent != INTENT_TIME or not decision.scores.get(INTENT_TIME):
+            return None
+
+        place, zone_name = DEFAULT_TIMEZONE
+        place_match = PLACE_PATTERN.search(prompt)
+        if place_match:
+            place_key = place_match.group(1).lower()
+            place, zone_name = place_match.group(1).title() if len(place_key) > 3 else place_key.upper(), PLACE_TIMEZONES[place_key]
+
+        now = datetime.now(self.zones[zone_name])
+        date_only = DATE_ONLY_PATTERN.search(prompt) and not TIME_WORD_PATTERN.search(prompt)
+        return {
+            'kind': 'date' if date_only else 'time',
+            'place': place,
+            'zone': now.strftime('%Z'),
+            'datetime': now.strftime('%A, %B %d, %Y at %I:%M %p'),
+            'date': now.strftime('%A, %B %d, %Y'),
+            'year': now.strftime('%Y')
+        }
+
+
+class ArithmeticProvider(InstantAnswerProvider):
+    """Plain arithmetic, evaluated safely without eval()"""
+
+    kind = 'arithmetic'
+    max_exponent = 100
+    max_length = 120
+    max_result_bits = 4096
+
+    def match(self, prompt, decision, personality_mode):
+        if len(prompt) > self.max_length:
+            return None
+        match = ARITHMETIC_PATTERN.match(prompt)
+        if not match or not any(match.group(1, 3, 4)):
+            return None
+        expression = match.group(2).strip()
+        if not re.search(r"\d", expression) or not re.search(r"[-+*/%^x×÷]", expression.lstrip('-')):
+            return None
+
+        normalized = (THOUSANDS_SEPARATOR.sub('', expression).replace('^', '**').replace('×', '*')
+                      .replace('÷', '/').replace('x', '*').replace('X', '*'))
+        try:
+            result = self._evaluate(ast.parse(normalized, mode='eval').body)
+        except (SyntaxError, ValueError, TypeError, ZeroDivisionError, OverflowError):
+            return None
+        return {'expression': expression, 'result': format_number(result)}
+
+    def _evaluate(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and type(node.op) in ARITHMETIC_OPERATORS:
+            return ARITHMETIC_OPERATORS[type(node.op)](self._evaluate(node.operand))
+        if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC_OPERATORS:
+            left, right = self._evaluate(node.left), self._evaluate(node.right)
+            if isinstance(node.op, ast.Pow) and abs(right) > self.max_exponent:
+                raise ValueError("Exponent too large")
+            if self._result_bits(node.op, left, right) > self.max_result_bits:
+                raise ValueError("Result too large")
+            return ARITHMETIC_OPERATORS[type(node.op)](left, right)
+        raise ValueError("Unsupported expression")
+
+    @staticmethod
+    def _result_bits(op, left, right) -> int:
+        """Upper bound on the size of an integer result, estimated before computing it
+
+        Floats overflow on their own; big integers don't, and (9^99)^99 would
+        hold the worker for as long as it takes to multiply it out.
+        """
+        if not isinstance(left, int) or not isinstance(right, int):
+            return 0
+        if isinstance(op, ast.Pow):
+            return abs(left).bit_length() * max(right, 0)
+        if isinstance(op, ast.Mult):
+            return abs(left).bit_length() + abs(right).bit_length()
+        return 0
+
+
+class UnitConversionProvider(InstantAnswerProvider):
+    """Length, mass, volume, speed and temperature conversions"""
+
+    kind = 'conversion'
+
+    def match(self, prompt, decision, personality_mode):
+        text = prompt.strip()
+        match = CONVERSION_PATTERNS[0].search(text)
+        if match:
+            value, from_unit, to_unit = match.group(1), match.group(2), match.group(3)
+        else:
+            match = CONVERSION_PATTERNS[1].search(text)
+            if not match:
+                return None
+            to_unit, value, from_unit = match.group(1), match.group(2), match.group(3)
+
+        source, target = self._unit(from_unit), self._unit(to_unit)
+        if source is None or target is None or UNITS[source][0] != UNITS[target][0]:
+            return None
+
+        amount = float(value)
+        if UNITS[source][0] == 'temperature':
+            result = self._convert_temperature(amount, source, target)
+        else:
+            result = amount * UNITS[source][1] / UNITS[target][1]
+        return {'value': value, 'from_unit': from_unit, 'to_unit': to_unit, 'result': format_number(result)}
+
+    @staticmethod
+    def _unit(name: str) -> Optional[str]:
+        name = name.lower()
+        if name in UNITS:
+            return name
+        # Accept simple plurals: miles, kilograms, litres
+        singular = name[:-2] if name.endswith('es') and name[:-2] in UNITS else name[:-1]
+        return singular if name.endswith('s') and singular in UNITS else None
+
+    @staticmethod
+    def _convert_temperature(value: float, source: str, target: str) -> float:
+        source, target = source.lstrip('°')[0], target.lstrip('°')[0]
+        celsius = {'c': value, 'f': (value - 32) * 5 / 9, 'k': value - 273.15}[source]
+        return {'c': celsius, 'f': celsius * 9 / 5 + 32, 'k': celsius + 273.15}[target]
+
+
+class CachedFactProvider(InstantAnswerProvider):
+    """Replays a fresh answer to the same search question from the shared answer cache
+
+    Only search-routed prompts are looked up, since only search answers are
+    cached; the key keeps word order (see search_cache.normalize_query).
+    """
+
+    kind = 'fact'
+
+    def __init__(self, cache=answer_cache):
+        self.cache = cache
+
+    def match(self, prompt, decision, personality_mode):
+        if decision is None or decision.intent != INTENT_SEARCH:
+            return None
+        answer = self.cache.get(prompt, namespace=personality_mode)
+        return {'answer': answer} if answer else None
+
+
+class InstantAnswerEngine:
+    """Answers deterministic questions without an LLM or network call
+
+    Providers are tried in order; the first match is rendered with the active
+    personality's template.
+    """
+
+    def __init__(self, providers: Optional[List[InstantAnswerProvider]] = None, templates=None):
+        self.providers = list(providers) if providers is not None else [
+            TimeProvider(), ArithmeticProvider(), UnitConversionProvider(), CachedFactProvider()
+        ]
+        self.templates = templates or INSTANT_ANSWER_TEMPLATES
+
+    def register(self, provider: InstantAnswerProvider, first: bool = False):
+        """Add a provider, optionally ahead of the built-in ones"""
+        if first:
+            self.providers.insert(0, provider)
+        else:
+            self.providers.append(provider)
+
+    def answer(self, prompt: str, personality_mode: str, decision: Optional[RoutingDecision] = None) -> Optional[str]:
+        """Render an instant answer for the prompt, or None if no provider applies"""
+        for provider in self.providers:
+            try:
+                variables = provider.match(prompt, decision, personality_mode)
+            except Exception as e:
+                print(f"Instant answer provider {provider.kind} failed: {e}")
+                continue
+            if variables is not None:
+                return self.render(variables.pop('kind', provider.kind), variables, personality_mode)
+        return None
+
+    def render(self, kind: str, variables: Dict, personality_mode: str) -> str:
+        templates = self.templates.get(personality_mode, self.templates["Sarcastic & Funny"])
+        return random.choice(templates[kind]).format(**variables)
+
+
+# Global instance
+instant_answer_engine = InstantAnswerEngine()
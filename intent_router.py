@@ -0,0 +1,223 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+INTENT_CHAT = 'chat'
+INTENT_SEARCH = 'search'
+INTENT_TIME = 'time'
+INTENTS = (INTENT_CHAT, INTENT_SEARCH, INTENT_TIME)
+
+# Optional place and "now" tail of a time question, then the end of the message, so "what date
+# should I pick for my wedding" or "I had a great time in Paris" are not time questions
+TIME_PLACE = r"in\s+[a-z]+(?:\s+[a-z]+){0,3}"
+TIME_TAIL = r"(?:\s+" + TIME_PLACE + r")?(?:\s+(?:now|right\s+now|today|please))?\s*[?.!]*$"
+
+# (intent, weight, pattern) - every pattern is matched on word boundaries
+ROUTING_RULES = [
+    # Time and date questions
+    (INTENT_TIME, 3.0, r"\bwhat(?:'s|s| is)\s+(?:the\s+)?(?:current\s+)?(?:time|date)" + TIME_TAIL),
+    (INTENT_TIME, 3.0, r"\bwhat\s+time\s+is\s+it" + TIME_TAIL),
+    (INTENT_TIME, 2.5, r"\b(?:current|today'?s)\s+(?:time|date)" + TIME_TAIL),
+    (INTENT_TIME, 2.5, r"\bwhat\s+(?:day|year|month)\s+is\s+(?:it|today)" + TIME_TAIL),
+    (INTENT_TIME, 2.0, r"^\W*(?:the\s+)?time\s+(?:now|" + TIME_PLACE + r"(?:\s+(?:now|right\s+now))?)\s*[?.!]*$"),
+    (INTENT_TIME, 1.5, r"\b(?:tell|give)\s+me\s+the\s+(?:time|date)" + TIME_TAIL),
+    (INTENT_TIME, 1.0, r"\btoday'?s\s+date" + TIME_TAIL),
+
+    # Fresh information that needs a web search
+    (INTENT_SEARCH, 2.0, r"\b(?:latest|breaking|recent|today'?s)\s+news\b"),
+    (INTENT_SEARCH, 1.5, r"\bnews\b"),
+    (INTENT_SEARCH, 1.5, r"\bwhat\s+happened\b"),
+    (INTENT_SEARCH, 1.5, r"\bjust\s+in\b"),
+    # A forecast for somewhere or some day, not "I love rain" or "I hate this weather"
+    (INTENT_SEARCH, 1.5, r"\bweather\s+(?:in|for|at|today|tomorrow|tonight|this|forecast|like\s+(?:in|today|tomorrow))\b"
+                         r"|\b(?:how|what)(?:'s|s| is)\s+the\s+weather\b|\bforecast\b"
+                         r"|\b(?:going\s+to|will\s+it|is\s+it)\s+(?:rain|snow)\b|\btemperature\s+(?:in|today|tomorrow|outside)\b"),
+    # Quotes, not "explain how stocks work"
+    (INTENT_SEARCH, 1.5, r"\b(?:stock|share)\s+prices?\b|\bexchange\s+rates?\b|\bstocks?\s+(?:market\s+)?(?:today|now)\b"),
+    (INTENT_SEARCH, 1.5, r"\btrending\b|\bbreaking\b"),
+    (INTENT_SEARCH, 1.2, r"\bwho\s+won\b|\bscores?\b"),
+    (INTENT_SEARCH, 1.0, r"\blatest\b"),
+    # Prices that move, not "the price of freedom"
+    (INTENT_SEARCH, 1.0, r"\b(?:bitcoin|btc|crypto|gold|oil|fuel|petrol|gas|stock|share)\s+prices?\b"
+                         r"|\bprice\s+of\s+(?:bitcoin|btc|gold|oil|fuel|petrol|gas)\b|\bprices?\s+(?:today|now|right\s+now)\b"),
+    (INTENT_SEARCH, 1.0, r"\bviral\b"),
+    (INTENT_SEARCH, 0.8, r"\btoday\b|\btonight\b|\bthis\s+week\b"),
+    (INTENT_SEARCH, 0.8, r"\bcurrent(?:ly)?\b|\brecent(?:ly)?\b"),
+    (INTENT_SEARCH, 0.6, r"\bupdates?\b"),
+    (INTENT_SEARCH, 0.6, r"\bkenya\b|\bnairobi\b|\beast\s+africa\b"),
+
+    # Signals that the user just wants to talk
+    (INTENT_CHAT, 1.0, r"\bi\s+(?:think|feel|felt|believe|love|hate|had|was|am|read|saw|heard|watched)\b"),
+    # How something made the user feel is for talking through, even when the something was in the news
+    (INTENT_CHAT, 1.5, r"\b(?:felt|feel(?:ing)?|makes?\s+me|made\s+me)\s+(?:so\s+|really\s+|very\s+|a\s+bit\s+)?"
+                       r"(?:sad|down|upset|angry|anxious|scared|afraid|worried|lonely|hopeless|depressed|happy)\b"
+                       r"|\b(?:scared|upset|saddened|worried|depressed)\s+me\b"),
+    (INTENT_CHAT, 1.0, r"\b(?:tell\s+me\s+a|write\s+(?:me\s+)?a)\s+(?:joke|story|poem)\b"),
+    (INTENT_CHAT, 0.8, r"\b(?:how\s+are\s+you|what\s+do\s+you\s+think|your\s+opinion)\b"),
+    # Explanations come from the model's own knowledge, whatever the topic
+    (INTENT_CHAT, 1.5, r"\bexplain\b|\bhow\s+(?:does|do)\s+(?:\w+\s+){1,3}work\b"),
+    (INTENT_CHAT, 0.8, r"\b(?:history\s+of|meaning\s+of|what\s+is\s+a)\b"),
+]
+
+# Score an intent needs before it beats plain chat
+ROUTE_THRESHOLD = 1.0
+
+# Small built-in training set for the optional local classifier
+TRAINING_EXAMPLES = [
+    ("what time is it", INTENT_TIME),
+    ("what's the date today", INTENT_TIME),
+    ("current time in nairobi", INTENT_TIME),
+    ("what day is it", INTENT_TIME),
+    ("tell me the time please", INTENT_TIME),
+    ("what is today's date", INTENT_TIME),
+    ("latest news in kenya", INTENT_SEARCH),
+    ("what happened in the election", INTENT_SEARCH),
+    ("weather in nairobi tomorrow", INTENT_SEARCH),
+    ("apple stock price", INTENT_SEARCH),
+    ("who won the match last night", INTENT_SEARCH),
+    ("what is trending on twitter", INTENT_SEARCH),
+    ("breaking news today", INTENT_SEARCH),
+    ("bitcoin price right now", INTENT_SEARCH),
+    ("any updates on the strike", INTENT_SEARCH),
+    ("i had a great time at the party", INTENT_CHAT),
+    ("sometimes i wonder about life", INTENT_CHAT),
+    ("tell me a joke", INTENT_CHAT),
+    ("how are you doing", INTENT_CHAT),
+    ("explain quantum physics", INTENT_CHAT),
+    ("what do you think about pineapple on pizza", INTENT_CHAT),
+    ("i feel tired today", INTENT_CHAT),
+    ("write me a poem about the sea", INTENT_CHAT),
+    ("what is the meaning of life", INTENT_CHAT),
+    ("tell me about the history of rome", INTENT_CHAT),
+    ("what date should i pick for my wedding", INTENT_CHAT),
+    ("i love rain", INTENT_CHAT),
+    ("explain how stocks work", INTENT_CHAT),
+]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+class RoutingDecision(NamedTuple):
+    intent: str
+    confidence: float
+    scores: Dict[str, float]
+    matched: Tuple[str, ...]
+    source: str
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class NaiveBayesIntentClassifier:
+    """Tiny multinomial naive Bayes over unigrams and bigrams, pure Python"""
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.class_counts = Counter()
+        self.feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.total_features = Counter()
+        self.vocabulary = set()
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> "NaiveBayesIntentClassifier":
+        for text, label in examples:
+            self.class_counts[label] += 1
+            for feature in self.features(text):
+                self.feature_counts[label][feature] += 1
+                self.total_features[label] += 1
+                self.vocabulary.add(feature)
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Posterior probability of each intent"""
+        features = self.features(text)
+        total_examples = sum(self.class_counts.values())
+        vocab_size = len(self.vocabulary) or 1
+        log_scores = {}
+        for label, count in self.class_counts.items():
+            score = math.log(count / total_examples)
+            denominator = self.total_features[label] + self.alpha * vocab_size
+            for feature in features:
+                if feature in self.vocabulary:
+                    score += math.log((self.feature_counts[label][feature] + self.alpha) / denominator)
+            log_scores[label] = score
+
+        peak = max(log_scores.values())
+        exp_scores = {label: math.exp(score - peak) for label, score in log_scores.items()}
+        total = sum(exp_scores.values())
+        return {label: value / total for label, value in exp_scores.items()}
+
+
+class IntentRouter:
+    """Precompiled, weighted intent routing for incoming prompts
+
+    Rules are compiled once. Each prompt is scored per intent by summing the
+    weights of matching rules, and the winner must clear ROUTE_THRESHOLD to
+    beat plain chat. When the rules are unsure, the optional local classifier
+    is blended in.
+    """
+
+    def __init__(self, rules=None, threshold: float = ROUTE_THRESHOLD,
+                 classifier: Optional[NaiveBayesIntentClassifier] = None,
+                 classifier_weight: float = 0.5, ambiguity_margin: float = 0.75):
+        self.threshold = threshold
+        self.classifier = classifier
+        self.classifier_weight = classifier_weight
+        self.ambiguity_margin = ambiguity_margin
+        self.rules = [
+            (intent, weight, re.compile(pattern, re.IGNORECASE), pattern)
+            for intent, weight, pattern in (rules or ROUTING_RULES)
+        ]
+
+    def score(self, prompt: str) -> Tuple[Dict[str, float], Tuple[str, ...]]:
+        """Sum of matching rule weights per intent"""
+        scores = {intent: 0.0 for intent in INTENTS}
+        matched = []
+        for intent, weight, compiled, pattern in self.rules:
+            if compiled.search(prompt):
+                scores[intent] += weight
+                matched.append(pattern)
+        return scores, tuple(matched)
+
+    def route(self, prompt: str) -> RoutingDecision:
+        """Decide which pipeline should answer a prompt"""
+        scores, matched = self.score(prompt)
+
+        # Plain chat wins unless another intent clears the threshold
+        contenders = {intent: score for intent, score in scores.items() if intent != INTENT_CHAT}
+        best_intent = max(contenders, key=contenders.get)
+        best_score = contenders[best_intent]
+        if best_score >= self.threshold and best_score > scores[INTENT_CHAT]:
+            intent = best_intent
+            margin = best_score - max(self.threshold, scores[INTENT_CHAT])
+        else:
+            intent = INTENT_CHAT
+            margin = max(self.threshold - best_score, scores[INTENT_CHAT] - best_score)
+        confidence = 1.0 / (1.0 + math.exp(-2.0 * (margin + 0.5)))
+
+        if self.classifier is not None and margin < self.ambiguity_margin:
+            probabilities = self.classifier.predict_proba(prompt)
+            blended = {}
+            for candidate in INTENTS:
+                rule_vote = confidence if candidate == intent else (1.0 - confidence) / (len(INTENTS) - 1)
+                blended[candidate] = ((1 - self.classifier_weight) * rule_vote
+                                      + self.classifier_weight * probabilities.get(candidate, 0.0))
+            blended_intent = max(blended, key=blended.get)
+            return RoutingDecision(blended_intent, blended[blended_intent], scores, matched, 'classifier')
+
+        return RoutingDecision(intent, confidence, scores, matched, 'rules')
+
+
+def build_default_router(use_classifier: bool = True) -> IntentRouter:
+    classifier = NaiveBayesIntentClassifier().fit(TRAINING_EXAMPLES) if use_classifier else None
+    return IntentRouter(classifier=classifier)
+
+
+# Global instance
+intent_router = build_default_router()
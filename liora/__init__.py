@@ -0,0 +1,23 @@
+"""Headless Liora core: everything needed to run a chat turn without Streamlit."""
+from liora.config import LioraConfig
+from liora.engine import LioraEngine, build_conversation_history, get_engine, iter_text
+from liora.models import DEFAULT_MODEL, MODELS, initialize_model
+from liora.personalities import DEFAULT_MODE, PERSONALITY_MODES, get_liora_personality
+from liora.session import LioraSession
+from liora.storage import ConversationStore
+
+__all__ = [
+    "ConversationStore",
+    "DEFAULT_MODE",
+    "DEFAULT_MODEL",
+    "LioraConfig",
+    "LioraEngine",
+    "LioraSession",
+    "MODELS",
+    "PERSONALITY_MODES",
+    "build_conversation_history",
+    "get_engine",
+    "get_liora_personality",
+    "initialize_model",
+    "iter_text",
+]
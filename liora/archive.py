@@ -0,0 +1,400 @@
+"""Streaming JSONL export and import for conversations and learning state.
+
+    python -m liora.archive export backup.jsonl.gz [--conversations-file PATH] [--no-intelligence]
+    python -m liora.archive import backup.jsonl.gz [--conversations-file PATH] [--chunk-size 1000]
+                                                   [--on-conflict skip|replace] [--learning merge|replace]
+                                                   [--restart]
+
+An archive is one JSON record per line: a header, then each conversation
+followed by its messages one per line, then the learning state (metrics,
+each learned pattern on its own line, preferences), then a footer with
+counts. Records are written and read one at a time, so the archive itself is
+never held in memory. Paths ending in .gz are gzip-compressed; import
+detects compression on its own.
+
+Import commits every --chunk-size records: the destination store and
+learning files are saved and the byte offset reached is written next to the
+archive (<archive>.import-state). Rerunning an interrupted import continues
+from that offset. Before saving, a commit notes in the state which
+conversations the chunk created and whether its learning counters were
+saved, so a crash mid-commit replays the chunk into those conversations
+instead of skipping them as conflicts or adding the counters twice.
+
+The destination store is a single pickle that is loaded whole and rewritten
+on every commit, so an import of N conversations writes O(N²) bytes in
+total; raise --chunk-size for large archives.
+
+By default imported learning state is merged into the destination's:
+counters are added, patterns appended (effective responses keep their
+usual cap) and existing preferences win. --learning replace overwrites the
+destination's learning state with the archive's instead.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from liora.storage import ConversationStore
+
+ARCHIVE_FORMAT = "liora-archive"
+ARCHIVE_VERSION = 1
+
+CONFLICT_SKIP = 'skip'
+CONFLICT_REPLACE = 'replace'
+
+LEARNING_MERGE = 'merge'
+LEARNING_REPLACE = 'replace'
+
+LEARNING_METRIC_FIELDS = (
+    'interaction_count', 'successful_responses', 'user_satisfaction_scores',
+    'topic_frequency', 'response_effectiveness', 'user_engagement_patterns'
+)
+
+
+def open_archive(path: str, mode: str):
+    """Open an archive for binary reading or writing, gzip-compressed when appropriate"""
+    if 'w' in mode:
+        return gzip.open(path, 'wb') if path.endswith('.gz') else open(path, 'wb')
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    return gzip.open(path, 'rb') if compressed else open(path, 'rb')
+
+
+def encode_record(record: Dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False,
+                       default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o)) + "\n").encode('utf-8')
+
+
+def parse_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else datetime.now()
+
+
+# Export
+
+def iter_conversation_records(store: ConversationStore) -> Iterator[Dict]:
+    for conversation_id in list(store.conversations):
+        conversation = store.get(conversation_id)
+        if conversation is None:
+            continue
+        yield {
+            "type": "conversation",
+            "id": conversation["id"],
+            "title": conversation["title"],
+            "created_at": conversation["created_at"],
+            "last_updated": conversation["last_updated"],
+            "summary": conversation.get("summary")
+        }
+        for position, message in enumerate(list(conversation["messages"])):
+            yield dict(message, type="message", conversation_id=conversation["id"], position=position)
+
+
+def iter_intelligence_records(intelligence) -> Iterator[Dict]:
+    metrics = {field: getattr(intelligence, field) for field in LEARNING_METRIC_FIELDS}
+    metrics['topic_frequency'] = dict(metrics['topic_frequency'])
+    yield dict(metrics, type="learning_metrics")
+
+    for key, value in intelligence.conversation_patterns.items():
+        if isinstance(value, list):
+            for item in value:
+                yield {"type": "pattern", "key": key, "item": item}
+        else:
+            yield {"type": "pattern_value", "key": key, "value": value}
+
+    yield {"type": "user_preferences", "value": intelligence.user_preferences}
+
+
+def export_archive(path: str, store: ConversationStore, intelligence=None) -> Counter:
+    """Write the store (and optionally learning state) to a JSONL archive, one record at a time"""
+    counts = Counter()
+    with open_archive(path, 'wb') as out:
+        out.write(encode_record({
+            "type": "header", "format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION,
+            "created_at": datetime.now(), "includes_intelligence": intelligence is not None
+        }))
+        records = iter_conversation_records(store)
+        if intelligence is not None:
+            records = _chain(records, iter_intelligence_records(intelligence))
+        for record in records:
+            out.write(encode_record(record))
+            counts[record["type"]] += 1
+        out.write(encode_record(dict(counts, type="footer")))
+    return counts
+
+
+def _chain(*iterators):
+    for iterator in iterators:
+        yield from iterator
+
+
+# Import
+
+def read_records(path: str, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """Yield (record, offset after the record) starting at a byte offset of the uncompressed stream"""
+    with open_archive(path, 'rb') as f:
+        if offset:
+            f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.endswith(b"\n"):
+                raise ValueError(f"Truncated record at the end of {path}")
+            offset += len(line)
+            if line.strip():
+                yield json.loads(line), offset
+
+
+def state_path(archive_path: str) -> str:
+    return archive_path + ".import-state"
+
+
+def load_import_state(archive_path: str) -> Dict:
+    try:
+        with open(state_path(archive_path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_import_state(archive_path: str, state: Dict):
+    # Write then rename, so a crash never leaves a half-written checkpoint
+    temporary = state_path(archive_path) + ".tmp"
+    with open(temporary, 'w') as f:
+        json.dump(state, f)
+    os.replace(temporary, state_path(archive_path))
+
+
+class ArchiveImporter:
+    """Applies archive records to a store and learning engine in resumable chunks"""
+
+    def __init__(self, store: ConversationStore, intelligence=None, on_conflict: str = CONFLICT_SKIP,
+                 chunk_size: int = 1000, learning: str = LEARNING_MERGE):
+        self.store = store
+        self.intelligence = intelligence
+        self.on_conflict = on_conflict
+        self.learning = learning
+        self.chunk_size = max(1, chunk_size)
+        self.counts = Counter()
+        # Conversation whose messages are currently being read; None while skipping one
+        self._current_id: Optional[str] = None
+        # Last committed progress, and what the uncommitted chunk has done since
+        self._checkpoint: Dict = {}
+        self._created = []
+        self._merged_metrics = False
+        # While replaying a chunk whose commit was interrupted
+        self._replaying = False
+        self._replay_created = set()
+        self._replay_learning_saved = False
+
+    def run(self, path: str, resume: bool = True) -> Counter:
+        state = load_import_state(path) if resume else {}
+        offset = state.get("offset", 0)
+        self._current_id = state.get("current_conversation")
+        self.counts = Counter(state.get("counts", {}))
+        self._checkpoint = {key: value for key, value in state.items() if key != "pending"}
+        interrupted = state.get("pending") or {}
+        replay_until = interrupted.get("offset", 0)
+        self._replay_created = set(interrupted.get("created", []))
+        self._replay_learning_saved = interrupted.get("learning_saved", False)
+        if offset:
+            print(f"Resuming import of {path} at byte {offset}", file=sys.stderr)
+
+        pending = 0
+        for record, offset in read_records(path, offset):
+            self._replaying = offset <= replay_until
+            self.apply(record)
+            pending += 1
+            if pending >= self.chunk_size:
+                self.commit(path, offset)
+                pending = 0
+
+        self.commit(path, offset)
+        os.remove(state_path(path))
+        return self.counts
+
+    def apply(self, record: Dict):
+        record_type = record.get("type")
+        if record_type == "header":
+            if record.get("format") != ARCHIVE_FORMAT or record.get("version", 0) > ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive: {record.get('format')} v{record.get('version')}")
+        elif record_type == "conversation":
+            self.apply_conversation(record)
+        elif record_type == "message":
+            self.apply_message(record)
+        elif record_type in ("learning_metrics", "pattern", "pattern_value", "user_preferences"):
+            if self.intelligence is not None:
+                self.apply_intelligence(record)
+                self.counts[record_type] += 1
+        elif record_type != "footer":
+            self.counts["unknown"] += 1
+
+    def apply_conversation(self, record: Dict):
+        conversation_id = record["id"]
+        if self._replaying and conversation_id in self._replay_created and conversation_id in self.store:
+            # Created by this import before the crash; its messages continue below
+            self._created.append(conversation_id)
+            self._current_id = conversation_id
+            self.counts["conversation"] += 1
+            return
+        if conversation_id in self.store:
+            if self.on_conflict == CONFLICT_SKIP:
+                self._current_id = None
+                self.counts["conversations_skipped"] += 1
+                return
+            self.store.delete(conversation_id)
+
+        conversation = {
+            "id": conversation_id,
+            "title": record.get("title"),
+            "messages": [],
+            "created_at": parse_datetime(record.get("created_at")),
+            "last_updated": parse_datetime(record.get("last_updated"))
+        }
+        if record.get("summary"):
+            conversation["summary"] = dict(record["summary"],
+                                           updated_at=parse_datetime(record["summary"].get("updated_at")))
+        self.store.insert(conversation)
+        self._created.append(conversation_id)
+        self._current_id = conversation_id
+        self.counts["conversation"] += 1
+
+    def apply_message(self, record: Dict):
+        if record.get("conversation_id") != self._current_id or self._current_id is None:
+            self.counts["messages_skipped"] += 1
+            return
+        # Already restored before a crash between saving the store and saving the import state
+        if record.get("position", -1) < self.store.message_count(self._current_id):
+            self.counts["message"] += 1
+            return
+        message = {key: value for key, value in record.items()
+                   if key not in ("type", "conversation_id", "position")}
+        self.store.restore_message(self._current_id, message)
+        self.counts["message"] += 1
+
+    def apply_intelligence(self, record: Dict):
+        intelligence = self.intelligence
+        record_type = record["type"]
+        replace = self.learning == LEARNING_REPLACE
+        if record_type == "learning_metrics":
+            if replace:
+                for field in LEARNING_METRIC_FIELDS:
+                    if field in record:
+                        setattr(intelligence, field, record[field])
+                intelligence.topic_frequency = Counter(intelligence.topic_frequency)
+                # Learned patterns follow this record; start them from the archive's copy
+                for key, value in list(intelligence.conversation_patterns.items()):
+                    if isinstance(value, list):
+                        intelligence.replace_patterns(key, [])
+            elif not (self._replaying and self._replay_learning_saved):
+                self.merge_learning_metrics(record)
+                self._merged_metrics = True
+        elif record_type == "pattern":
+            key, item = record["key"], record["item"]
+            patterns = intelligence.conversation_patterns.setdefault(key, [])
+            if (not replace or self._replaying) and item in patterns:
+                return
+            if key == 'effective_responses':
+                # Keeps the cap and the few-shot example index in step
+                intelligence.add_effective_response(item)
+            else:
+                patterns.append(item)
+        elif record_type == "pattern_value":
+            if replace or record["key"] not in intelligence.conversation_patterns:
+                intelligence.replace_patterns(record["key"], record["value"])
+        elif replace:
+            intelligence.user_preferences = record["value"]
+        else:
+            intelligence.user_preferences = dict(record["value"], **intelligence.user_preferences)
+
+    def merge_learning_metrics(self, record: Dict):
+        """Add the archive's counters to the destination's instead of overwriting them"""
+        intelligence = self.intelligence
+        intelligence.interaction_count += record.get('interaction_count', 0)
+        intelligence.successful_responses += record.get('successful_responses', 0)
+        intelligence.user_satisfaction_scores = (
+            list(record.get('user_satisfaction_scores', [])) + intelligence.user_satisfaction_scores
+        )[-100:]
+        intelligence.topic_frequency = Counter(intelligence.topic_frequency)
+        intelligence.topic_frequency.update(record.get('topic_frequency', {}))
+        for level, count in record.get('user_engagement_patterns', {}).items():
+            intelligence.user_engagement_patterns[level] = intelligence.user_engagement_patterns.get(level, 0) + count
+        for key, value in record.get('response_effectiveness', {}).items():
+            intelligence.response_effectiveness.setdefault(key, value)
+
+    def commit(self, path: str, offset: int):
+        """Persist everything applied so far, then record how far the archive was read
+
+        The previous checkpoint is rewritten first with a note of what this
+        chunk did, so a crash before the new checkpoint lands can be replayed
+        without duplicating it.
+        """
+        pending = {"offset": offset, "created": self._created, "learning_saved": False}
+        save_import_state(path, dict(self._checkpoint, pending=pending))
+        self.store.save()
+        if self.intelligence is not None:
+            self.intelligence.save_learning_data()
+            if self._merged_metrics:
+                pending["learning_saved"] = True
+                save_import_state(path, dict(self._checkpoint, pending=pending))
+            self.intelligence.save_conversation_patterns()
+            self.intelligence.save_user_preferences()
+        self._checkpoint = {
+            "offset": offset,
+            "current_conversation": self._current_id,
+            "counts": dict(self.counts),
+            "updated_at": time.time()
+        }
+        save_import_state(path, self._checkpoint)
+        self._created = []
+        self._merged_metrics = False
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Export or import Liora conversations and learning state")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write an archive")
+    export_parser.add_argument("archive", help="Output path; .gz compresses")
+
+    import_parser = commands.add_parser("import", help="Load an archive, resuming if interrupted")
+    import_parser.add_argument("archive")
+    import_parser.add_argument("--chunk-size", type=int, default=1000, help="Records per commit")
+    import_parser.add_argument("--on-conflict", choices=(CONFLICT_SKIP, CONFLICT_REPLACE), default=CONFLICT_SKIP,
+                               help="What to do with conversation ids that already exist")
+    import_parser.add_argument("--learning", choices=(LEARNING_MERGE, LEARNING_REPLACE), default=LEARNING_MERGE,
+                               help="Merge the archive's learning state into this install's, or replace it")
+    import_parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start over")
+
+    for command in (export_parser, import_parser):
+        command.add_argument("--conversations-file", default="conversations.pkl")
+        command.add_argument("--no-intelligence", action="store_true", help="Leave learning state out")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    store = ConversationStore(args.conversations_file, full_text=False)
+
+    intelligence = None
+    if not args.no_intelligence:
+        from liora.resources import INTELLIGENCE, resource_cache
+        intelligence = resource_cache.get(INTELLIGENCE)
+
+    started = time.monotonic()
+    if args.command == "export":
+        counts = export_archive(args.archive, store, intelligence)
+    else:
+        importer = ArchiveImporter(store, intelligence, args.on_conflict, args.chunk_size, args.learning)
+        counts = importer.run(args.archive, resume=not args.restart)
+
+    summary = ", ".join(f"{count} {name}" for name, count in sorted(counts.items()))
+    print(f"{args.command}ed {summary or 'nothing'} in {time.monotonic() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
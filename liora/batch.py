@@ -0,0 +1,301 @@
+"""Batch generation over JSONL.
+
+    python -m liora.batch prompts.jsonl -o results.jsonl [--concurrency 8] [--stub]
+
+Each input line is a JSON object such as
+    {"id": "q1", "prompt": "any news from nairobi?", "mode": "Wise Mentor", "model": "Mistral 7B"}
+
+with an optional "task":
+    reply    (default) answer the prompt through the full pipeline; "history" may
+             hold earlier messages as a list of {"role", "content"} or plain text
+    starter  generate a conversation starter for the personality
+    title    title a conversation from its first user message in "prompt"
+
+Results are appended to the output file as they finish, one JSON object per
+line, carrying the input fields plus status, output and timings. The output
+file is also the checkpoint: rerunning with the same output skips every id
+that already succeeded.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from liora.engine import LioraEngine, build_conversation_history
+from liora.models import DEFAULT_MODEL, MODELS
+from liora.personalities import DEFAULT_MODE, PERSONALITY_MODES
+from liora.session import LioraSession
+from liora.stubs import add_stub_arguments, engine_from_args
+from model_router import percentile
+from providers import ProviderError
+from title_generator import title_generator
+
+TASK_REPLY = 'reply'
+TASK_STARTER = 'starter'
+TASK_TITLE = 'title'
+TASKS = (TASK_REPLY, TASK_STARTER, TASK_TITLE)
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+
+def load_records(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Yield (id, record) pairs; records without an id are keyed by line number"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {"invalid": f"line {line_number} is not valid JSON: {e}"}
+            if not isinstance(record, dict):
+                record = {"invalid": f"line {line_number} is not a JSON object"}
+            yield str(record.get("id", f"line-{line_number}")), record
+
+
+def load_checkpoint(path: str, retry_errors: bool = False) -> Set[str]:
+    """Ids already finished in an earlier run of the same output file
+
+    A trailing half-written line from an interrupted run is cut off so new
+    results start on a clean line.
+    """
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+
+    done = set()
+    for line in data.decode("utf-8").splitlines():
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        if result.get("status") == STATUS_OK or not retry_errors:
+            done.add(str(result.get("id")))
+    return done
+
+
+class BatchStats:
+    """Counts and timings for one batch run"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.ok = 0
+        self.errors = 0
+        self.skipped = 0
+        self.output_chars = 0
+        self.latencies: List[float] = []
+        self.ttfts: List[float] = []
+
+    def record(self, result: Dict):
+        if result["status"] == STATUS_OK:
+            self.ok += 1
+            self.output_chars += len(result.get("output") or "")
+        else:
+            self.errors += 1
+        if result.get("latency_s") is not None:
+            self.latencies.append(result["latency_s"])
+        if result.get("ttft_s") is not None:
+            self.ttfts.append(result["ttft_s"])
+
+    @property
+    def wall_time(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self) -> Dict:
+        processed = self.ok + self.errors
+        wall_time = self.wall_time
+        return {
+            "processed": processed,
+            "ok": self.ok,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "wall_time_s": wall_time,
+            "records_per_s": processed / wall_time if wall_time > 0 else 0.0,
+            "chars_per_s": self.output_chars / wall_time if wall_time > 0 else 0.0,
+            "latency_p50_s": percentile(self.latencies, 50),
+            "latency_p95_s": percentile(self.latencies, 95),
+            "latency_p99_s": percentile(self.latencies, 99),
+            "latency_max_s": max(self.latencies) if self.latencies else None,
+            "ttft_p50_s": percentile(self.ttfts, 50),
+            "ttft_p95_s": percentile(self.ttfts, 95)
+        }
+
+
+def format_seconds(value: Optional[float]) -> str:
+    return f"{value:.3f}s" if value is not None else "-"
+
+
+def print_summary(stats: BatchStats, stream=sys.stderr):
+    summary = stats.summary()
+    print(f"\nrecords      {summary['processed']} (ok {summary['ok']}, errors {summary['errors']}, "
+          f"skipped {summary['skipped']})", file=stream)
+    print(f"wall time    {summary['wall_time_s']:.2f}s", file=stream)
+    print(f"throughput   {summary['records_per_s']:.2f} records/s, {summary['chars_per_s']:.0f} chars/s", file=stream)
+    print("latency      p50 {} / p95 {} / p99 {} / max {}".format(
+        *(format_seconds(summary[key]) for key in
+          ('latency_p50_s', 'latency_p95_s', 'latency_p99_s', 'latency_max_s'))), file=stream)
+    if stats.ttfts:
+        print(f"first token  p50 {format_seconds(summary['ttft_p50_s'])} / "
+              f"p95 {format_seconds(summary['ttft_p95_s'])}", file=stream)
+
+
+class BatchRunner:
+    """Runs JSONL records through the engine with bounded concurrency"""
+
+    def __init__(self, engine: LioraEngine, concurrency: int = 8):
+        self.engine = engine
+        self.concurrency = max(1, concurrency)
+
+    def run_record(self, record_id: str, record: Dict) -> Dict:
+        """Process one record, returning its result line"""
+        task = record.get("task", TASK_REPLY)
+        mode = record.get("mode", DEFAULT_MODE)
+        model = record.get("model", DEFAULT_MODEL)
+        result = dict(record, id=record_id, task=task, mode=mode, model=model,
+                      status=STATUS_ERROR, output=None, latency_s=None)
+
+        if "invalid" in record:
+            result["error"] = record["invalid"]
+            return result
+        if task not in TASKS:
+            result["error"] = f"Unknown task {task!r}; expected one of {', '.join(TASKS)}"
+            return result
+        if mode not in PERSONALITY_MODES:
+            result["error"] = f"Unknown mode {mode!r}"
+            return result
+        if model not in MODELS:
+            result["error"] = f"Unknown model {model!r}"
+            return result
+        if task != TASK_STARTER and not record.get("prompt"):
+            result["error"] = "prompt is required"
+            return result
+
+        session = LioraSession(liora_mode=mode, model_name=model)
+        started = time.monotonic()
+        try:
+            if task == TASK_REPLY:
+                output, ttft = self.reply(session, record)
+                result["ttft_s"] = ttft
+            elif task == TASK_STARTER:
+                output = self.engine.conversation_starter(session)
+            else:
+                output = self.title(session, record["prompt"])
+        except ProviderError as e:
+            result.update(error=str(e), error_type=type(e).__name__, retryable=e.retryable)
+            result["latency_s"] = time.monotonic() - started
+            return result
+        except Exception as e:
+            result.update(error=str(e), error_type=type(e).__name__, retryable=False)
+            result["latency_s"] = time.monotonic() - started
+            return result
+
+        result.update(status=STATUS_OK, output=output, latency_s=time.monotonic() - started)
+        return result
+
+    def reply(self, session: LioraSession, record: Dict) -> Tuple[str, Optional[float]]:
+        history = record.get("history")
+        if isinstance(history, list):
+            history = build_conversation_history(history, limit=len(history))
+
+        started = time.monotonic()
+        ttft = None
+        chunks = []
+        for text in self.engine.stream_reply(session, record["prompt"], history or None):
+            if ttft is None:
+                ttft = time.monotonic() - started
+            chunks.append(text)
+        return "".join(chunks), ttft
+
+    def title(self, session: LioraSession, first_message: str) -> str:
+        model = self.engine.title_model(session)
+        if model is None:
+            return title_generator.quick_title(first_message)
+        return title_generator.generate_title(first_message, model)
+
+    def run(self, records: Iterator[Tuple[str, Dict]], output_path: str,
+            done_ids: Optional[Set[str]] = None, progress_every: int = 50) -> BatchStats:
+        """Process records, appending each result to output_path as soon as it finishes"""
+        done_ids = done_ids or set()
+        stats = BatchStats()
+        max_in_flight = self.concurrency * 2
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="liora-batch") as executor, \
+                open(output_path, "a", encoding="utf-8") as out:
+            in_flight = set()
+
+            def drain(return_when):
+                nonlocal in_flight
+                finished, in_flight = wait(in_flight, return_when=return_when)
+                for future in finished:
+                    result = future.result()
+                    out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                    out.flush()
+                    stats.record(result)
+                    processed = stats.ok + stats.errors
+                    if progress_every and processed % progress_every == 0:
+                        print(f"... {processed} done ({stats.errors} errors)", file=sys.stderr)
+
+            for record_id, record in records:
+                if record_id in done_ids:
+                    stats.skipped += 1
+                    continue
+                # Only read ahead a little so huge inputs never sit in memory
+                if len(in_flight) >= max_in_flight:
+                    drain(FIRST_COMPLETED)
+                done_ids.add(record_id)
+                in_flight.add(executor.submit(self.run_record, record_id, record))
+
+            while in_flight:
+                drain(FIRST_COMPLETED)
+
+        stats.finished = time.monotonic()
+        return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run JSONL prompts through the Liora pipeline")
+    parser.add_argument("input", help="JSONL file of records with prompt, mode, model and task")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file, also used as the checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Records processed at once")
+    parser.add_argument("--retry-errors", action="store_true", help="Rerun ids that failed in an earlier run")
+    parser.add_argument("--fresh", action="store_true", help="Ignore and overwrite an existing output file")
+    parser.add_argument("--stats-json", help="Also write the final stats to this file")
+    add_stub_arguments(parser)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.fresh and os.path.exists(args.output):
+        os.remove(args.output)
+
+    done_ids = load_checkpoint(args.output, args.retry_errors)
+    if done_ids:
+        print(f"Resuming: {len(done_ids)} records already in {args.output}", file=sys.stderr)
+
+    runner = BatchRunner(engine_from_args(args), concurrency=args.concurrency)
+    try:
+        stats = runner.run(load_records(args.input), args.output, done_ids)
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume", file=sys.stderr)
+        raise SystemExit(130)
+
+    print_summary(stats)
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(stats.summary(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""Record and replay external calls (Gemini, OpenRouter, Tavily, Wikipedia).
+
+A cassette is a JSONL file with one interaction per line: the provider, the
+method, the model, a hash of the request, the response (streamed chunks with
+their offsets from the start of the call) or the error it raised, and how
+long it took. Record against the real providers once, then replay the same
+traffic offline as often as needed, at recorded speed or faster:
+
+    python -m liora.server --record traffic.jsonl
+    python -m liora.server --replay traffic.jsonl --replay-speed 10
+    python -m benchmarks.pipeline --replay traffic.jsonl --replay-speed 0
+
+Requests are matched by hash first. Experiments that change prompt building
+change the hashes, so unmatched requests fall back to the next unused
+recording for the same provider, method and model, in recorded order.
+With strict matching a miss raises CassetteMissError instead.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import providers
+from liora.config import LioraConfig
+from providers import LLMResponse, ProviderError, ProviderUnavailableError, TextResponse
+from rate_limiter import rate_limiters
+
+CASSETTE_VERSION = 1
+
+MATCH_EXACT = 'exact'
+MATCH_SEQUENCE = 'sequence'
+
+
+class CassetteMissError(ProviderError):
+    """Replay found no recording for a request"""
+
+
+def request_hash(provider: str, method: str, model: Optional[str], request) -> str:
+    payload = json.dumps([provider, method, model, request], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def error_record(error: Exception) -> Dict:
+    return {
+        "type": type(error).__name__,
+        "message": str(error),
+        "provider": getattr(error, 'provider', None),
+        "status_code": getattr(error, 'status_code', None),
+        "retry_after": getattr(error, 'retry_after', None)
+    }
+
+
+def raise_recorded(error: Dict):
+    """Re-raise a recorded error as the same ProviderError subclass"""
+    error_class = getattr(providers, error.get("type", ""), None)
+    if not (isinstance(error_class, type) and issubclass(error_class, ProviderError)):
+        error_class = ProviderUnavailableError
+    raise error_class(error.get("message", "Recorded failure"), error.get("provider") or "",
+                      error.get("status_code"), error.get("retry_after"))
+
+
+class Cassette:
+    """Interactions recorded to (or loaded from) one JSONL file"""
+
+    def __init__(self, path: str, match: str = MATCH_SEQUENCE):
+        self.path = path
+        self.match = match
+        self.records: List[Dict] = []
+        self._by_hash: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self._by_stream: Dict[Tuple, Deque[Dict]] = defaultdict(deque)
+        self._used = set()
+        self._lock = threading.Lock()
+        self._out = None
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    # Recording
+
+    def open_for_recording(self, append: bool = True) -> "Cassette":
+        self._out = open(self.path, 'a' if append else 'w', buffering=1, encoding='utf-8')
+        return self
+
+    def record(self, record: Dict):
+        record = dict(record, version=CASSETTE_VERSION, recorded_at=time.time())
+        with self._lock:
+            self.records.append(record)
+            if self._out is not None:
+                self._out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+
+    # Replay
+
+    def load(self) -> "Cassette":
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                record["_index"] = len(self.records)
+                self.records.append(record)
+                self._by_hash[record["hash"]].append(record)
+                self._by_stream[self._stream_key(record)].append(record)
+        return self
+
+    def find(self, provider: str, method: str, model: Optional[str], request) -> Dict:
+        """The recording to replay for a request, consuming it"""
+        key = request_hash(provider, method, model, request)
+        with self._lock:
+            record = self._take(self._by_hash.get(key))
+            if record is not None:
+                self.hits += 1
+                return record
+            if self.match == MATCH_SEQUENCE:
+                record = self._take(self._by_stream.get((provider, method, model)))
+                if record is not None:
+                    self.fallbacks += 1
+                    return record
+            self.misses += 1
+        raise CassetteMissError(f"No recording for {provider}.{method} ({model or '-'}) in {self.path}", provider)
+
+    def rewind(self):
+        """Make every recording available again"""
+        with self._lock:
+            self._used.clear()
+
+    def stats(self) -> Dict:
+        return {"records": len(self.records), "hits": self.hits, "fallbacks": self.fallbacks, "misses": self.misses}
+
+    def _take(self, candidates: Optional[Deque[Dict]]) -> Optional[Dict]:
+        # Identical requests replay their recordings in order, then cycle
+        if not candidates:
+            return None
+        for record in candidates:
+            if record["_index"] not in self._used:
+                self._used.add(record["_index"])
+                return record
+        record = candidates[0]
+        candidates.rotate(-1)
+        return record
+
+    @staticmethod
+    def _stream_key(record: Dict) -> Tuple:
+        return record["provider"], record["method"], record.get("model")
+
+
+# Recording wrappers
+
+class RecordingModel:
+    """Wraps a generate_content model, recording every reply with its chunk timing"""
+
+    def __init__(self, model, cassette: Cassette, provider: str, model_name: str):
+        self._model = model
+        self.cassette = cassette
+        self.provider = provider
+        self.model_name = model_name
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        method = 'stream' if stream else 'generate'
+        base = {"provider": self.provider, "method": method, "model": self.model_name,
+                "hash": request_hash(self.provider, method, self.model_name, str(prompt)),
+                "request": {"prompt": str(prompt)}}
+        started = time.perf_counter()
+        try:
+            response = self._model.generate_content(prompt, stream=stream, **kwargs)
+        except Exception as e:
+            self.cassette.record(dict(base, error=error_record(e), duration=time.perf_counter() - started))
+            raise
+        if stream:
+            return self._record_stream(response, base, started)
+        self.cassette.record(dict(base, text=getattr(response, 'text', str(response)),
+                                  duration=time.perf_counter() - started))
+        return response
+
+    def _record_stream(self, response, base: Dict, started: float) -> Iterator:
+        chunks = []
+        try:
+            for chunk in response:
+                chunks.append([round(time.perf_counter() - started, 6), getattr(chunk, 'text', '')])
+                yield chunk
+        except Exception as e:
+            self.cassette.record(dict(base, chunks=chunks, error=error_record(e),
+                                      duration=time.perf_counter() - started))
+            raise
+        self.cassette.record(dict(base, chunks=chunks, duration=time.perf_counter() - started))
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class RecordingLLM:
+    """Wraps an invoke() client"""
+
+    def __init__(self, llm, cassette: Cassette, provider: str, model_name: str):
+        self._llm = llm
+        self.cassette = cassette
+        self.provider = provider
+        self.model_name = model_name
+
+    def invoke(self, prompt):
+        base = {"provider": self.provider, "method": "invoke", "model": self.model_name,
+                "hash": request_hash(self.provider, "invoke", self.model_name, str(prompt)),
+                "request": {"prompt": str(prompt)}}
+        started = time.perf_counter()
+        try:
+            response = self._llm.invoke(prompt)
+        except Exception as e:
+            self.cassette.record(dict(base, error=error_record(e), duration=time.perf_counter() - started))
+            raise
+        self.cassette.record(dict(base, text=getattr(response, 'content', str(response)),
+                                  duration=time.perf_counter() - started))
+        return response
+
+
+class RecordingSearchTool:
+    """Wraps TavilySearch"""
+
+    def __init__(self, tool, cassette: Cassette):
+        self._tool = tool
+        self.cassette = cassette
+
+    def invoke(self, query):
+        base = {"provider": "tavily", "method": "search", "model": None,
+                "hash": request_hash("tavily", "search", None, query), "request": {"query": query}}
+        started = time.perf_counter()
+        try:
+            result = self._tool.invoke(query)
+        except Exception as e:
+            self.cassette.record(dict(base, error=error_record(e), duration=time.perf_counter() - started))
+            raise
+        self.cassette.record(dict(base, result=result, duration=time.perf_counter() - started))
+        return result
+
+
+class RecordingRetriever:
+    """Wraps WikipediaRetriever; formatting helpers pass straight through"""
+
+    def __init__(self, retriever, cassette: Cassette):
+        self._retriever = retriever
+        self.cassette = cassette
+
+    def search_wikipedia(self, query: str, max_results: int = 3) -> List[Dict]:
+        return self._call("search_wikipedia", [query, max_results],
+                          lambda: self._retriever.search_wikipedia(query, max_results=max_results))
+
+    def get_random_interesting_topic(self) -> Optional[Dict]:
+        return self._call("get_random_interesting_topic", [], self._retriever.get_random_interesting_topic)
+
+    def get_related_topics(self, current_topic: str) -> List[str]:
+        return self._call("get_related_topics", [current_topic],
+                          lambda: self._retriever.get_related_topics(current_topic))
+
+    def _call(self, method: str, request, call):
+        started = time.perf_counter()
+        result = call()
+        self.cassette.record({"provider": "wikipedia", "method": method, "model": None,
+                              "hash": request_hash("wikipedia", method, None, request), "request": request,
+                              "result": result, "duration": time.perf_counter() - started})
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._retriever, name)
+
+
+# Replay stand-ins
+
+class ReplayClock:
+    """Scales recorded delays; speed 0 replays without any waiting"""
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+
+    def sleep_until(self, started: float, offset: float):
+        if self.speed <= 0:
+            return
+        remaining = started + offset / self.speed - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+class ReplayModel:
+    """Plays recorded replies back through the generate_content interface"""
+
+    def __init__(self, cassette: Cassette, provider: str, model_name: str, clock: ReplayClock):
+        self.cassette = cassette
+        self.provider = provider
+        self.model_name = model_name
+        self.clock = clock
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        started = time.perf_counter()
+        if not stream:
+            record = self.cassette.find(self.provider, 'generate', self.model_name, str(prompt))
+            self.clock.sleep_until(started, record.get("duration", 0))
+            if "error" in record:
+                raise_recorded(record["error"])
+            return TextResponse(record.get("text", ""))
+
+        record = self.cassette.find(self.provider, 'stream', self.model_name, str(prompt))
+        if "error" in record and not record.get("chunks"):
+            self.clock.sleep_until(started, record.get("duration", 0))
+            raise_recorded(record["error"])
+        return self._replay_stream(record, started)
+
+    def _replay_stream(self, record: Dict, started: float) -> Iterator[TextResponse]:
+        for offset, text in record.get("chunks", []):
+            self.clock.sleep_until(started, offset)
+            yield TextResponse(text)
+        if "error" in record:
+            raise_recorded(record["error"])
+
+
+class ReplayLLM:
+    def __init__(self, cassette: Cassette, provider: str, model_name: str, clock: ReplayClock):
+        self.cassette = cassette
+        self.provider = provider
+        self.model_name = model_name
+        self.clock = clock
+
+    def invoke(self, prompt):
+        started = time.perf_counter()
+        record = self.cassette.find(self.provider, 'invoke', self.model_name, str(prompt))
+        self.clock.sleep_until(started, record.get("duration", 0))
+        if "error" in record:
+            raise_recorded(record["error"])
+        return LLMResponse(record.get("text", ""))
+
+
+class ReplaySearchTool:
+    def __init__(self, cassette: Cassette, clock: ReplayClock):
+        self.cassette = cassette
+        self.clock = clock
+
+    def invoke(self, query):
+        started = time.perf_counter()
+        record = self.cassette.find("tavily", "search", None, query)
+        self.clock.sleep_until(started, record.get("duration", 0))
+        if "error" in record:
+            raise_recorded(record["error"])
+        return record.get("result")
+
+
+class ReplayRetriever:
+    def __init__(self, cassette: Cassette, clock: ReplayClock):
+        self.cassette = cassette
+        self.clock = clock
+
+    def search_wikipedia(self, query: str, max_results: int = 3) -> List[Dict]:
+        return self._replay("search_wikipedia", [query, max_results]) or []
+
+    def get_random_interesting_topic(self) -> Optional[Dict]:
+        return self._replay("get_random_interesting_topic", [])
+
+    def get_related_topics(self, current_topic: str) -> List[str]:
+        return self._replay("get_related_topics", [current_topic]) or []
+
+    def format_wikipedia_info(self, articles: List[Dict], context: str = "") -> str:
+        # Pure formatting, so use the real implementation
+        from wikipedia_tools import WikipediaRetriever
+        return WikipediaRetriever.format_wikipedia_info(self, articles, context)
+
+    def _replay(self, method: str, request):
+        started = time.perf_counter()
+        record = self.cassette.find("wikipedia", method, None, request)
+        self.clock.sleep_until(started, record.get("duration", 0))
+        return record.get("result")
+
+
+# Engines
+
+def model_provider(model_name: str) -> str:
+    from liora.models import MODELS
+    return MODELS.get(model_name, {}).get("type", "unknown")
+
+
+def build_recording_engine(cassette: Cassette, config: Optional[LioraConfig] = None):
+    """Engine on the real providers that writes every external call to the cassette"""
+    from liora.engine import LioraEngine
+    from liora.models import initialize_model
+    from liora.resources import RETRIEVER, resource_cache
+
+    config = config or LioraConfig.from_env()
+
+    def model_factory(model_name):
+        model, llm = initialize_model(model_name, config)
+        provider = model_provider(model_name)
+        return (RecordingModel(model, cassette, provider, model_name),
+                RecordingLLM(llm, cassette, provider, model_name))
+
+    return LioraEngine(
+        config=config,
+        retriever=RecordingRetriever(resource_cache.get(RETRIEVER), cassette),
+        search_tool=RecordingSearchTool(LioraEngine._build_search_tool(config.tavily_api_key), cassette),
+        model_factory=model_factory
+    )
+
+
+def build_replay_engine(cassette: Cassette, speed: float = 1.0, conversations_file: str = "replay_conversations.pkl",
+                        intelligence=None, memory=None):
+    """Engine whose providers answer from the cassette, with no network access
+
+    Without an intelligence or memory, the engine gets scratch ones (see liora.stubs.scratch_state).
+    """
+    from liora.engine import LioraEngine
+    from liora.stubs import STUB_API_KEY, scratch_state, stub_config
+
+    clock = ReplayClock(speed)
+    if intelligence is None or memory is None:
+        scratch_intelligence, scratch_memory = scratch_state("liora_replay_")
+        intelligence = intelligence if intelligence is not None else scratch_intelligence
+        memory = memory if memory is not None else scratch_memory
+    # Recorded search latency already includes any waiting the real limiter did; only the
+    # stub key's bucket is replaced, so real keys keep their limits
+    rate_limiters.configure('tavily', 1e6, 1000000, STUB_API_KEY)
+
+    def model_factory(model_name):
+        provider = model_provider(model_name)
+        return (ReplayModel(cassette, provider, model_name, clock),
+                ReplayLLM(cassette, provider, model_name, clock))
+
+    return LioraEngine(
+        config=stub_config(conversations_file),
+        intelligence=intelligence,
+        memory=memory,
+        retriever=ReplayRetriever(cassette, clock),
+        search_tool=ReplaySearchTool(cassette, clock),
+        model_factory=model_factory
+    )
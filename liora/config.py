@@ -0,0 +1,42 @@
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+
+class LioraConfig:
+    """API keys and file locations for one Liora process"""
+
+    def __init__(self, gemini_api_key: Optional[str] = None, tavily_api_key: Optional[str] = None,
+                 openrouter_api_key: Optional[str] = None, conversations_file: str = "conversations.pkl"):
+        self.gemini_api_key = gemini_api_key
+        self.tavily_api_key = tavily_api_key
+        self.openrouter_api_key = openrouter_api_key
+        self.conversations_file = conversations_file
+
+    @classmethod
+    def from_env(cls) -> "LioraConfig":
+        """Build a config from the environment and an optional .env file"""
+        load_dotenv()
+        return cls(
+            gemini_api_key=os.getenv("GEMINI_API_KEY"),
+            tavily_api_key=os.getenv("TAVILY_API_KEY"),
+            openrouter_api_key=os.getenv("OPENROUTER_API_KEY"),
+            conversations_file=os.getenv("LIORA_CONVERSATIONS_FILE", "conversations.pkl")
+        )
+
+    def api_key_for(self, provider: str) -> Optional[str]:
+        return {
+            'gemini': self.gemini_api_key,
+            'openrouter': self.openrouter_api_key,
+            'tavily': self.tavily_api_key
+        }.get(provider)
+
+    def missing_keys(self) -> List[str]:
+        """Names of required environment variables that are not set"""
+        required = {
+            "GEMINI_API_KEY": self.gemini_api_key,
+            "TAVILY_API_KEY": self.tavily_api_key,
+            "OPENROUTER_API_KEY": self.openrouter_api_key
+        }
+        return [name for name, value in required.items() if not value]
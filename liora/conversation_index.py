@@ -0,0 +1,139 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+TITLE_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def title_terms(text: str) -> List[str]:
+    return TITLE_TERM_PATTERN.findall((text or "").lower())
+
+
+class ConversationIndex:
+    """Conversations ordered by last update, plus a prefix index over titles
+
+    Kept up to date by ConversationStore on every change, so listing a page
+    or searching titles never sorts or scans the whole store: a page is a
+    slice of the ordering, and a title search touches only the conversations
+    whose title terms match.
+    """
+
+    def __init__(self):
+        # (-last_updated, id): ascending order is newest first
+        self._order: List[Tuple[float, str]] = []
+        self._keys: Dict[str, Tuple[float, str]] = {}
+        self._terms: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._sorted_terms: List[str] = []
+        self._lock = threading.Lock()
+
+    # Store notifications
+
+    def rebuild(self, conversations: Dict[str, Dict]):
+        with self._lock:
+            self._order = []
+            self._keys = {}
+            self._terms = {}
+            self._postings = defaultdict(set)
+            for conversation in conversations.values():
+                key = self._sort_key(conversation)
+                self._keys[conversation["id"]] = key
+                self._order.append(key)
+                self._index_title(conversation["id"], conversation.get("title", ""))
+            self._order.sort()
+            self._sorted_terms = sorted(self._postings)
+
+    def upsert(self, conversation: Dict):
+        conversation_id = conversation["id"]
+        key = self._sort_key(conversation)
+        with self._lock:
+            previous = self._keys.get(conversation_id)
+            if previous != key:
+                if previous is not None:
+                    self._order.pop(bisect.bisect_left(self._order, previous))
+                bisect.insort(self._order, key)
+                self._keys[conversation_id] = key
+
+            if set(title_terms(conversation.get("title", ""))) != self._terms.get(conversation_id):
+                self._unindex_title(conversation_id)
+                self._index_title(conversation_id, conversation.get("title", ""), keep_sorted=True)
+
+    def remove(self, conversation_id: str):
+        with self._lock:
+            key = self._keys.pop(conversation_id, None)
+            if key is not None:
+                self._order.pop(bisect.bisect_left(self._order, key))
+            self._unindex_title(conversation_id)
+
+    # Queries
+
+    def page(self, offset: int = 0, limit: int = 20) -> List[str]:
+        """Conversation ids, newest first"""
+        with self._lock:
+            return [conversation_id for _, conversation_id in self._order[offset:offset + limit]]
+
+    def search(self, query: str, limit: int = 20) -> List[str]:
+        """Ids of conversations whose title matches every query term, newest first
+
+        The last term matches as a prefix, so results narrow as the user types.
+        """
+        terms = title_terms(query)
+        if not terms:
+            return self.page(0, limit)
+
+        with self._lock:
+            *complete, partial = terms
+            matches = None
+            for term in complete:
+                matches = self._intersect(matches, self._postings.get(term, ()))
+                if not matches:
+                    return []
+            matches = self._intersect(matches, self._prefix_matches(partial))
+            return [conversation_id for _, conversation_id in
+                    heapq.nsmallest(limit, (self._keys[cid] for cid in matches))]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, conversation_id) -> bool:
+        return conversation_id in self._keys
+
+    # Internals
+
+    @staticmethod
+    def _sort_key(conversation: Dict) -> Tuple[float, str]:
+        return (-conversation["last_updated"].timestamp(), conversation["id"])
+
+    @staticmethod
+    def _intersect(matches, ids: Iterable[str]) -> Set[str]:
+        return set(ids) if matches is None else matches.intersection(ids)
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        found = set()
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            found.update(self._postings[term])
+        return found
+
+    def _index_title(self, conversation_id: str, title: str, keep_sorted: bool = False):
+        terms = set(title_terms(title))
+        self._terms[conversation_id] = terms
+        for term in terms:
+            if keep_sorted and term not in self._postings:
+                bisect.insort(self._sorted_terms, term)
+            self._postings[term].add(conversation_id)
+
+    def _unindex_title(self, conversation_id: str):
+        for term in self._terms.pop(conversation_id, ()):
+            ids = self._postings.get(term)
+            if ids is None:
+                continue
+            ids.discard(conversation_id)
+            if not ids:
+                del self._postings[term]
+                self._sorted_terms.pop(bisect.bisect_left(self._sorted_terms, term))
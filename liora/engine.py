@@ -0,0 +1,410 @@
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from instant_answers import instant_answer_engine
+from intent_router import intent_router, INTENT_SEARCH
+from liora.config import LioraConfig
+from liora.learning_queue import learning_queue
+from liora.models import MODELS, initialize_model, generation_kwargs
+from liora.personalities import get_liora_personality, generate_conversation_starter, FUN_MODE_INSTRUCTIONS
+from liora.resources import (
+    INTELLIGENCE, MEMORY, MODEL_CLIENTS, RETRIEVER, SEARCH_TOOL, ResourceCache, key_fingerprint, resource_cache
+)
+from liora.session import LioraSession
+from liora.storage import ConversationStore
+from liora.summarizer import RECENT_MESSAGES, conversation_summarizer
+from model_router import ModelRouter
+from providers import ProviderError, call_with_limits
+from search_cache import search_cache, answer_cache
+from telemetry import telemetry
+from title_generator import DEFAULT_TITLE, title_generator, is_untitled
+
+HISTORY_MESSAGES = RECENT_MESSAGES
+HISTORY_MESSAGE_CHARS = 1500
+MEMORY_RECALL_K = 3
+FEW_SHOT_CHARS = 500
+
+
+def build_conversation_history(messages: List[Dict], limit: int = HISTORY_MESSAGES, summary: str = "") -> str:
+    """Render the rolling summary and the last few messages as the plain-text history used in prompts"""
+    conversation_history = f"Summary of earlier conversation: {summary}\n" if summary else ""
+    for msg in messages[-limit:] if limit else []:
+        role = "User" if msg["role"] == "user" else "Assistant"
+        content = msg['content']
+        # One pasted essay should not blow up every later prompt
+        if len(content) > HISTORY_MESSAGE_CHARS:
+            content = content[:HISTORY_MESSAGE_CHARS] + "…"
+        conversation_history += f"{role}: {content}\n"
+    return conversation_history
+
+
+def iter_text(response) -> Iterator[str]:
+    """Normalize a reply (plain string or stream of chunks) into text chunks"""
+    if isinstance(response, str):
+        yield response
+    elif hasattr(response, '__iter__'):
+        for chunk in response:
+            if hasattr(chunk, 'text'):
+                yield chunk.text
+    else:
+        yield str(response)
+
+
+class LioraEngine:
+    """Headless Liora pipeline: routing, search, Wikipedia, prompt building and generation
+
+    Nothing here touches Streamlit. All per-user state comes in through an
+    explicit LioraSession, so the same engine can serve the Streamlit UI, worker
+    processes, benchmarks and servers.
+    """
+
+    def __init__(self, config: Optional[LioraConfig] = None, intelligence=None, retriever=None,
+                 search_tool=None, model_factory=None, router: Optional[ModelRouter] = None,
+                 resources: Optional[ResourceCache] = None, memory=None):
+        self.config = config or LioraConfig.from_env()
+        # Anything not passed in explicitly is shared process-wide through the resource cache
+        # Checked against None: an empty cache, memory or store is falsy through __len__
+        self.resources = resources if resources is not None else resource_cache
+        self._intelligence = intelligence
+        self._retriever = retriever
+        self._search_tool = search_tool
+        self._memory = memory
+        self.model_factory = model_factory or self.shared_model_clients
+        # Route requests across all backends, tracking latency and taking failing providers out of rotation
+        self.router = router or ModelRouter(self.model_factory, list(MODELS.keys()))
+
+    @property
+    def intelligence(self):
+        return self._intelligence if self._intelligence is not None else self.resources.get(INTELLIGENCE)
+
+    @property
+    def retriever(self):
+        return self._retriever if self._retriever is not None else self.resources.get(RETRIEVER)
+
+    @property
+    def memory(self):
+        """Long-term memory across conversations, or None when LIORA_MEMORY=0"""
+        return self._memory if self._memory is not None else self.resources.get(MEMORY)
+
+    @property
+    def search_tool(self):
+        if self._search_tool is not None:
+            return self._search_tool
+        api_key = self.config.tavily_api_key
+        return self.resources.get(SEARCH_TOOL, key_fingerprint(api_key),
+                                  factory=lambda: self._build_search_tool(api_key))
+
+    @staticmethod
+    def _build_search_tool(api_key):
+        # Built on the first search; most turns never need it
+        from langchain_tavily import TavilySearch
+
+        return TavilySearch(api_key=api_key, max_results=5)
+
+    def shared_model_clients(self, model_name: str):
+        """(model, llm) for a backend, shared by every engine using the same API key"""
+        api_key = self.config.api_key_for(MODELS[model_name]["type"]) if model_name in MODELS else None
+        return self.resources.get(MODEL_CLIENTS, (model_name, key_fingerprint(api_key)),
+                                  factory=lambda: initialize_model(model_name, self.config))
+
+    # Generation
+
+    def generate_response_stream(self, session: LioraSession, prompt: str, conversation_history: Optional[str] = None):
+        """Answer a prompt; returns either a finished string or a stream of chunks
+
+        Errors are raised, never returned as reply text, so they are not stored
+        or learned from.
+        """
+        # Precompiled, word-boundary routing: "sometimes" no longer counts as a time query
+        with telemetry.span('route'):
+            decision = intent_router.route(prompt)
+        telemetry.annotate(intent=decision.intent)
+
+        # Time, arithmetic, unit conversions and recently answered questions skip the model entirely
+        with telemetry.span('instant_answer'):
+            instant_answer = instant_answer_engine.answer(prompt, session.liora_mode, decision)
+        if instant_answer:
+            telemetry.inc('liora_instant_answers_total', intent=decision.intent)
+            telemetry.annotate(instant=True)
+            return instant_answer
+
+        if decision.intent == INTENT_SEARCH:
+            # Use search capabilities
+            return self.generate_response_with_search(session, prompt, conversation_history)
+        else:
+            # Use regular conversation mode
+            return self.generate_conversation_response(session, prompt, conversation_history)
+
+    def stream_reply(self, session: LioraSession, prompt: str, conversation_history: Optional[str] = None) -> Iterator[str]:
+        """Answer a prompt as a generator of text chunks"""
+        return iter_text(self.generate_response_stream(session, prompt, conversation_history))
+
+    def generate_response_with_search(self, session: LioraSession, prompt: str, conversation_history: Optional[str] = None):
+        # Search queries go straight to Tavily, then one LLM call
+        try:
+            # Shared across sessions; identical queries within a freshness window hit the cache
+            with telemetry.span('search'):
+                search_results = search_cache.get_or_fetch(
+                    prompt,
+                    lambda query: call_with_limits('tavily', self.config.tavily_api_key,
+                                                   lambda: self.search_tool.invoke(query))
+                )
+        except Exception as e:
+            # Fallback to regular conversation if search fails
+            print(f"Search failed, answering without it: {e}")
+            return self.generate_conversation_response(session, prompt, conversation_history)
+
+        # Generate response using the search results
+        search_prompt = f"""You are Liora, a witty and sarcastic AI. Based on this search information:
+
+{search_results}
+
+Respond to the user's question: "{prompt}"
+
+Make your response:
+- Witty and sarcastic in Liora's style
+- Based on the search results
+- Engaging and entertaining
+- Not too long (2-3 sentences)
+- Include your signature humor and emojis
+
+Start with a casual greeting and make it fun:"""
+
+        # Fails over to the next healthy model if the selected one errors; a ProviderError
+        # here propagates rather than retrying as a second, streamed call
+        with telemetry.span('search_answer'):
+            response = self.router.invoke(search_prompt, session.model_name)
+        # Repeat questions within the freshness window are answered instantly
+        answer_cache.put(prompt, response.content, namespace=session.liora_mode)
+        return response.content
+
+    def build_prompt(self, session: LioraSession, prompt: str, conversation_history: Optional[str] = None) -> str:
+        """Assemble personality, adaptive guidance, Wikipedia context and history into one prompt"""
+        # Get adaptive learning guidance
+        with telemetry.span('adaptive_guidance'):
+            adaptive_guidance = self.intelligence.get_adaptive_response_guidance(prompt, conversation_history or "")
+
+        # Check if we should introduce Wikipedia information
+        with telemetry.span('wikipedia_decision'):
+            should_introduce, topic = self.intelligence.decide_wikipedia_introduction(prompt, conversation_history or "")
+
+        wikipedia_context = ""
+        if should_introduce and topic:
+            # Get Wikipedia information
+            with telemetry.span('wikipedia_fetch'):
+                articles = self.retriever.search_wikipedia(topic, max_results=2)
+            if articles:
+                wikipedia_context = self.retriever.format_wikipedia_info(articles, f"about {topic}")
+
+                # Generate a natural transition
+                transition = self.intelligence.generate_topic_transition(topic, wikipedia_context)
+                wikipedia_context = f"\n\n{transition}\n\n{wikipedia_context}"
+
+        # Facts the user mentioned in other chats
+        memory_context = ""
+        if self.memory is not None:
+            with telemetry.span('memory_recall'):
+                memories = self.memory.recall(prompt, k=MEMORY_RECALL_K, exclude_conversation=session.conversation_id)
+            telemetry.annotate(memories=len(memories))
+            if memories:
+                memory_context = "\n\nTHINGS YOU REMEMBER FROM EARLIER CHATS (mention them only if relevant):\n" + "\n".join(
+                    f"- The user said: {memory.text}" for memory in memories
+                )
+
+        # Get current Liora personality based on mode
+        current_personality = get_liora_personality(session.liora_mode)
+        liora_personality = current_personality['personality'] + memory_context
+
+        # Add adaptive learning instructions based on learned patterns
+        adaptive_instructions = f"""
+
+ADAPTIVE LEARNING INSTRUCTIONS:
+- User's preferred topics: {', '.join(adaptive_guidance['preferred_topics']) if adaptive_guidance['preferred_topics'] else 'None detected yet'}
+- User's communication style: {adaptive_guidance['communication_style']}
+- Optimal response length: {adaptive_guidance['response_length']}
+- Engagement strategy: {adaptive_guidance['engagement_strategy']}
+- Personality adjustments: {adaptive_guidance['personality_adjustment']}
+
+- Adjust your communication style to match the user's preference
+- Focus on topics the user has shown interest in previously
+- Use appropriate response length based on user patterns
+- Apply engagement strategies based on user's current engagement level
+- Adjust humor, formality, and enthusiasm based on learned preferences"""
+
+        # Similar past exchanges that scored well, as examples of what works for this user
+        few_shot_examples = adaptive_guidance.get('few_shot_examples') or []
+        if few_shot_examples:
+            adaptive_instructions += "\n\nPAST REPLIES THAT WORKED WELL (match their approach, not their wording):\n" + "\n".join(
+                f"User: {example['user_message'][:FEW_SHOT_CHARS]}\nLiora: {example['assistant_response'][:FEW_SHOT_CHARS]}"
+                for example in few_shot_examples
+            )
+
+        # Add extra instructions for fun mode to make responses more engaging
+        if session.liora_mode == "Sarcastic & Funny":
+            liora_personality += adaptive_instructions + FUN_MODE_INSTRUCTIONS
+        else:
+            liora_personality += adaptive_instructions
+
+        # Add Wikipedia integration instructions if needed
+        if wikipedia_context:
+            liora_personality += """
+
+WIKIPEDIA INTEGRATION:
+- When Wikipedia information is provided, use it naturally in your response
+- Don't just list facts - make them relevant to the conversation
+- Connect Wikipedia information to the current conversation
+- Use the information to ask follow-up questions or make observations
+- Keep your personality consistent even when sharing knowledge
+
+Now, respond to the user's message in character as Liora:"""
+        else:
+            liora_personality += "\n\nNow, respond to the user's message in character as Liora:"
+
+        # Build the full prompt with Wikipedia context if available
+        if conversation_history:
+            return f"{liora_personality}\n\nConversation history:\n{conversation_history}\n\nCurrent message: {prompt}{wikipedia_context}"
+        return f"{liora_personality}\n\nUser message: {prompt}{wikipedia_context}"
+
+    def generate_conversation_response(self, session: LioraSession, prompt: str, conversation_history: Optional[str] = None):
+        with telemetry.span('prompt_build'):
+            full_prompt = self.build_prompt(session, prompt, conversation_history)
+
+        # Stream from the selected model; the router hedges to a second model if the
+        # first token is late and fails over if the provider is down
+        with telemetry.span('first_token'):
+            return self.router.stream(full_prompt, session.model_name, **generation_kwargs())
+
+    def conversation_starter(self, session: LioraSession) -> str:
+        return generate_conversation_starter(session.liora_mode, self.retriever)
+
+    def title_model(self, session: LioraSession):
+        """Model instance used for background title generation, or None if unavailable"""
+        try:
+            model, _ = self.router.get_instances(session.model_name)
+            return model
+        except Exception as e:
+            print(f"No model available for titles: {e}")
+            return None
+
+    # Conversations
+
+    def start_conversation(self, session: LioraSession, store: ConversationStore) -> Dict:
+        """Create a conversation if needed and add Liora's opening message"""
+        conversation = store.get(session.conversation_id)
+        if conversation is None:
+            conversation = store.create()
+            session.conversation_id = conversation["id"]
+
+        store.append_message(conversation["id"], "assistant", self.conversation_starter(session))
+        # Title is filled in from the first user message
+        store.set_title(conversation["id"], DEFAULT_TITLE)
+        store.save()
+        return conversation
+
+    def run_turn(self, session: LioraSession, store: ConversationStore, prompt: str,
+                 request_id: Optional[str] = None, profile: bool = False) -> Iterator[str]:
+        """Run one chat turn end to end, yielding reply text as it streams
+
+        The user message is stored before generation starts. The reply is only
+        stored, learned from and saved once it has streamed completely; a
+        ProviderError (or any other error) propagates to the caller with just the
+        user message saved.
+        With profile=True (or LIORA_PROFILE set) the turn is captured by
+        liora.profiling and saved under request_id.
+        """
+        # Imported here so `python -m liora.profiling` does not find itself already loaded
+        from liora.profiling import turn_profiler
+
+        with telemetry.trace('turn', model=session.model_name, mode=session.liora_mode,
+                             session_id=session.session_id) as trace:
+            turn = self._run_turn(session, store, prompt)
+            if profile or turn_profiler.should_profile():
+                turn = turn_profiler.profile(turn, request_id or (trace.trace_id if trace else None))
+            yield from turn
+
+    def _run_turn(self, session: LioraSession, store: ConversationStore, prompt: str) -> Iterator[str]:
+        started = time.perf_counter()
+        conversation = store.get(session.conversation_id)
+        if conversation is None:
+            conversation = store.create()
+            session.conversation_id = conversation["id"]
+        conversation_id = conversation["id"]
+        telemetry.annotate(conversation_id=conversation_id)
+
+        # Index this store's messages into long-term memory the first time it is used
+        memory = self.memory
+        if memory is not None and memory not in store.listeners:
+            store.subscribe(memory)
+
+        store.append_message(conversation_id, "user", prompt)
+
+        # Title new chats instantly from keywords; the LLM refines it in the background
+        user_messages = [msg for msg in conversation["messages"] if msg["role"] == "user"]
+        if len(user_messages) == 1 and is_untitled(conversation["title"]):
+            with telemetry.span('title'):
+                quick_title = title_generator.quick_title(prompt)
+                store.set_title(conversation_id, quick_title)
+                title_model = self.title_model(session)
+                if title_model:
+                    title_generator.request_title(conversation_id, prompt, title_model, quick_title)
+
+        # Rolling summary plus the recent messages, so history stays bounded in long chats
+        summary, recent_messages = conversation_summarizer.context(conversation)
+        conversation_history = build_conversation_history(recent_messages, len(recent_messages), summary)
+
+        full_response = ""
+        try:
+            # Routing, search, prompt building and the wait for the first model chunk
+            with telemetry.span('generate'):
+                chunks = self.stream_reply(session, prompt, conversation_history)
+            with telemetry.span('stream'):
+                for text in chunks:
+                    if not full_response:
+                        telemetry.observe('liora_turn_first_token_seconds', time.perf_counter() - started,
+                                          model=session.model_name)
+                    full_response += text
+                    yield text
+        except ProviderError as e:
+            telemetry.inc('liora_turns_total', outcome='provider_error', provider=e.provider or 'unknown')
+            with telemetry.span('save'):
+                store.save()
+            raise
+        except Exception:
+            # Same as a provider failure: keep the user message, never store the error as a reply
+            telemetry.inc('liora_turns_total', outcome='error')
+            with telemetry.span('save'):
+                store.save()
+            raise
+
+        store.append_message(conversation_id, "assistant", full_response)
+
+        # Learn from this interaction on the learning worker; the turn does not wait for it
+        learning_queue.submit_interaction(self.intelligence, prompt, full_response, conversation_history)
+
+        with telemetry.span('save'):
+            store.save()
+
+        # Older messages are folded into the summary in the background, saved with the next turn
+        conversation_summarizer.request_update(store, conversation_id, self.title_model(session))
+
+        telemetry.inc('liora_turns_total', outcome='ok')
+        telemetry.observe('liora_turn_seconds', time.perf_counter() - started, model=session.model_name)
+
+    def record_feedback(self, rating: str):
+        """Apply a 👍/😐/👎 rating to the learning state"""
+        scores = {'good': 1.0, 'okay': 0.5, 'bad': 0.0}
+        learning_queue.submit_feedback(self.intelligence, f"{rating} response", scores.get(rating, 0.5))
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine() -> LioraEngine:
+    """Process-wide engine shared by every session"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = LioraEngine()
+        return _default_engine
@@ -0,0 +1,173 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from telemetry import telemetry
+
+EVENT_INTERACTION = 'interaction'
+EVENT_FEEDBACK = 'feedback'
+
+
+class LearningEvent(NamedTuple):
+    kind: str
+    intelligence: object
+    payload: Dict
+    submitted_at: float
+
+
+class LearningQueue:
+    """Applies learning events on a background thread, off the response path
+
+    Turns and feedback buttons only enqueue an event. A single worker applies
+    events in order, in batches of up to max_batch, and saves the learning
+    files once per batch at most every save_interval seconds instead of after
+    every tenth interaction. flush() waits for everything queued so far;
+    close() (run at exit) also saves whatever is still unsaved. Request threads
+    keep reading the same intelligence meanwhile; its lock keeps them apart.
+
+    With background=False (LIORA_LEARNING_ASYNC=0) events are applied inline,
+    which keeps runs that depend on learning order deterministic.
+    """
+
+    def __init__(self, max_batch: int = 32, save_interval: float = 5.0, background: bool = True):
+        self.max_batch = max_batch
+        self.save_interval = save_interval
+        self.background = background
+        self._queue: "queue.Queue[Optional[LearningEvent]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        # Engines created with their own intelligence are saved separately
+        self._unsaved: Dict[int, object] = {}
+        self._last_save = time.monotonic()
+        self.applied = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> "LearningQueue":
+        return cls(background=os.getenv("LIORA_LEARNING_ASYNC", "1") != "0")
+
+    def submit_interaction(self, intelligence, user_message: str, assistant_response: str,
+                           conversation_history: str):
+        self.submit(EVENT_INTERACTION, intelligence, {
+            'user_message': user_message,
+            'assistant_response': assistant_response,
+            'conversation_history': conversation_history
+        })
+
+    def submit_feedback(self, intelligence, feedback: str, effectiveness_score: float):
+        self.submit(EVENT_FEEDBACK, intelligence, {'feedback': feedback, 'effectiveness_score': effectiveness_score})
+
+    def submit(self, kind: str, intelligence, payload: Dict):
+        event = LearningEvent(kind, intelligence, payload, time.monotonic())
+        telemetry.inc('liora_learning_events_total', kind=kind)
+        if not self.background or self._closed:
+            self._apply_batch([event])
+            self._save()
+            return
+        self._ensure_worker()
+        self._queue.put(event)
+
+    def flush(self):
+        """Block until every event submitted so far has been applied"""
+        if self._worker is not None:
+            self._queue.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def close(self):
+        """Apply what is queued, stop the worker and save unsaved learning state"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+        self._save(force=True)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="liora-learning", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.save_interval)
+            except queue.Empty:
+                # Idle: save anything a short burst left behind
+                self._save()
+                continue
+            batch, stop = [], first is None
+            if first is not None:
+                batch.append(first)
+            while len(batch) < self.max_batch and not stop:
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                else:
+                    batch.append(event)
+            try:
+                if batch:
+                    self._apply_batch(batch)
+                    self._save()
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _apply_batch(self, batch: List[LearningEvent]):
+        with telemetry.span('learn'):
+            for event in batch:
+                try:
+                    if event.kind == EVENT_INTERACTION:
+                        event.intelligence.learn_from_interaction(user_feedback=None, save=False, **event.payload)
+                    else:
+                        event.intelligence.learn_from_feedback(**event.payload)
+                    self.applied += 1
+                except Exception as e:
+                    self.failed += 1
+                    telemetry.inc('liora_errors_total', stage='learn', error=type(e).__name__)
+                    print(f"Error applying {event.kind} learning event: {e}")
+                self._unsaved[id(event.intelligence)] = event.intelligence
+        telemetry.observe('liora_learning_lag_seconds', time.monotonic() - batch[0].submitted_at)
+
+    def _save(self, force: bool = False):
+        if not self._unsaved or (not force and time.monotonic() - self._last_save < self.save_interval):
+            return
+        intelligences, self._unsaved = list(self._unsaved.values()), {}
+        self._last_save = time.monotonic()
+        for intelligence in intelligences:
+            intelligence.save_all()
+
+    def stats(self) -> Tuple[int, int, int]:
+        """(pending, applied, failed)"""
+        return self.pending(), self.applied, self.failed
+
+
+def learning_metrics() -> List[Tuple[str, str, Dict, float]]:
+    pending, applied, failed = learning_queue.stats()
+    return [
+        ('liora_learning_queue_depth', 'gauge', {}, pending),
+        ('liora_learning_events_applied_total', 'counter', {}, applied),
+        ('liora_learning_events_failed_total', 'counter', {}, failed)
+    ]
+
+
+# Global instance
+learning_queue = LearningQueue.from_env()
+# Whatever order this runs in relative to the resource cache's exit hook, close() saves last,
+# so events still queued at exit reach the learning files
+atexit.register(learning_queue.close)
+telemetry.register_collector(learning_metrics)
@@ -0,0 +1,308 @@
+"""Cross-conversation long-term memory on a local, CPU-only vector index.
+
+User messages are split into chunks, embedded with a hashing embedder (no
+model download, no network) and appended to a NumPy matrix backed by a
+memory-mapped file. Each turn retrieves the top-k chunks most similar to
+the new message from other conversations, within a latency budget, and
+the engine adds them to the prompt.
+
+On disk (LIORA_MEMORY_DIR, default ./liora_memory):
+    vectors.f32     float32 rows, memory-mapped and grown by doubling
+    chunks.jsonl    one line per row: conversation id, position, role, text
+    removed.json    ids of deleted conversations whose rows are masked out
+
+The index subscribes to a ConversationStore like the other indexes, so it
+is updated as messages are appended and backfilled on first attach.
+"""
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from title_generator import STOPWORDS
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'+#.-]*")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+class Memory(NamedTuple):
+    conversation_id: str
+    position: int
+    role: str
+    text: str
+    score: float
+
+
+class HashingEmbedder:
+    """Feature-hashed unigrams and bigrams, log-scaled and L2-normalized
+
+    Stable across processes (crc32, not hash()), so persisted vectors stay
+    valid between runs.
+    """
+
+    def __init__(self, dim: int = 512, bigram_weight: float = 0.5):
+        self.dim = dim
+        self.bigram_weight = bigram_weight
+
+    def features(self, text: str) -> List[Tuple[str, float]]:
+        words = [word.strip(".'") for word in TOKEN_PATTERN.findall(text.lower())]
+        words = [word for word in words if word and word not in STOPWORDS]
+        # Bigrams sharpen phrase matches but should not outvote shared words in short messages
+        return [(word, 1.0) for word in words] + [(f"{a} {b}", self.bigram_weight) for a, b in zip(words, words[1:])]
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text):
+            digest = zlib.crc32(feature.encode('utf-8'))
+            # The top bit picks a sign so collisions cancel out instead of piling up
+            vector[digest % self.dim] += weight if digest & 0x80000000 else -weight
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        rows = [self.embed(text) for text in texts]
+        return np.vstack(rows) if rows else np.zeros((0, self.dim), dtype=np.float32)
+
+
+class MemoryMappedVectors:
+    """Append-only float32 matrix in a memory-mapped file"""
+
+    def __init__(self, path: str, dim: int, initial_capacity: int = 1024):
+        self.path = path
+        self.dim = dim
+        self.count = 0
+        existing_rows = os.path.getsize(path) // (4 * dim) if os.path.exists(path) else 0
+        self.capacity = max(initial_capacity, existing_rows)
+        self._open(self.capacity)
+
+    def _open(self, capacity: int):
+        mode = 'r+' if os.path.exists(self.path) else 'w+'
+        if mode == 'r+' and os.path.getsize(self.path) < capacity * self.dim * 4:
+            with open(self.path, 'r+b') as f:
+                f.truncate(capacity * self.dim * 4)
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        self.capacity = capacity
+
+    def append(self, rows: np.ndarray) -> int:
+        """Write rows after the current end, growing the file if needed; returns the first new row"""
+        start = self.count
+        needed = start + len(rows)
+        if needed > self.capacity:
+            self.matrix.flush()
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            del self.matrix
+            self._open(capacity)
+        self.matrix[start:needed] = rows
+        self.count = needed
+        return start
+
+    def view(self) -> np.ndarray:
+        return self.matrix[:self.count]
+
+    def flush(self):
+        self.matrix.flush()
+
+
+class LongTermMemory:
+    """Vector index over past user messages, kept in sync with a ConversationStore"""
+
+    def __init__(self, directory: str = "liora_memory", embedder: Optional[HashingEmbedder] = None,
+                 roles=("user",), chunk_chars: int = 400, min_chars: int = 12,
+                 budget_ms: float = 15.0, min_score: float = 0.2, block_rows: int = 32768):
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder()
+        self.roles = set(roles)
+        self.chunk_chars = chunk_chars
+        self.min_chars = min_chars
+        self.budget_ms = budget_ms
+        self.min_score = min_score
+        self.block_rows = block_rows
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.vectors = MemoryMappedVectors(os.path.join(directory, "vectors.f32"), self.embedder.dim)
+        self._chunks_path = os.path.join(directory, "chunks.jsonl")
+        self._removed_path = os.path.join(directory, "removed.json")
+        self.chunks: List[Dict] = []
+        self.removed: Set[str] = set()
+        self._indexed: Set = set()
+        self._seen_text: Set[int] = set()
+        # Per-row conversation number and live flag, so filtering by conversation is one vector op;
+        # sized like the vector file (doubling), only the first len(chunks) rows are meaningful
+        self._conversation_numbers: Dict[str, int] = {}
+        self._owners = np.full(self.vectors.capacity, -1, dtype=np.int32)
+        self._mask = np.zeros(self.vectors.capacity, dtype=bool)
+        self._load()
+        self._chunks_file = open(self._chunks_path, 'a', buffering=1, encoding='utf-8')
+
+    # Persistence
+
+    def _load(self):
+        try:
+            with open(self._removed_path, 'r') as f:
+                self.removed = set(json.load(f))
+        except (OSError, ValueError):
+            self.removed = set()
+        if os.path.exists(self._chunks_path):
+            with open(self._chunks_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # Torn write; the row after it was never committed
+                    self._remember(json.loads(line))
+        # chunks.jsonl is written after the vector row, so it decides what exists
+        self.chunks = self.chunks[:self.vectors.capacity]
+        self.vectors.count = len(self.chunks)
+        count = len(self.chunks)
+        self._owners[:count] = [self._conversation_number(chunk["c"]) for chunk in self.chunks]
+        self._mask[:count] = [chunk["c"] not in self.removed for chunk in self.chunks]
+
+    def _remember(self, chunk: Dict):
+        self.chunks.append(chunk)
+        self._indexed.add((chunk["c"], chunk["p"]))
+        self._seen_text.add(zlib.crc32(chunk["t"].lower().encode('utf-8')))
+
+    def _conversation_number(self, conversation_id: str) -> int:
+        return self._conversation_numbers.setdefault(conversation_id, len(self._conversation_numbers))
+
+    def flush(self):
+        with self._lock:
+            self.vectors.flush()
+            with open(self._removed_path + ".tmp", 'w') as f:
+                json.dump(sorted(self.removed), f)
+            os.replace(self._removed_path + ".tmp", self._removed_path)
+
+    def close(self):
+        self.flush()
+        self._chunks_file.close()
+
+    # Store notifications
+
+    def rebuild(self, conversations: Dict[str, Dict]):
+        """Backfill messages the index has not seen yet"""
+        for conversation in list(conversations.values()):
+            for position, message in enumerate(list(conversation["messages"])):
+                if (conversation["id"], position) not in self._indexed:
+                    self.add_message(conversation, position, message)
+        self.flush()
+
+    def upsert(self, conversation: Dict):
+        pass
+
+    def add_message(self, conversation: Dict, position: int, message: Dict):
+        if message.get("role") not in self.roles:
+            return
+        with self._lock:
+            key = (conversation["id"], position)
+            if key in self._indexed:
+                return
+            self._indexed.add(key)
+            chunks = []
+            for text in self.split(message.get("content", "")):
+                fingerprint = zlib.crc32(text.lower().encode('utf-8'))
+                # Repeated greetings and stock phrases would crowd out real memories
+                if fingerprint in self._seen_text:
+                    continue
+                self._seen_text.add(fingerprint)
+                chunks.append({"c": conversation["id"], "p": position, "r": message["role"], "t": text})
+            if not chunks:
+                return
+            self.vectors.append(self.embedder.embed_many(chunk["t"] for chunk in chunks))
+            for chunk in chunks:
+                self._chunks_file.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                self.chunks.append(chunk)
+            end = len(self.chunks)
+            if end > len(self._owners):
+                self._grow_rows(self.vectors.capacity)
+            self._owners[end - len(chunks):end] = self._conversation_number(conversation["id"])
+            self._mask[end - len(chunks):end] = True
+
+    def _grow_rows(self, capacity: int):
+        owners = np.full(capacity, -1, dtype=np.int32)
+        mask = np.zeros(capacity, dtype=bool)
+        owners[:len(self._owners)] = self._owners
+        mask[:len(self._mask)] = self._mask
+        self._owners, self._mask = owners, mask
+
+    def remove(self, conversation_id: str):
+        with self._lock:
+            if conversation_id not in self._conversation_numbers:
+                return
+            self.removed.add(conversation_id)
+            self._mask &= self._owners != self._conversation_numbers[conversation_id]
+        self.flush()
+
+    # Queries
+
+    def recall(self, query: str, k: int = 3, exclude_conversation: Optional[str] = None,
+               budget_ms: Optional[float] = None) -> List[Memory]:
+        """Top-k chunks most similar to the query, best first
+
+        Rows are scored block by block; once the budget is spent the best
+        matches found so far are returned, so recall never stalls a turn.
+        """
+        query_vector = self.embedder.embed(query)
+        if not query_vector.any():
+            return []
+        deadline = time.perf_counter() + (budget_ms if budget_ms is not None else self.budget_ms) / 1000
+
+        with self._lock:
+            matrix = self.vectors.view()
+            mask = self._mask[:len(matrix)].copy()
+            if exclude_conversation in self._conversation_numbers:
+                mask &= self._owners[:len(matrix)] != self._conversation_numbers[exclude_conversation]
+            chunks = self.chunks
+
+        # Newest rows first: under a tight budget recent memories are the better bet
+        best_scores = np.zeros(0, dtype=np.float32)
+        best_rows = np.zeros(0, dtype=np.int64)
+        end = len(matrix)
+        while end > 0:
+            start = max(0, end - self.block_rows)
+            scores = matrix[start:end] @ query_vector
+            scores[~mask[start:end]] = -1.0
+            rows = np.arange(start, end)
+            best_scores = np.concatenate([best_scores, scores])
+            best_rows = np.concatenate([best_rows, rows])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k)[:k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+            end = start
+            if time.perf_counter() > deadline:
+                break
+
+        order = np.argsort(-best_scores)
+        return [
+            Memory(chunks[row]["c"], chunks[row]["p"], chunks[row]["r"], chunks[row]["t"], float(score))
+            for row, score in zip(best_rows[order], best_scores[order])
+            if score >= self.min_score
+        ]
+
+    def split(self, text: str) -> List[str]:
+        """Sentence-aligned chunks of roughly chunk_chars characters"""
+        chunks, current = [], ""
+        for sentence in SENTENCE_SPLIT.split(text.strip()):
+            if current and len(current) + len(sentence) + 1 > self.chunk_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {sentence}".strip()[:self.chunk_chars]
+        if current:
+            chunks.append(current)
+        return [chunk for chunk in chunks if len(chunk) >= self.min_chars]
+
+    def __len__(self) -> int:
+        return int(self._mask[:len(self.chunks)].sum())
+
+
+def memory_from_env() -> Optional[LongTermMemory]:
+    """The process-wide memory, or None when LIORA_MEMORY=0"""
+    if os.getenv("LIORA_MEMORY", "1") == "0":
+        return None
+    return LongTermMemory(os.getenv("LIORA_MEMORY_DIR", "liora_memory"))
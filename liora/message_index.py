@@ -0,0 +1,255 @@
+import bisect
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+SNIPPET_TOKENS = 12
+
+
+class SearchHit(NamedTuple):
+    conversation_id: str
+    position: int
+    role: str
+    score: float
+    snippet: str
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class SQLiteMessageIndex:
+    """Full-text index over message content backed by SQLite FTS5
+
+    Ranked with bm25(); the last query term matches as a prefix so results
+    narrow while the user types.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5("
+            "content, conversation_id UNINDEXED, position UNINDEXED, role UNINDEXED)"
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        """Check whether this SQLite build ships FTS5"""
+        try:
+            sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(content)")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    # Store notifications
+
+    def rebuild(self, conversations: Dict[str, Dict]):
+        rows = [
+            (message["content"], conversation["id"], position, message["role"])
+            for conversation in conversations.values()
+            for position, message in enumerate(conversation["messages"])
+        ]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages")
+            self._connection.executemany("INSERT INTO messages VALUES (?, ?, ?, ?)", rows)
+
+    def upsert(self, conversation: Dict):
+        # Message content only changes through add_message
+        pass
+
+    def add_message(self, conversation: Dict, position: int, message: Dict):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO messages VALUES (?, ?, ?, ?)",
+                (message["content"], conversation["id"], position, message["role"])
+            )
+
+    def remove(self, conversation_id: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+
+    # Queries
+
+    def search(self, query: str, limit: int = 20, markers: Tuple[str, str] = ("[", "]")) -> List[SearchHit]:
+        match = self._match_expression(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT conversation_id, position, role, bm25(messages), "
+                "snippet(messages, 0, ?, ?, '…', ?) "
+                "FROM messages WHERE messages MATCH ? ORDER BY bm25(messages) LIMIT ?",
+                (markers[0], markers[1], SNIPPET_TOKENS, match, limit)
+            ).fetchall()
+        # bm25() is lower-is-better; flip it so higher scores rank first everywhere
+        return [SearchHit(cid, int(position), role, -score, snippet) for cid, position, role, score, snippet in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM messages").fetchone()[0]
+
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        terms = tokenize(query)
+        if not terms:
+            return ""
+        # Quote every term so user input can never be parsed as FTS5 syntax
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+
+class InvertedMessageIndex:
+    """Pure-Python full-text index with BM25 ranking, for SQLite builds without FTS5"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Tuple[str, int], int]] = defaultdict(dict)
+        self._sorted_terms: List[str] = []
+        self._documents: Dict[Tuple[str, int], Tuple[str, str, int]] = {}
+        self._by_conversation: Dict[str, List[int]] = defaultdict(list)
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    # Store notifications
+
+    def rebuild(self, conversations: Dict[str, Dict]):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            self._by_conversation = defaultdict(list)
+            self._total_length = 0
+            for conversation in conversations.values():
+                for position, message in enumerate(conversation["messages"]):
+                    self._add(conversation["id"], position, message)
+            self._sorted_terms = sorted(self._postings)
+
+    def upsert(self, conversation: Dict):
+        pass
+
+    def add_message(self, conversation: Dict, position: int, message: Dict):
+        with self._lock:
+            for term in self._add(conversation["id"], position, message):
+                bisect.insort(self._sorted_terms, term)
+
+    def remove(self, conversation_id: str):
+        with self._lock:
+            for position in self._by_conversation.pop(conversation_id, []):
+                key = (conversation_id, position)
+                content, _, length = self._documents.pop(key)
+                self._total_length -= length
+                for term in set(tokenize(content)):
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        continue
+                    postings.pop(key, None)
+                    if not postings:
+                        del self._postings[term]
+                        self._sorted_terms.pop(bisect.bisect_left(self._sorted_terms, term))
+
+    # Queries
+
+    def search(self, query: str, limit: int = 20, markers: Tuple[str, str] = ("[", "]")) -> List[SearchHit]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            document_count = len(self._documents)
+            if not document_count:
+                return []
+            average_length = self._total_length / document_count
+
+            # Every term must match; the last one as a prefix
+            *complete, partial = terms
+            term_groups = [[term] for term in complete] + [self._prefix_terms(partial)]
+            scores: Optional[Dict[Tuple[str, int], float]] = None
+            for group in term_groups:
+                group_scores = Counter()
+                for term in group:
+                    postings = self._postings.get(term, {})
+                    idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for key, frequency in postings.items():
+                        length = self._documents[key][2]
+                        norm = frequency + self.k1 * (1 - self.b + self.b * length / average_length)
+                        group_scores[key] += idf * frequency * (self.k1 + 1) / norm
+                if scores is None:
+                    scores = dict(group_scores)
+                else:
+                    scores = {key: score + group_scores[key] for key, score in scores.items() if key in group_scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+            matched_terms = set(complete) | set(term_groups[-1])
+            return [
+                SearchHit(cid, position, self._documents[(cid, position)][1], score,
+                          self._snippet(self._documents[(cid, position)][0], matched_terms, markers))
+                for (cid, position), score in ranked
+            ]
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    # Internals
+
+    def _add(self, conversation_id: str, position: int, message: Dict) -> List[str]:
+        """Index one message, returning terms that are new to the index"""
+        key = (conversation_id, position)
+        terms = tokenize(message["content"])
+        self._documents[key] = (message["content"], message["role"], len(terms))
+        self._by_conversation[conversation_id].append(position)
+        self._total_length += len(terms)
+        new_terms = []
+        for term, frequency in Counter(terms).items():
+            if term not in self._postings:
+                new_terms.append(term)
+            self._postings[term][key] = frequency
+        return new_terms
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        found = []
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            found.append(term)
+        return found
+
+    @staticmethod
+    def _snippet(content: str, matched_terms, markers: Tuple[str, str]) -> str:
+        tokens = list(TOKEN_PATTERN.finditer(content))
+        first = next((i for i, token in enumerate(tokens) if token.group().lower() in matched_terms), 0)
+        start = max(0, first - SNIPPET_TOKENS // 3)
+        window = tokens[start:start + SNIPPET_TOKENS]
+        if not window:
+            return content[:80]
+
+        pieces = []
+        cursor = window[0].start()
+        for token in window:
+            pieces.append(content[cursor:token.start()])
+            if token.group().lower() in matched_terms:
+                pieces.append(f"{markers[0]}{token.group()}{markers[1]}")
+            else:
+                pieces.append(token.group())
+            cursor = token.end()
+        snippet = "".join(pieces)
+        if start > 0:
+            snippet = "…" + snippet
+        if start + SNIPPET_TOKENS < len(tokens):
+            snippet += "…"
+        return snippet
+
+
+def create_message_index():
+    """SQLite FTS5 when the interpreter's SQLite has it, otherwise the built-in index"""
+    if SQLiteMessageIndex.available():
+        return SQLiteMessageIndex()
+    return InvertedMessageIndex()
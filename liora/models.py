@@ -0,0 +1,129 @@
+from providers import (
+    ProviderError, AuthenticationError, OpenRouterModel, OpenRouterLLM,
+    RateLimitedGeminiModel, RateLimitedGeminiLLM, OPENROUTER_URL
+)
+
+DEFAULT_MODEL = "Gemini 1.5 Flash"
+
+# Model configurations; API keys come from LioraConfig
+MODELS = {
+    "Gemini 1.5 Flash": {
+        "type": "gemini",
+        "model": "gemini-1.5-flash",
+        "description": "Fast and efficient Google model"
+    },
+    "Mistral 7B": {
+        "type": "openrouter",
+        "model": "mistralai/mistral-7b-instruct:free",
+        "description": "Lightweight and fast Mistral model"
+    },
+    "Llama 3.1 8B": {
+        "type": "openrouter",
+        "model": "meta-llama/llama-3.1-8b-instruct",
+        "description": "Meta's efficient Llama model"
+    },
+    "GPT-3.5 Turbo": {
+        "type": "openrouter",
+        "model": "openai/gpt-3.5-turbo",
+        "description": "OpenAI's reliable and fast model"
+    }
+}
+
+
+def initialize_model(model_name, config):
+    """Initialize the specified model, returning (model, llm).
+
+    Raises ProviderError if the backend cannot be reached; failover to other
+    models is handled per request by the router.
+    """
+    if model_name not in MODELS:
+        raise ValueError(f"Unknown model: {model_name}")
+
+    model_config = MODELS[model_name]
+    api_key = config.api_key_for(model_config["type"])
+    if not api_key:
+        raise AuthenticationError(f"No API key configured for {model_name}", model_config["type"])
+
+    if model_config["type"] == "gemini":
+        # The Google SDKs take most of a second to import; only load them for Gemini
+        import google.generativeai as genai
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(model_config["model"])
+        llm = ChatGoogleGenerativeAI(
+            model=model_config["model"],
+            google_api_key=api_key,
+            temperature=0.7
+        )
+        return RateLimitedGeminiModel(model, api_key), RateLimitedGeminiLLM(llm, api_key)
+
+    # OpenRouter models use direct API calls
+    model = OpenRouterModel(api_key, model_config["model"])
+    llm = OpenRouterLLM(api_key, model_config["model"])
+
+    # Test the connection; failures raise a typed ProviderError
+    try:
+        model.generate_content("Hello", max_tokens=10)
+        print(f"✅ Successfully connected to {model_config['model']}")
+    except ProviderError as e:
+        print(f"❌ Failed to connect to {model_config['model']}: {str(e)}")
+        raise
+
+    return model, llm
+
+
+def generation_kwargs():
+    """Sampling settings for streamed replies; OpenRouter models ignore generation_config
+
+    Gemini accepts the config as a plain dict, which keeps the SDK out of the
+    import path for OpenRouter-only processes.
+    """
+    return {
+        'generation_config': {
+            'temperature': 0.7,
+            'top_p': 0.9,
+            'top_k': 40,
+            'max_output_tokens': 2048,
+        }
+    }
+
+
+def test_openrouter_connection(config):
+    """Test OpenRouter connection and available models."""
+    import requests
+
+    try:
+        headers = {
+            "Authorization": f"Bearer {config.openrouter_api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://ardena.ai",
+            "X-Title": "Liora AI Assistant"
+        }
+
+        # Test all models
+        models_to_test = [
+            model_config["model"] for model_config in MODELS.values() if model_config["type"] == "openrouter"
+        ]
+
+        for model in models_to_test:
+            data = {
+                "model": model,
+                "messages": [{"role": "user", "content": "Hello"}],
+                "max_tokens": 10
+            }
+
+            try:
+                response = requests.post(OPENROUTER_URL, headers=headers, json=data, timeout=30)
+
+                if response.status_code == 200:
+                    print(f"✅ {model} - Connection successful!")
+                else:
+                    print(f"❌ {model} - Failed: {response.status_code} - {response.text}")
+            except Exception as e:
+                print(f"❌ {model} - Error: {str(e)}")
+
+        return True
+    except Exception as e:
+        print(f"❌ OpenRouter connection failed: {str(e)}")
+        return False
@@ -0,0 +1,254 @@
+"""Opt-in cProfile/tracemalloc capture of single chat turns.
+
+    LIORA_PROFILE=1        profile every turn (0.05 samples 5% of turns)
+    LIORA_PROFILE_MEMORY=1 also record the top allocation sites with tracemalloc
+    LIORA_PROFILE_DIR      where profiles go (default ./profiles)
+    LIORA_PROFILE_KEEP     how many profiles to keep (default 50; oldest are deleted)
+
+The server profiles a single turn when the /chat body has "profile": true.
+Each profiled turn writes <timestamp>-<request_id>.prof (pstats format, also
+readable by snakeviz and friends) and a .json sidecar with wall/CPU time,
+trace attributes and, with memory tracing on, the top allocation sites.
+
+    python -m liora.profiling list [--dir profiles]
+    python -m liora.profiling summarize [--dir profiles] [--last N] [--top 25] [--sort cumulative]
+    python -m liora.profiling summarize --request <request_id>
+
+summarize merges the selected profiles and prints the hottest functions
+across all of them.
+"""
+import argparse
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+from telemetry import telemetry
+
+DEFAULT_PROFILE_DIR = "profiles"
+MEMORY_TOP = 25
+
+
+class TurnProfiler:
+    """Wraps chat turns in cProfile (and optionally tracemalloc) and saves the results
+
+    Profiling is per thread, so the capture covers the turn and whatever the
+    consumer does between chunks on the same thread (rendering, relaying).
+    Work on other threads, such as router attempts and background titling,
+    shows up only as time spent waiting.
+    """
+
+    def __init__(self, directory: str = DEFAULT_PROFILE_DIR, sample_rate: float = 0.0, memory: bool = False,
+                 keep: int = 50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.memory = memory
+        self.keep = keep
+        self._lock = threading.Lock()
+        # tracemalloc is process-wide: it runs while any memory-profiled turn is active
+        self._memory_turns = 0
+        self._started_tracing = False
+
+    @classmethod
+    def from_env(cls) -> "TurnProfiler":
+        try:
+            sample_rate = float(os.getenv("LIORA_PROFILE", "0") or 0)
+        except ValueError:
+            sample_rate = 0.0
+        return cls(
+            directory=os.getenv("LIORA_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+            sample_rate=sample_rate,
+            memory=os.getenv("LIORA_PROFILE_MEMORY", "0") == "1",
+            keep=int(os.getenv("LIORA_PROFILE_KEEP", "50"))
+        )
+
+    def should_profile(self) -> bool:
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def profile(self, turn: Iterator[str], request_id: Optional[str] = None) -> Iterator[str]:
+        """Profile a turn generator from its first chunk request to its end"""
+        request_id = sanitize_request_id(request_id or uuid.uuid4().hex[:16])
+        profiler = cProfile.Profile()
+        memory_before = self._begin_memory() if self.memory else None
+
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        outcome = "ok"
+        profiler.enable()
+        try:
+            yield from turn
+        except BaseException as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - wall_started
+            cpu = time.thread_time() - cpu_started
+            allocations = None
+            if memory_before is not None:
+                allocations = self._end_memory(memory_before)
+            trace = telemetry.current_trace()
+            self.save(profiler, request_id, {
+                "request_id": request_id,
+                "recorded_at": time.time(),
+                "wall_ms": round(wall * 1000, 3),
+                "cpu_ms": round(cpu * 1000, 3),
+                "outcome": outcome,
+                "attributes": trace.attributes if trace else {},
+                "allocations": allocations
+            })
+
+    def _begin_memory(self) -> Optional[tracemalloc.Snapshot]:
+        with self._lock:
+            if self._memory_turns == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._memory_turns += 1
+            return tracemalloc.take_snapshot()
+
+    def _end_memory(self, before: tracemalloc.Snapshot) -> Optional[List[Dict]]:
+        """Allocation sites since before; tracing stops when the last memory-profiled turn ends"""
+        try:
+            after = tracemalloc.take_snapshot()
+        except RuntimeError:
+            # Tracing was stopped by someone else
+            after = None
+        with self._lock:
+            self._memory_turns -= 1
+            if self._memory_turns == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        return top_allocations(before, after) if after is not None else None
+
+    def save(self, profiler: cProfile.Profile, request_id: str, metadata: Dict):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{request_id}")
+            profiler.dump_stats(base + ".prof")
+            with open(base + ".json", 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            self.rotate()
+        except Exception as e:
+            print(f"Error saving profile {request_id}: {e}")
+
+    def rotate(self):
+        """Delete the oldest profiles beyond the keep limit"""
+        with self._lock:
+            profiles = list_profiles(self.directory)
+            for path in profiles[:max(0, len(profiles) - self.keep)]:
+                for stale in (path, path[:-len(".prof")] + ".json"):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+
+
+def sanitize_request_id(request_id: str) -> str:
+    # Request ids end up in file names
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(request_id))[:64]
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int = MEMORY_TOP) -> List[Dict]:
+    differences = after.compare_to(before, 'lineno')
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff_kb": round(stat.size_diff / 1024, 2),
+            "count_diff": stat.count_diff
+        }
+        for stat in differences[:limit]
+    ]
+
+
+def list_profiles(directory: str) -> List[str]:
+    """Saved .prof files, oldest first"""
+    return sorted(glob.glob(os.path.join(directory, "*.prof")), key=os.path.getmtime)
+
+
+def load_metadata(profile_path: str) -> Dict:
+    try:
+        with open(profile_path[:-len(".prof")] + ".json", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def summarize(paths: List[str], top: int = 25, sort: str = "cumulative") -> str:
+    """Merge profiles and render the hottest functions across all of them"""
+    output = io.StringIO()
+    stats = pstats.Stats(*paths, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return output.getvalue()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Inspect saved per-turn profiles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="Saved profiles with their timings")
+    summary_parser = commands.add_parser("summarize", help="Hot spots across saved profiles")
+    summary_parser.add_argument("--last", type=int, help="Only the newest N profiles")
+    summary_parser.add_argument("--request", help="Only the profile for one request id")
+    summary_parser.add_argument("--top", type=int, default=25)
+    summary_parser.add_argument("--sort", default="cumulative", choices=("cumulative", "tottime", "ncalls"))
+
+    for command in (list_parser, summary_parser):
+        command.add_argument("--dir", default=os.getenv("LIORA_PROFILE_DIR", DEFAULT_PROFILE_DIR))
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    paths = list_profiles(args.dir)
+    if not paths:
+        raise SystemExit(f"No profiles in {args.dir}")
+
+    if args.command == "list":
+        for path in paths:
+            metadata = load_metadata(path)
+            attributes = metadata.get("attributes", {})
+            print(f"{os.path.basename(path):<48} {metadata.get('wall_ms', 0):>9.1f} ms wall "
+                  f"{metadata.get('cpu_ms', 0):>8.1f} ms cpu  {attributes.get('intent', '-'):<7} "
+                  f"{metadata.get('outcome', '')}")
+        return
+
+    if args.request:
+        request_id = sanitize_request_id(args.request)
+        paths = [path for path in paths if path.endswith(f"-{request_id}.prof")]
+        if not paths:
+            raise SystemExit(f"No profile for request {args.request}")
+    elif args.last:
+        paths = paths[-args.last:]
+
+    metadata = [load_metadata(path) for path in paths]
+    wall = sum(m.get("wall_ms", 0) for m in metadata)
+    cpu = sum(m.get("cpu_ms", 0) for m in metadata)
+    print(f"{len(paths)} profiles, {wall:.1f} ms wall, {cpu:.1f} ms cpu in total "
+          f"({cpu / wall:.0%} on CPU)" if wall else f"{len(paths)} profiles")
+    print(summarize(paths, args.top, args.sort))
+
+    allocations: Dict[str, float] = {}
+    for m in metadata:
+        for allocation in m.get("allocations") or []:
+            allocations[allocation["location"]] = allocations.get(allocation["location"], 0) + allocation["size_diff_kb"]
+    if allocations:
+        print("Top allocation sites (KiB retained, summed):")
+        for location, size in sorted(allocations.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {size:>10.1f}  {location}")
+
+
+# Global instance
+turn_profiler = TurnProfiler.from_env()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""Recompute learning state from the whole conversation history in one batch.
+
+    python -m liora.reanalysis backup.jsonl.gz [-o reanalysis] [--workers 4] [--apply]
+    python -m liora.reanalysis --conversations-file conversations.pkl [...]
+
+Use this after changing the keyword tables or the scoring weights and
+thresholds in conversation_intelligence: every stored turn is re-scored as
+if learn_from_interaction had seen it. Both are shared constants, so
+changing them needs nothing here; a new term in
+assess_response_effectiveness has to be added to analyze_chunk as well
+(tests/test_reanalysis.py compares the two). The source is an archive
+written by `python -m liora.archive export` (streamed, never loaded whole)
+or a conversation store.
+
+Conversations are cut into chunks of about --chunk-messages messages and
+analyzed in a process pool. Each chunk becomes a boolean NumPy matrix of
+keyword hits (messages × keywords, filled one keyword column at a time).
+Topics, sentiment, engagement, style and effectiveness scores for every
+turn are derived from it with array arithmetic, and each worker returns
+only the aggregates.
+
+The result is a fresh learning snapshot, written to the output directory
+as the usual three learning files, and a report (report.json, also printed)
+comparing it with the current state. --apply also overwrites the live
+learning files. Counts that come from explicit feedback (satisfaction
+scores, successful responses) are not in the history and are kept as they
+are.
+
+Differences from the live path: history windows are the last
+HISTORY_MESSAGES messages without the rolling summary and at full length,
+and keyword hits are computed per message, so a keyword spanning two
+messages is not counted.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from conversation_intelligence import (
+    BRIEF_REPLY_CHARS, CASUAL_INDICATORS, EFFECTIVE_RESPONSE_THRESHOLD, EFFECTIVENESS_BASE, ENGAGEMENT_INDICATORS,
+    ENGAGING_BONUS, ENGAGING_PHRASES, FORMAL_INDICATORS, LENGTH_PENALTY, LONG_MESSAGE_CHARS, NEGATIVE_WORDS,
+    POSITIVE_WORDS, SENTIMENT_MATCH_BONUS, SHORT_MESSAGE_CHARS, TECHNICAL_INDICATORS, TOPIC_KEYWORDS,
+    TOPIC_OVERLAP_WEIGHT, VERBOSE_REPLY_CHARS, ConversationIntelligence
+)
+from liora.archive import read_records
+from liora.engine import HISTORY_MESSAGES, build_conversation_history
+from liora.storage import ConversationStore
+
+# Conversation ids with their messages as (role, content) pairs
+ConversationMessages = Tuple[str, List[Tuple[str, str]]]
+
+TOPICS = list(TOPIC_KEYWORDS)
+ENGAGEMENT_LEVELS = list(ENGAGEMENT_INDICATORS)
+SCORE_BINS = np.linspace(0.0, 1.0, 11)
+
+
+class KeywordTable:
+    """Every keyword the intelligence engine looks for, with group membership matrices
+
+    A keyword shared by several tables ('amazing', 'awesome', ...) gets one
+    column, so each message is searched for it only once.
+    """
+
+    def __init__(self):
+        groups = {f"topic:{topic}": keywords for topic, keywords in TOPIC_KEYWORDS.items()}
+        groups.update({f"engagement:{level}": indicators for level, indicators in ENGAGEMENT_INDICATORS.items()})
+        groups.update({
+            "positive": POSITIVE_WORDS, "negative": NEGATIVE_WORDS, "formal": FORMAL_INDICATORS,
+            "casual": CASUAL_INDICATORS, "technical": TECHNICAL_INDICATORS, "engaging": ENGAGING_PHRASES
+        })
+        self.keywords = list(dict.fromkeys(keyword for keywords in groups.values() for keyword in keywords))
+        columns = {keyword: column for column, keyword in enumerate(self.keywords)}
+        self.groups = {}
+        for name, keywords in groups.items():
+            membership = np.zeros(len(self.keywords), dtype=np.int32)
+            membership[[columns[keyword] for keyword in set(keywords)]] = 1
+            self.groups[name] = membership
+
+    def group_matrix(self, names: List[str]) -> np.ndarray:
+        """keywords × groups membership, for counting distinct hits per group with one product"""
+        return np.stack([self.groups[name] for name in names], axis=1)
+
+    def hits(self, texts: List[str]) -> np.ndarray:
+        """messages × keywords, True where the lowercased message contains the keyword"""
+        lowered = [text.lower() for text in texts]
+        # One scan of the whole chunk rules out keywords that appear nowhere in it
+        everything = "\x00".join(lowered)
+        hits = np.zeros((len(texts), len(self.keywords)), dtype=bool)
+        for column, keyword in enumerate(self.keywords):
+            if keyword in everything:
+                # str containment is a C substring search, several times faster than np.strings.find
+                hits[:, column] = [keyword in text for text in lowered]
+        return hits
+
+
+def window_hits(hits: np.ndarray, starts: np.ndarray, window: int) -> np.ndarray:
+    """For each message, which keywords appear in it or the window - 1 messages before it
+
+    starts holds the index of the first message of each message's
+    conversation, so windows never reach into the previous conversation.
+    """
+    cumulative = np.zeros((len(hits) + 1, hits.shape[1]), dtype=np.int32)
+    np.cumsum(hits, axis=0, out=cumulative[1:])
+    ends = np.arange(1, len(hits) + 1)
+    begins = np.maximum(starts, ends - window)
+    return (cumulative[ends] - cumulative[begins]) > 0
+
+
+def analyze_chunk(chunk_index: int, conversations: List[ConversationMessages], window: int = HISTORY_MESSAGES,
+                  keep_effective: int = 200) -> Dict:
+    """Score every turn in a chunk of conversations; runs in a worker process"""
+    table = KeywordTable()
+    roles, texts, starts, conversation_ids, positions = [], [], [], [], []
+    for conversation_id, messages in conversations:
+        start = len(texts)
+        for position, (role, content) in enumerate(messages):
+            roles.append(role)
+            texts.append(content or "")
+            starts.append(start)
+            conversation_ids.append(conversation_id)
+            positions.append(position)
+
+    result = {
+        "index": chunk_index, "conversations": len(conversations), "messages": len(texts), "turns": 0,
+        "topic_counts": [0] * len(TOPICS), "engagement_counts": [0] * len(ENGAGEMENT_LEVELS),
+        "score_sum": 0.0, "score_histogram": [0] * (len(SCORE_BINS) - 1), "effective_total": 0,
+        "effective": [], "last_style": None
+    }
+    if not texts:
+        return result
+
+    hits = table.hits(texts).astype(np.int32)
+    starts = np.array(starts)
+    is_user = np.array([role == "user" for role in roles])
+    is_reply = np.array([role == "assistant" for role in roles])
+    # A turn is a user message answered by the next message in the same conversation
+    turn = np.zeros(len(texts), dtype=bool)
+    turn[:-1] = is_user[:-1] & is_reply[1:] & (starts[1:] == starts[:-1])
+    users = np.flatnonzero(turn)
+    replies = users + 1
+    result["turns"] = len(users)
+    if not len(users):
+        return result
+
+    # What analyze_conversation sees: the history window ending at the user message
+    history = window_hits(hits, starts, window)[users].astype(np.int32)
+    topics = history @ table.group_matrix([f"topic:{topic}" for topic in TOPICS]) > 0
+    result["topic_counts"] = topics.sum(axis=0).tolist()
+
+    # Engagement: the level with the most indicator hits, first level winning ties, medium if none
+    engagement_scores = history @ table.group_matrix([f"engagement:{level}" for level in ENGAGEMENT_LEVELS])
+    engagement = np.argmax(engagement_scores, axis=1)
+    engagement[engagement_scores.max(axis=1) == 0] = ENGAGEMENT_LEVELS.index('medium')
+    result["engagement_counts"] = np.bincount(engagement, minlength=len(ENGAGEMENT_LEVELS)).tolist()
+
+    formal, casual, technical = (history[-1] @ table.group_matrix(["formal", "casual", "technical"])).tolist()
+    result["last_style"] = (
+        'technical' if technical > max(formal, casual) else 'formal' if formal > casual else 'casual'
+    )
+
+    # assess_response_effectiveness, term by term and in the same order
+    message_topics = hits @ table.group_matrix([f"topic:{topic}" for topic in TOPICS]) > 0
+    user_topics, reply_topics = message_topics[users], message_topics[replies]
+    user_topic_counts = user_topics.sum(axis=1)
+    overlap = (user_topics & reply_topics).sum(axis=1)
+    both = (user_topic_counts > 0) & reply_topics.any(axis=1)
+    scores = np.full(len(users), EFFECTIVENESS_BASE)
+    scores[both] += TOPIC_OVERLAP_WEIGHT * (overlap[both] / user_topic_counts[both])
+
+    lengths = np.array([len(text) for text in texts])
+    user_lengths, reply_lengths = lengths[users], lengths[replies]
+    too_long = (user_lengths < SHORT_MESSAGE_CHARS) & (reply_lengths > VERBOSE_REPLY_CHARS)
+    too_short = ~too_long & (user_lengths > LONG_MESSAGE_CHARS) & (reply_lengths < BRIEF_REPLY_CHARS)
+    scores[too_long | too_short] -= LENGTH_PENALTY
+
+    scores[hits[replies] @ table.groups["engaging"] > 0] += ENGAGING_BONUS
+    sentiment = np.sign(hits @ table.groups["positive"] - hits @ table.groups["negative"])
+    scores[sentiment[users] == sentiment[replies]] += SENTIMENT_MATCH_BONUS
+    scores = np.clip(scores, 0.0, 1.0)
+
+    result["score_sum"] = float(scores.sum())
+    result["score_histogram"] = np.histogram(scores, bins=SCORE_BINS)[0].tolist()
+
+    effective = np.flatnonzero(scores > EFFECTIVE_RESPONSE_THRESHOLD)
+    result["effective_total"] = len(effective)
+    for turn_index in effective[-keep_effective:]:
+        user, reply = users[turn_index], replies[turn_index]
+        begin = max(starts[user], user + 1 - window)
+        result["effective"].append({
+            "conversation_id": conversation_ids[user],
+            "position": positions[user],
+            "user_message": texts[user],
+            "assistant_response": texts[reply],
+            "effectiveness_score": float(scores[turn_index]),
+            "history": build_conversation_history(
+                [{"role": roles[i], "content": texts[i]} for i in range(begin, user + 1)], window
+            )
+        })
+    return result
+
+
+# Sources
+
+def iter_archive_conversations(path: str) -> Iterator[ConversationMessages]:
+    """Conversations from an archive, one at a time, in archive order"""
+    conversation_id, messages = None, []
+    for record, _ in read_records(path):
+        record_type = record.get("type")
+        if record_type == "conversation":
+            if conversation_id is not None:
+                yield conversation_id, messages
+            conversation_id, messages = record["id"], []
+        elif record_type == "message" and record.get("conversation_id") == conversation_id:
+            messages.append((record.get("role"), record.get("content", "")))
+    if conversation_id is not None:
+        yield conversation_id, messages
+
+
+def iter_store_conversations(store: ConversationStore) -> Iterator[ConversationMessages]:
+    for conversation_id in list(store.conversations):
+        conversation = store.get(conversation_id)
+        if conversation is not None:
+            yield conversation_id, [(message["role"], message["content"]) for message in conversation["messages"]]
+
+
+def iter_chunks(conversations: Iterable[ConversationMessages],
+                chunk_messages: int) -> Iterator[List[ConversationMessages]]:
+    chunk, size = [], 0
+    for conversation in conversations:
+        chunk.append(conversation)
+        size += len(conversation[1])
+        if size >= chunk_messages:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+# Aggregation
+
+class Reanalysis:
+    """Merges chunk results into one learning snapshot"""
+
+    def __init__(self, keep_effective: int = 200):
+        self.keep_effective = keep_effective
+        self.conversations = 0
+        self.messages = 0
+        self.turns = 0
+        self.topic_frequency = Counter()
+        self.engagement = Counter()
+        self.score_sum = 0.0
+        self.score_histogram = np.zeros(len(SCORE_BINS) - 1, dtype=np.int64)
+        self.effective_total = 0
+        # Chunks finish out of order; effective responses and style are taken in archive order
+        self._effective: Dict[int, List[Dict]] = {}
+        self._styles: Dict[int, str] = {}
+
+    def add(self, result: Dict):
+        self.conversations += result["conversations"]
+        self.messages += result["messages"]
+        self.turns += result["turns"]
+        self.topic_frequency.update({topic: count for topic, count in zip(TOPICS, result["topic_counts"]) if count})
+        self.engagement.update({level: count for level, count in zip(ENGAGEMENT_LEVELS, result["engagement_counts"])
+                                if count})
+        self.score_sum += result["score_sum"]
+        self.score_histogram += result["score_histogram"]
+        self.effective_total += result["effective_total"]
+        if result["effective"]:
+            self._effective[result["index"]] = result["effective"]
+        if result["last_style"]:
+            self._styles[result["index"]] = result["last_style"]
+
+    def effective_responses(self) -> List[Dict]:
+        examples = [example for index in sorted(self._effective) for example in self._effective[index]]
+        return examples[-self.keep_effective:]
+
+    @property
+    def communication_style(self) -> Optional[str]:
+        return self._styles[max(self._styles)] if self._styles else None
+
+    def apply(self, intelligence: ConversationIntelligence):
+        """Replace the history-derived parts of the learning state"""
+        intelligence.interaction_count = self.turns
+        intelligence.topic_frequency = Counter(self.topic_frequency)
+        intelligence.user_engagement_patterns = dict(self.engagement)
+        intelligence.replace_patterns('effective_responses', [
+            {
+                'user_message': example['user_message'],
+                'assistant_response': example['assistant_response'],
+                # Only the kept examples need the full analysis, so it is done here rather than in bulk
+                'context': intelligence.analyze_conversation(example['history']),
+                'effectiveness_score': example['effectiveness_score'],
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+            for example in self.effective_responses()
+        ])
+        if self.communication_style:
+            intelligence.user_preferences['communication_style'] = self.communication_style
+
+    def report(self, previous: ConversationIntelligence, elapsed: float, workers: int) -> Dict:
+        return {
+            "conversations": self.conversations,
+            "messages": self.messages,
+            "turns": self.turns,
+            "elapsed_s": round(elapsed, 3),
+            "messages_per_s": round(self.messages / elapsed, 1) if elapsed > 0 else None,
+            "workers": workers,
+            "topic_frequency": {
+                "before": dict(previous.topic_frequency.most_common()),
+                "after": dict(self.topic_frequency.most_common())
+            },
+            "engagement": {"before": dict(previous.user_engagement_patterns), "after": dict(self.engagement)},
+            "effectiveness": {
+                "mean": self.score_sum / self.turns if self.turns else None,
+                "histogram": dict(zip((f"{low:.1f}-{high:.1f}" for low, high in zip(SCORE_BINS, SCORE_BINS[1:])),
+                                      self.score_histogram.tolist())),
+                "effective_turns": self.effective_total,
+                "effective_kept": len(self.effective_responses())
+            },
+            "communication_style": {
+                "before": previous.user_preferences.get('communication_style'),
+                "after": self.communication_style or previous.user_preferences.get('communication_style')
+            }
+        }
+
+
+def run(conversations: Iterable[ConversationMessages], workers: int, chunk_messages: int = 20000,
+        keep_effective: int = 200) -> Reanalysis:
+    """Analyze every conversation, in a process pool unless workers is 1"""
+    reanalysis = Reanalysis(keep_effective)
+    chunks = enumerate(iter_chunks(conversations, chunk_messages))
+    if workers <= 1:
+        for index, chunk in chunks:
+            reanalysis.add(analyze_chunk(index, chunk, keep_effective=keep_effective))
+        return reanalysis
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+
+        def drain(return_when):
+            nonlocal in_flight
+            finished, in_flight = wait(in_flight, return_when=return_when)
+            for future in finished:
+                reanalysis.add(future.result())
+
+        for index, chunk in chunks:
+            # Only read ahead a little so the archive never sits in memory
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+            in_flight.add(executor.submit(analyze_chunk, index, chunk, HISTORY_MESSAGES, keep_effective))
+        while in_flight:
+            drain(FIRST_COMPLETED)
+    return reanalysis
+
+
+def save_snapshot(intelligence: ConversationIntelligence, directory: str):
+    """Write the three learning files into a directory instead of the working directory"""
+    os.makedirs(directory, exist_ok=True)
+    live_paths = (intelligence.learning_data_file, intelligence.conversation_patterns_file,
+                  intelligence.user_preferences_file)
+    intelligence.learning_data_file, intelligence.conversation_patterns_file, intelligence.user_preferences_file = (
+        os.path.join(directory, os.path.basename(path)) for path in live_paths
+    )
+    try:
+        intelligence.save_learning_data()
+        intelligence.save_conversation_patterns()
+        intelligence.save_user_preferences()
+    finally:
+        intelligence.learning_data_file, intelligence.conversation_patterns_file, \
+            intelligence.user_preferences_file = live_paths
+
+
+def print_report(report: Dict, stream=sys.stderr):
+    print(f"{report['conversations']} conversations, {report['messages']} messages, {report['turns']} turns "
+          f"in {report['elapsed_s']:.2f}s ({report['messages_per_s'] or 0:.0f} messages/s, "
+          f"{report['workers']} workers)", file=stream)
+    before, after = report["topic_frequency"]["before"], report["topic_frequency"]["after"]
+    print("topics", file=stream)
+    for topic in sorted(set(before) | set(after), key=lambda name: -after.get(name, 0)):
+        print(f"  {topic:<16} {before.get(topic, 0):>8} -> {after.get(topic, 0):>8}", file=stream)
+    before, after = report["engagement"]["before"], report["engagement"]["after"]
+    print("engagement  " + ", ".join(f"{level} {before.get(level, 0)} -> {after.get(level, 0)}"
+                                     for level in ENGAGEMENT_LEVELS), file=stream)
+    effectiveness = report["effectiveness"]
+    if effectiveness["mean"] is not None:
+        print(f"effectiveness mean {effectiveness['mean']:.3f}, {effectiveness['effective_turns']} turns above "
+              f"{EFFECTIVE_RESPONSE_THRESHOLD} ({effectiveness['effective_kept']} kept as examples)", file=stream)
+    style = report["communication_style"]
+    print(f"style       {style['before']} -> {style['after']}", file=stream)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Recompute learning state from stored conversations")
+    parser.add_argument("archive", nargs="?", help="Archive from `python -m liora.archive export`")
+    parser.add_argument("--conversations-file", help="Analyze a conversation store instead of an archive")
+    parser.add_argument("-o", "--output", default="reanalysis", help="Directory for the snapshot and report")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes; 1 runs inline")
+    parser.add_argument("--chunk-messages", type=int, default=20000, help="Messages per worker task")
+    parser.add_argument("--apply", action="store_true", help="Also overwrite the live learning files")
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if bool(args.archive) == bool(args.conversations_file):
+        parser.error("give either an archive or --conversations-file")
+
+    if args.archive:
+        conversations = iter_archive_conversations(args.archive)
+    else:
+        conversations = iter_store_conversations(ConversationStore(args.conversations_file, full_text=False))
+
+    intelligence = ConversationIntelligence()
+    previous = ConversationIntelligence()
+    started = time.monotonic()
+    reanalysis = run(conversations, args.workers, args.chunk_messages, intelligence.max_effective_responses)
+    elapsed = time.monotonic() - started
+
+    reanalysis.apply(intelligence)
+    report = reanalysis.report(previous, elapsed, max(1, args.workers))
+    save_snapshot(intelligence, args.output)
+    with open(os.path.join(args.output, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"Snapshot and report written to {args.output}", file=sys.stderr)
+
+    if args.apply:
+        intelligence.save_learning_data()
+        intelligence.save_conversation_patterns()
+        intelligence.save_user_preferences()
+        print("Live learning files replaced", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import atexit
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from rate_limiter import key_fingerprint
+
+# Resource kinds shared by every session in the process
+MODEL_CLIENTS = 'model_clients'
+SEARCH_TOOL = 'search_tool'
+RETRIEVER = 'retriever'
+INTELLIGENCE = 'intelligence'
+MEMORY = 'memory'
+
+
+class Resource:
+    """One built resource and its bookkeeping"""
+
+    def __init__(self, value: Any, close: Optional[Callable[[Any], None]]):
+        self.value = value
+        self.close = close
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class ResourceCache:
+    """Process-wide cache of expensive shared objects: provider clients, the
+    search tool, the retriever, the intelligence engine and long-term memory
+
+    Each resource is identified by a kind and an optional key (for example a
+    model name and API key fingerprint). It is built once, on first use, and
+    shared by every session and thread. Concurrent first requests for the
+    same resource wait for a single build. Resources stay alive until they
+    are invalidated or the process exits, at which point their close hook
+    runs (the intelligence engine flushes its learning data there).
+    """
+
+    def __init__(self, close_at_exit: bool = True):
+        self._factories: Dict[str, Tuple[Callable, Optional[Callable[[Any], None]]]] = {}
+        self._resources: Dict[Tuple[str, Hashable], Resource] = {}
+        self._building: Dict[Tuple[str, Hashable], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+        if close_at_exit:
+            atexit.register(self.close_all)
+
+    def register(self, kind: str, factory: Callable, close: Optional[Callable[[Any], None]] = None):
+        """Set the default builder for a kind; keyed kinds receive the key as their only argument"""
+        with self._lock:
+            self._factories[kind] = (factory, close)
+
+    def get(self, kind: str, key: Hashable = None, factory: Optional[Callable[[], Any]] = None,
+            close: Optional[Callable[[Any], None]] = None) -> Any:
+        """Return the shared resource, building it on first use
+
+        A factory passed here takes precedence over the registered one and is
+        called with no arguments.
+        """
+        cache_key = (kind, key)
+        with self._lock:
+            resource = self._resources.get(cache_key)
+            if resource is not None:
+                return self._touch(resource)
+            build_lock = self._building.setdefault(cache_key, threading.Lock())
+
+        # Only one thread builds a given resource; the rest wait and reuse it
+        with build_lock:
+            with self._lock:
+                resource = self._resources.get(cache_key)
+                if resource is not None:
+                    return self._touch(resource)
+
+            build, close = self._builder(kind, key, factory, close)
+            value = build()
+
+            with self._lock:
+                resource = Resource(value, close)
+                self._resources[cache_key] = resource
+                self._building.pop(cache_key, None)
+                self.builds += 1
+                resource.uses += 1
+                return value
+
+    def peek(self, kind: str, key: Hashable = None) -> Optional[Any]:
+        """Return a resource only if it has already been built"""
+        with self._lock:
+            resource = self._resources.get((kind, key))
+            return resource.value if resource is not None else None
+
+    def put(self, kind: str, value: Any, key: Hashable = None, close: Optional[Callable[[Any], None]] = None):
+        """Install an already-built resource, closing whatever it replaces"""
+        with self._lock:
+            previous = self._resources.get((kind, key))
+            self._resources[(kind, key)] = Resource(value, close)
+        if previous is not None and previous.value is not value:
+            self._close(kind, previous)
+
+    def invalidate(self, kind: str, key: Hashable = None) -> bool:
+        """Close and drop one resource; the next get() builds a fresh one"""
+        with self._lock:
+            resource = self._resources.pop((kind, key), None)
+        if resource is None:
+            return False
+        self._close(kind, resource)
+        return True
+
+    def invalidate_kind(self, kind: str) -> int:
+        """Close and drop every resource of a kind"""
+        with self._lock:
+            keys = [cache_key for cache_key in self._resources if cache_key[0] == kind]
+            resources = [self._resources.pop(cache_key) for cache_key in keys]
+        for resource in resources:
+            self._close(kind, resource)
+        return len(resources)
+
+    def close_all(self):
+        """Close every resource; called at interpreter exit"""
+        with self._lock:
+            resources = list(self._resources.items())
+            self._resources.clear()
+        for (kind, _), resource in resources:
+            self._close(kind, resource)
+
+    def stats(self) -> List[Dict]:
+        """Per-resource bookkeeping for display and export"""
+        with self._lock:
+            return [
+                {
+                    'kind': kind,
+                    'key': str(key) if key is not None else None,
+                    'type': type(resource.value).__name__,
+                    'uses': resource.uses,
+                    'age_s': time.time() - resource.created_at,
+                    'idle_s': time.time() - resource.last_used
+                }
+                for (kind, key), resource in self._resources.items()
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._resources)
+
+    def _builder(self, kind, key, factory, close) -> Tuple[Callable[[], Any], Optional[Callable[[Any], None]]]:
+        if factory is not None:
+            return factory, close
+        with self._lock:
+            registered = self._factories.get(kind)
+        if registered is None:
+            raise KeyError(f"No factory registered for resource kind {kind!r}")
+        registered_factory, registered_close = registered
+        if key is None:
+            return registered_factory, close or registered_close
+        return (lambda: registered_factory(key)), close or registered_close
+
+    def _touch(self, resource: Resource) -> Any:
+        resource.uses += 1
+        resource.last_used = time.time()
+        self.hits += 1
+        return resource.value
+
+    @staticmethod
+    def _close(kind: str, resource: Resource):
+        try:
+            if resource.close is not None:
+                resource.close(resource.value)
+            elif hasattr(resource.value, 'close'):
+                resource.value.close()
+        except Exception as e:
+            print(f"Error closing {kind} resource: {e}")
+
+
+def _build_intelligence():
+    # Importing the module loads the learning data files, so defer it to first use
+    from conversation_intelligence import conversation_intelligence
+    return conversation_intelligence
+
+
+def _close_intelligence(intelligence):
+    # Learning data is otherwise only saved periodically
+    intelligence.save_all()
+
+
+def _build_retriever():
+    from wikipedia_tools import wikipedia_retriever
+    return wikipedia_retriever
+
+
+def _build_memory():
+    # NumPy and the memory-mapped index load on the first turn, not at import
+    from liora.memory import memory_from_env
+    return memory_from_env()
+
+
+def register_default_resources(cache: ResourceCache):
+    """Builders for the resources every Liora process needs"""
+    cache.register(INTELLIGENCE, _build_intelligence, close=_close_intelligence)
+    cache.register(RETRIEVER, _build_retriever)
+    cache.register(MEMORY, _build_memory)
+
+
+# Global instance
+resource_cache = ResourceCache()
+register_default_resources(resource_cache)
@@ -0,0 +1,464 @@
+"""Standalone asyncio HTTP server for Liora.
+
+    python -m liora.server [--host 127.0.0.1] [--port 8765] [--workers 32] [--stub]
+
+Endpoints:
+    POST /chat                 {"message", "session_id"?, "conversation_id"?, "mode"?, "model"?, "profile"?}
+                               streams the reply as Server-Sent Events; "profile": true saves
+                               a cProfile capture of the turn (see liora.profiling)
+    GET  /conversations        ?limit=N&offset=M, newest first; ?q=... searches titles
+    GET  /conversations/<id>   one conversation with a window of its messages
+                               (?offset=&limit=, default the newest 50)
+    GET  /search               ?q=...&limit=N, ranked full-text search over messages
+    POST /feedback             {"rating": "good" | "okay" | "bad"}
+    GET  /metrics              Prometheus text format; ?format=json for a JSON snapshot
+    GET  /health
+
+One engine, model router, cache set and conversation store are shared by
+every connection. Generation runs on a bounded thread pool and is relayed to
+the event loop chunk by chunk, so a slow provider only ties up a worker
+thread, never the loop. With --stub every provider is a local stand-in from
+liora.stubs, which makes the server load-testable on one box.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from liora.engine import LioraEngine, get_engine
+from liora.models import MODELS
+from liora.personalities import PERSONALITY_MODES
+from liora.session import LioraSession
+from liora.storage import ConversationStore
+from liora.stubs import add_stub_arguments, engine_from_args
+from providers import ProviderError
+from telemetry import telemetry
+from title_generator import title_generator
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_SESSIONS = 10000
+MESSAGE_PAGE_SIZE = 50
+FEEDBACK_RATINGS = ('good', 'okay', 'bad')
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error"
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get('connection', '').lower() != 'close'
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        try:
+            payload = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Body must be valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return payload
+
+
+def to_json(value) -> str:
+    """JSON encoding that understands the datetimes stored on conversations"""
+    return json.dumps(value, default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o))
+
+
+def conversation_summary(conversation: Dict) -> Dict:
+    return {
+        "id": conversation["id"],
+        "title": conversation["title"],
+        "message_count": len(conversation["messages"]),
+        "created_at": conversation["created_at"],
+        "last_updated": conversation["last_updated"]
+    }
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Parse one HTTP/1.1 request, or return None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "Request headers too large")
+
+    lines = head.decode('latin-1').split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return Request(method.upper(), url.path.rstrip('/') or '/', query, headers, body)
+
+
+class LioraServer:
+    """HTTP front end that shares one engine and store across all connections"""
+
+    def __init__(self, engine: Optional[LioraEngine] = None, store: Optional[ConversationStore] = None,
+                 workers: int = 32):
+        self.engine = engine or get_engine()
+        # An empty store is falsy, so compare with None
+        self.store = store if store is not None else ConversationStore(self.engine.config.conversations_file)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="liora-turn")
+        self.sessions: "OrderedDict[str, LioraSession]" = OrderedDict()
+        # Conversation id -> (lock, requests holding or waiting for it); dropped when unused
+        self._conversation_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self.active_streams = 0
+
+    # Connection handling
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    await self.send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                keep_alive = await self.dispatch(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """Route a request; returns whether the connection can be reused"""
+        try:
+            if request.path == '/chat':
+                self.require_method(request, 'POST')
+                await self.handle_chat(request, writer)
+                return False
+            if request.path == '/conversations':
+                self.require_method(request, 'GET')
+                payload = self.list_conversations(request)
+            elif request.path.startswith('/conversations/'):
+                self.require_method(request, 'GET')
+                payload = self.get_conversation(request.path[len('/conversations/'):], request)
+            elif request.path == '/search':
+                self.require_method(request, 'GET')
+                payload = self.search_messages(request)
+            elif request.path == '/feedback':
+                self.require_method(request, 'POST')
+                payload = self.handle_feedback(request)
+            elif request.path == '/metrics':
+                self.require_method(request, 'GET')
+                if request.query.get('format') != 'json':
+                    await self.send_body(writer, 200, telemetry.prometheus_text().encode('utf-8'),
+                                         PROMETHEUS_CONTENT_TYPE, request.keep_alive)
+                    return request.keep_alive
+                payload = dict(telemetry.snapshot(), models=self.engine.router.snapshot())
+            elif request.path == '/health':
+                payload = {"status": "ok", "active_streams": self.active_streams, "sessions": len(self.sessions)}
+            else:
+                raise HTTPError(404, f"No route for {request.path}")
+        except HTTPError as e:
+            await self.send_json(writer, e.status, {"error": e.message}, request.keep_alive)
+            return request.keep_alive
+        except Exception as e:
+            print(f"Error handling {request.method} {request.path}: {e}")
+            await self.send_json(writer, 500, {"error": "Internal server error"}, keep_alive=False)
+            return False
+
+        await self.send_json(writer, 200, payload, request.keep_alive)
+        return request.keep_alive
+
+    @staticmethod
+    def require_method(request: Request, method: str):
+        if request.method != method:
+            raise HTTPError(405, f"{request.path} only accepts {method}")
+
+    # Endpoints
+
+    def list_conversations(self, request: Request) -> Dict:
+        try:
+            limit = max(0, int(request.query.get('limit', 50)))
+            offset = max(0, int(request.query.get('offset', 0)))
+        except ValueError:
+            raise HTTPError(400, "limit and offset must be integers")
+        self.apply_titles()
+
+        query = request.query.get('q', '').strip()
+        if query:
+            conversations = self.store.search_titles(query, limit)
+        else:
+            conversations = self.store.list_recent(limit, offset)
+        return {
+            "conversations": [conversation_summary(c) for c in conversations],
+            "total": len(self.store)
+        }
+
+    def get_conversation(self, conversation_id: str, request: Request) -> Dict:
+        try:
+            offset = int(request.query.get('offset', -MESSAGE_PAGE_SIZE))
+            limit = max(0, int(request.query.get('limit', MESSAGE_PAGE_SIZE)))
+        except ValueError:
+            raise HTTPError(400, "limit and offset must be integers")
+        self.apply_titles()
+        conversation = self.store.get(conversation_id)
+        if conversation is None:
+            raise HTTPError(404, f"Unknown conversation {conversation_id}")
+
+        total = self.store.message_count(conversation_id)
+        start = max(0, total + offset) if offset < 0 else offset
+        return dict(conversation_summary(conversation), offset=start,
+                    messages=self.store.get_messages(conversation_id, start, limit))
+
+    def search_messages(self, request: Request) -> Dict:
+        query = request.query.get('q', '').strip()
+        if not query:
+            raise HTTPError(400, "q is required")
+        try:
+            limit = max(0, int(request.query.get('limit', 20)))
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        return {"query": query, "hits": self.store.search_messages(query, limit)}
+
+    def handle_feedback(self, request: Request) -> Dict:
+        rating = request.json().get('rating')
+        if rating not in FEEDBACK_RATINGS:
+            raise HTTPError(400, f"rating must be one of {', '.join(FEEDBACK_RATINGS)}")
+        self.engine.record_feedback(rating)
+        return {"status": "ok"}
+
+    async def handle_chat(self, request: Request, writer: asyncio.StreamWriter):
+        body = request.json()
+        message = body.get('message')
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "message is required")
+
+        session = self.resolve_session(body)
+        if session.conversation_id is None:
+            session.conversation_id = self.store.create()["id"]
+
+        # Turns in one conversation run in order; different conversations run in parallel
+        async with self.conversation_lock(session.conversation_id):
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            await self.send_event(writer, 'session', {
+                "session_id": session.session_id,
+                "conversation_id": session.conversation_id,
+                "mode": session.liora_mode,
+                "model": session.model_name
+            })
+
+            self.active_streams += 1
+            try:
+                await self.stream_turn(session, message, writer, profile=body.get('profile') is True)
+            finally:
+                self.active_streams -= 1
+
+    async def stream_turn(self, session: LioraSession, message: str, writer: asyncio.StreamWriter,
+                          profile: bool = False):
+        """Run a turn on the worker pool and relay its chunks to the client as SSE"""
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        request_id = uuid.uuid4().hex[:16]
+
+        def produce():
+            turn = self.engine.run_turn(session, self.store, message, request_id=request_id, profile=profile)
+            try:
+                for text in turn:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(events.put_nowait, ('token', text))
+                else:
+                    loop.call_soon_threadsafe(events.put_nowait, ('done', None))
+            except Exception as e:
+                loop.call_soon_threadsafe(events.put_nowait, ('error', e))
+            finally:
+                turn.close()
+
+        loop.run_in_executor(self.executor, produce)
+
+        try:
+            while True:
+                kind, payload = await events.get()
+                if kind == 'token':
+                    await self.send_event(writer, 'token', {"text": payload})
+                elif kind == 'done':
+                    conversation = self.store.get(session.conversation_id)
+                    await self.send_event(writer, 'done', {
+                        "conversation_id": session.conversation_id,
+                        "title": conversation["title"] if conversation else None,
+                        "request_id": request_id
+                    })
+                    return
+                else:
+                    await self.send_event(writer, 'error', self.error_payload(payload))
+                    return
+        except ConnectionError:
+            # Client went away; stop generating and leave the partial reply unsaved
+            cancelled.set()
+
+    # Helpers
+
+    @asynccontextmanager
+    async def conversation_lock(self, conversation_id: str):
+        """Hold the per-conversation lock, removing it once nobody holds or waits for it"""
+        lock, users = self._conversation_locks.get(conversation_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._conversation_locks[conversation_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._conversation_locks[conversation_id]
+            if users == 1:
+                del self._conversation_locks[conversation_id]
+            else:
+                self._conversation_locks[conversation_id] = (lock, users - 1)
+
+    def resolve_session(self, body: Dict) -> LioraSession:
+        """Find or create the session for a chat request and apply its settings"""
+        mode = body.get('mode')
+        model = body.get('model')
+        if mode is not None and mode not in PERSONALITY_MODES:
+            raise HTTPError(400, f"Unknown mode {mode!r}")
+        if model is not None and model not in MODELS:
+            raise HTTPError(400, f"Unknown model {model!r}")
+
+        conversation_id = body.get('conversation_id')
+        if conversation_id is not None and conversation_id not in self.store:
+            raise HTTPError(404, f"Unknown conversation {conversation_id}")
+
+        session_id = body.get('session_id')
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None:
+            session = LioraSession(session_id=session_id)
+            self.sessions[session.session_id] = session
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        self.sessions.move_to_end(session.session_id)
+
+        if mode is not None:
+            session.liora_mode = mode
+        if model is not None:
+            session.model_name = model
+        if conversation_id is not None:
+            session.conversation_id = conversation_id
+        return session
+
+    def apply_titles(self):
+        """Pick up titles finished by the background worker"""
+        if self.store.apply_ready_titles(title_generator):
+            self.store.save()
+
+    @staticmethod
+    def error_payload(error: Exception) -> Dict:
+        if isinstance(error, ProviderError):
+            return {"error": str(error), "provider": error.provider, "retryable": error.retryable}
+        return {"error": f"Sorry, I encountered an error: {error}", "provider": None, "retryable": False}
+
+    @staticmethod
+    async def send_event(writer: asyncio.StreamWriter, event: str, data: Dict):
+        writer.write(f"event: {event}\ndata: {to_json(data)}\n\n".encode('utf-8'))
+        await writer.drain()
+
+    @classmethod
+    async def send_json(cls, writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool = True):
+        await cls.send_body(writer, status, to_json(payload).encode('utf-8'), "application/json", keep_alive)
+
+    @staticmethod
+    async def send_body(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                        keep_alive: bool = True):
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    # Lifecycle
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Liora server listening on {addresses}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False)
+            self.store.save()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve Liora over HTTP with SSE streaming")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent turns being generated")
+    parser.add_argument("--conversations-file", help="Override the conversation store path")
+    add_stub_arguments(parser)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    server = LioraServer(engine_from_args(args), workers=args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import uuid
+from typing import Optional
+
+from liora.models import DEFAULT_MODEL
+from liora.personalities import DEFAULT_MODE
+
+
+class LioraSession:
+    """Per-user chat state that used to live in st.session_state"""
+
+    def __init__(self, liora_mode: str = DEFAULT_MODE, model_name: str = DEFAULT_MODEL,
+                 conversation_id: Optional[str] = None, session_id: Optional[str] = None):
+        self.session_id = session_id or str(uuid.uuid4())
+        self.liora_mode = liora_mode
+        self.model_name = model_name
+        self.conversation_id = conversation_id
+
+    def __repr__(self):
+        return (f"LioraSession(mode={self.liora_mode!r}, model={self.model_name!r}, "
+                f"conversation={self.conversation_id!r})")
@@ -0,0 +1,227 @@
+import os
+import pickle
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from liora.conversation_index import ConversationIndex
+from liora.message_index import create_message_index
+from liora.summarizer import summary_record
+
+
+class ConversationStore:
+    """Conversations persisted to a pickle file
+
+    Conversations are plain dicts with id, title, messages, created_at and
+    last_updated, exactly as the Streamlit app has always stored them, plus
+    an optional rolling summary (see liora.summarizer). Every
+    mutation holds the store lock so one store can be shared across threads.
+
+    Indexes subscribe to the store and are told about every change: rebuild()
+    after a load, upsert() when a conversation is created, retitled or
+    touched, remove() on delete, and add_message() (if they define it) for
+    each appended message.
+    """
+
+    def __init__(self, path: str = "conversations.pkl", autoload: bool = True, full_text: bool = True):
+        self.path = path
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.conversations: Dict[str, Dict] = self.load() if autoload else {}
+        self.index = ConversationIndex()
+        self.subscribe(self.index)
+        self.message_index = create_message_index() if full_text else None
+        if self.message_index is not None:
+            self.subscribe(self.message_index)
+
+    def subscribe(self, listener):
+        """Keep an index in sync with this store, starting from its current contents"""
+        with self.lock:
+            listener.rebuild(self.conversations)
+            self.listeners.append(listener)
+
+    def load(self) -> Dict[str, Dict]:
+        """Load existing conversations from file"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    return pickle.load(f)
+        except Exception as e:
+            print(f"Error loading conversations: {e}")
+        return {}
+
+    def save(self) -> bool:
+        """Save conversations to file"""
+        try:
+            with self.lock, open(self.path, 'wb') as f:
+                pickle.dump(self.conversations, f)
+            return True
+        except Exception as e:
+            print(f"Error saving conversations: {e}")
+            return False
+
+    def create(self, title: Optional[str] = None) -> Dict:
+        conversation_id = str(uuid.uuid4())
+        new_conversation = {
+            "id": conversation_id,
+            "title": title or f"New Chat {datetime.now().strftime('%H:%M')}",
+            "messages": [],
+            "created_at": datetime.now(),
+            "last_updated": datetime.now()
+        }
+        with self.lock:
+            self.conversations[conversation_id] = new_conversation
+            self._notify_upsert(new_conversation)
+        return new_conversation
+
+    def insert(self, conversation: Dict) -> Dict:
+        """Add a fully formed conversation (for example from an archive) as-is"""
+        with self.lock:
+            self.conversations[conversation["id"]] = conversation
+            self._notify_upsert(conversation)
+            for position, message in enumerate(conversation["messages"]):
+                self._notify_message(conversation, position, message)
+        return conversation
+
+    def restore_message(self, conversation_id: str, message: Dict):
+        """Append a stored message without touching its timestamp or last_updated"""
+        with self.lock:
+            conversation = self.conversations[conversation_id]
+            conversation["messages"].append(message)
+            self._notify_message(conversation, len(conversation["messages"]) - 1, message)
+
+    def get(self, conversation_id: Optional[str]) -> Optional[Dict]:
+        if conversation_id is None:
+            return None
+        return self.conversations.get(conversation_id)
+
+    def message_count(self, conversation_id: Optional[str]) -> int:
+        conversation = self.get(conversation_id)
+        return len(conversation["messages"]) if conversation else 0
+
+    def get_messages(self, conversation_id: Optional[str], offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """A window of a conversation's messages, oldest first
+
+        Negative offsets count back from the newest message, so offset=-20
+        returns the last 20.
+        """
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            return []
+        with self.lock:
+            messages = conversation["messages"]
+            start = max(0, len(messages) + offset) if offset < 0 else offset
+            end = len(messages) if limit is None else start + limit
+            return messages[start:end]
+
+    def delete(self, conversation_id: str) -> bool:
+        with self.lock:
+            if self.conversations.pop(conversation_id, None) is None:
+                return False
+            for listener in self.listeners:
+                listener.remove(conversation_id)
+            return True
+
+    def append_message(self, conversation_id: str, role: str, content: str) -> Dict:
+        message = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().strftime("%H:%M")
+        }
+        with self.lock:
+            conversation = self.conversations[conversation_id]
+            conversation["messages"].append(message)
+            conversation["last_updated"] = datetime.now()
+            self._notify_upsert(conversation)
+            self._notify_message(conversation, len(conversation["messages"]) - 1, message)
+        return message
+
+    def set_title(self, conversation_id: str, title: str):
+        with self.lock:
+            if conversation_id in self.conversations:
+                self.conversations[conversation_id]["title"] = title
+                self._notify_upsert(self.conversations[conversation_id])
+
+    def set_summary(self, conversation_id: str, text: str, upto: int) -> bool:
+        """Store a rolling summary covering messages[:upto]; older results never overwrite newer ones"""
+        with self.lock:
+            conversation = self.conversations.get(conversation_id)
+            if conversation is None:
+                return False
+            current = conversation.get("summary")
+            if current and current["upto"] >= upto:
+                return False
+            conversation["summary"] = summary_record(text, upto)
+            return True
+
+    def apply_ready_titles(self, generator) -> List[str]:
+        """Copy titles finished by a background TitleGenerator onto their conversations"""
+        with self.lock:
+            updated = generator.apply_ready_titles(self.conversations)
+            for conversation_id in updated:
+                self._notify_upsert(self.conversations[conversation_id])
+        return updated
+
+    def list_recent(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Conversations sorted by last update, newest first, read from the index"""
+        ids = self.index.page(offset, limit if limit is not None else len(self.index))
+        return self._resolve(ids)
+
+    def search_titles(self, query: str, limit: int = 20) -> List[Dict]:
+        """Conversations whose title matches a partially typed query, newest first"""
+        return self._resolve(self.index.search(query, limit))
+
+    def search_messages(self, query: str, limit: int = 20, markers=("[", "]")) -> List[Dict]:
+        """Ranked full-text matches across every message, with highlighted snippets"""
+        if self.message_index is None:
+            return []
+        results = []
+        for hit in self.message_index.search(query, limit, markers):
+            conversation = self.conversations.get(hit.conversation_id)
+            if conversation is None:
+                continue
+            results.append(dict(hit._asdict(), title=conversation["title"]))
+        return results
+
+    def search_conversations(self, query: str, limit: int = 20, markers=("[", "]")) -> List[Tuple[Dict, Optional[str]]]:
+        """Conversations matching a query by title or content, each with its best snippet
+
+        Title matches come first (newest first), then conversations whose
+        messages match, in rank order.
+        """
+        results = [(conversation, None) for conversation in self.search_titles(query, limit)]
+        seen = {conversation["id"] for conversation, _ in results}
+        if len(results) < limit:
+            # Several hits can come from one conversation, so over-fetch a little
+            for hit in self.search_messages(query, limit * 3, markers):
+                if hit["conversation_id"] in seen:
+                    continue
+                seen.add(hit["conversation_id"])
+                results.append((self.conversations[hit["conversation_id"]], hit["snippet"]))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _resolve(self, ids: List[str]) -> List[Dict]:
+        conversations = []
+        for conversation_id in ids:
+            conversation = self.conversations.get(conversation_id)
+            if conversation is not None:
+                conversations.append(conversation)
+        return conversations
+
+    def _notify_upsert(self, conversation: Dict):
+        for listener in self.listeners:
+            listener.upsert(conversation)
+
+    def _notify_message(self, conversation: Dict, position: int, message: Dict):
+        for listener in self.listeners:
+            if hasattr(listener, 'add_message'):
+                listener.add_message(conversation, position, message)
+
+    def __contains__(self, conversation_id) -> bool:
+        return conversation_id in self.conversations
+
+    def __len__(self) -> int:
+        return len(self.conversations)
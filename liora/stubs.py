@@ -0,0 +1,270 @@
+"""Local stand-ins for every external dependency of the Liora pipeline.
+
+The stubs behave like the real clients (same methods, same response objects,
+same typed errors) but never touch the network, so the server, CLI and
+benchmarks can be driven end to end on one box with predictable latency.
+"""
+import argparse
+import atexit
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from liora.config import LioraConfig
+from providers import LLMResponse, ProviderUnavailableError, TextResponse
+from rate_limiter import rate_limiters
+
+STUB_API_KEY = "stub"
+
+STUB_REPLY = (
+    "Oh, you want my take on that? Buckle up, because I have thoughts and absolutely "
+    "no filter. Honestly it depends on who you ask, but I am the one being asked, "
+    "so the answer is obviously yes, with a side of dramatic flair. What made you think of it?"
+)
+
+STUB_TOPICS = ["Octopus intelligence", "Roman concrete", "Tardigrades", "The Voyager Golden Record"]
+
+
+class StubLatency:
+    """Timing and failure profile shared by the stub clients"""
+
+    def __init__(self, first_token_latency: float = 0.3, tokens_per_second: float = 50.0,
+                 error_rate: float = 0.0, search_latency: float = 0.2, wikipedia_latency: float = 0.1,
+                 seed: Optional[int] = None):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.search_latency = search_latency
+        self.wikipedia_latency = wikipedia_latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+
+class StubModel:
+    """Stands in for a Gemini/OpenRouter model: streams a canned reply word by word"""
+
+    def __init__(self, model_name: str, latency: Optional[StubLatency] = None, reply: str = STUB_REPLY):
+        self.model_name = model_name
+        self.latency = latency or StubLatency()
+        self.reply = reply
+
+    def complete(self, prompt, **kwargs) -> str:
+        self._maybe_fail()
+        reply = self._reply_for(prompt)
+        time.sleep(self.latency.first_token_latency + len(reply.split()) * self.latency.token_delay())
+        return reply
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            self._maybe_fail()
+            return self._stream()
+        return TextResponse(self.complete(prompt))
+
+    def _stream(self):
+        time.sleep(self.latency.first_token_latency)
+        words = self.reply.split()
+        delay = self.latency.token_delay()
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(delay)
+            yield TextResponse(word + (' ' if i < len(words) - 1 else ''))
+
+    def _reply_for(self, prompt: str) -> str:
+        # Title requests get title-shaped answers so background titling behaves normally
+        stripped = str(prompt).rstrip()
+        if stripped.endswith("Titles:"):
+            count = len(re.findall(r"^\d+\. ", stripped, re.MULTILINE))
+            return "\n".join(f"{i}. Stub Chat {i}" for i in range(1, count + 1))
+        if stripped.endswith("Title:"):
+            return "Stub Chat"
+        if stripped.endswith("Summary:"):
+            return "The user has been chatting with Liora about assorted topics."
+        return self.reply
+
+    def _maybe_fail(self):
+        if self.latency.should_fail():
+            raise ProviderUnavailableError(f"Injected failure from {self.model_name}", "stub", 503)
+
+
+class StubLLM:
+    """Stands in for the LangChain-style client used for one-shot search answers"""
+
+    def __init__(self, model: StubModel):
+        self.model = model
+
+    def invoke(self, prompt):
+        return LLMResponse(self.model.complete(prompt))
+
+
+class StubSearchTool:
+    """Stands in for TavilySearch"""
+
+    def __init__(self, latency: Optional[StubLatency] = None):
+        self.latency = latency or StubLatency()
+        self.calls = 0
+
+    def invoke(self, query):
+        self.calls += 1
+        time.sleep(self.latency.search_latency)
+        return {
+            "query": query,
+            "results": [
+                {"title": f"Result {i} for {query}", "url": f"https://example.com/{i}",
+                 "content": f"Local stand-in search result {i} about {query}."}
+                for i in range(1, 4)
+            ]
+        }
+
+
+class StubRetriever:
+    """Stands in for WikipediaRetriever"""
+
+    def __init__(self, latency: Optional[StubLatency] = None):
+        self.latency = latency or StubLatency()
+
+    def search_wikipedia(self, query: str, max_results: int = 3) -> List[Dict]:
+        time.sleep(self.latency.wikipedia_latency)
+        return [{
+            'title': query.title(),
+            'summary': f"{query.title()} is a topic Liora finds endlessly interesting.",
+            'url': f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}",
+            'categories': []
+        }][:max_results]
+
+    def get_random_interesting_topic(self) -> Optional[Dict]:
+        return self.search_wikipedia(random.choice(STUB_TOPICS), max_results=1)[0]
+
+    def get_related_topics(self, current_topic: str) -> List[str]:
+        return STUB_TOPICS[:3]
+
+    def format_wikipedia_info(self, articles: List[Dict], context: str = "") -> str:
+        lines = [f"Here's some interesting information {context}:"] if context else []
+        for article in articles:
+            lines.append(f"**{article['title']}**: {article['summary']}")
+        return "\n\n".join(lines)
+
+
+def stub_config(conversations_file: str = "stub_conversations.pkl") -> LioraConfig:
+    """Config with placeholder keys so nothing asks for real credentials"""
+    return LioraConfig(gemini_api_key=STUB_API_KEY, tavily_api_key=STUB_API_KEY, openrouter_api_key=STUB_API_KEY,
+                       conversations_file=conversations_file)
+
+
+def scratch_state(prefix: str = "liora_stub_"):
+    """Fresh learning state and long-term memory in a temporary directory, removed at exit
+
+    Keeps stub and replay runs from loading or overwriting the learning files
+    and memory index of a real install in the working directory.
+    """
+    from conversation_intelligence import ConversationIntelligence
+    from liora.learning_queue import learning_queue
+    from liora.memory import LongTermMemory
+
+    directory = tempfile.mkdtemp(prefix=prefix)
+    intelligence = ConversationIntelligence(directory)
+    memory = LongTermMemory(os.path.join(directory, "memory")) if os.getenv("LIORA_MEMORY", "1") != "0" else None
+
+    def cleanup():
+        # Runs before the learning queue's own exit hook, so close it here; closing twice is a no-op
+        learning_queue.close()
+        if memory is not None:
+            memory.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    atexit.register(cleanup)
+    return intelligence, memory
+
+
+def build_stub_engine(latency: Optional[StubLatency] = None, conversations_file: str = "stub_conversations.pkl",
+                      intelligence=None, memory=None):
+    """LioraEngine wired entirely to local stand-ins
+
+    Without an intelligence or memory, the engine gets scratch ones (see scratch_state).
+    """
+    from liora.engine import LioraEngine
+
+    latency = latency or StubLatency()
+    if intelligence is None or memory is None:
+        scratch_intelligence, scratch_memory = scratch_state()
+        intelligence = intelligence if intelligence is not None else scratch_intelligence
+        memory = memory if memory is not None else scratch_memory
+    # The stand-in search has no quota to protect, so only StubLatency shapes its timing.
+    # Only the stub key's bucket is replaced; real keys keep their limits
+    rate_limiters.configure('tavily', 1e6, 1000000, STUB_API_KEY)
+
+    def model_factory(model_name):
+        model = StubModel(model_name, latency)
+        return model, StubLLM(model)
+
+    return LioraEngine(
+        config=stub_config(conversations_file),
+        intelligence=intelligence,
+        memory=memory,
+        retriever=StubRetriever(latency),
+        search_tool=StubSearchTool(latency),
+        model_factory=model_factory
+    )
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """Command line switches shared by every entry point that can run on stand-ins"""
+    stub = parser.add_argument_group("local stand-ins")
+    stub.add_argument("--stub", action="store_true", help="Use local stand-ins for every provider")
+    stub.add_argument("--stub-first-token", type=float, default=0.3, help="Seconds before the first token")
+    stub.add_argument("--stub-tokens-per-second", type=float, default=50.0)
+    stub.add_argument("--stub-error-rate", type=float, default=0.0, help="Fraction of model calls that fail")
+    stub.add_argument("--stub-search-latency", type=float, default=0.2)
+    stub.add_argument("--stub-seed", type=int)
+    cassette = parser.add_argument_group("record/replay (see liora.cassettes)")
+    cassette.add_argument("--record", metavar="CASSETTE", help="Use real providers and record every call")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Answer every provider call from a recording")
+    cassette.add_argument("--replay-speed", type=float, default=1.0,
+                          help="1 replays at recorded speed, 10 ten times faster, 0 without delays")
+    cassette.add_argument("--replay-strict", action="store_true",
+                          help="Fail on requests with no exact recording instead of replaying in order")
+
+
+def engine_from_args(args):
+    """Real engine, one wired to the stand-ins with --stub, or to a cassette with --record/--replay"""
+    from liora.engine import LioraEngine, get_engine
+
+    conversations_file = getattr(args, "conversations_file", None)
+    if getattr(args, "replay", None):
+        from liora.cassettes import MATCH_EXACT, MATCH_SEQUENCE, Cassette, build_replay_engine
+
+        cassette = Cassette(args.replay, MATCH_EXACT if args.replay_strict else MATCH_SEQUENCE).load()
+        return build_replay_engine(cassette, args.replay_speed, conversations_file or "replay_conversations.pkl")
+    if args.stub:
+        latency = StubLatency(
+            first_token_latency=args.stub_first_token,
+            tokens_per_second=args.stub_tokens_per_second,
+            error_rate=args.stub_error_rate,
+            search_latency=args.stub_search_latency,
+            seed=args.stub_seed
+        )
+        return build_stub_engine(latency, conversations_file or "stub_conversations.pkl")
+
+    # The process-wide engine's config is shared; a different store gets an engine of its own
+    config = LioraConfig.from_env()
+    if conversations_file:
+        config.conversations_file = conversations_file
+    missing_keys = config.missing_keys()
+    if missing_keys:
+        raise SystemExit(f"Missing environment variables: {', '.join(missing_keys)} (or run with --stub)")
+    if getattr(args, "record", None):
+        from liora.cassettes import Cassette, build_recording_engine
+
+        return build_recording_engine(Cassette(args.record).open_for_recording(), config)
+    return LioraEngine(config) if conversations_file else get_engine()
@@ -0,0 +1,154 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from telemetry import telemetry
+
+RECENT_MESSAGES = 6
+SUMMARY_MAX_CHARS = 1200
+SENTENCE_PATTERN = re.compile(r"(.+?[.!?])(\s|$)", re.DOTALL)
+
+
+class ConversationSummarizer:
+    """Rolling per-conversation summaries, updated off the response path
+
+    Each conversation carries a summary dict (text, upto, updated_at): text
+    covers messages[:upto]. Prompts use the summary plus the messages after
+    it, so history stays bounded however long the chat gets. After every
+    turn, messages that have slid out of the recent window are folded into
+    the summary by one background LLM call; if that fails, a short
+    extractive summary is used instead so the window still advances.
+    """
+
+    def __init__(self, recent_messages: int = RECENT_MESSAGES, batch_messages: int = 2,
+                 max_chars: int = SUMMARY_MAX_CHARS, max_workers: int = 1):
+        self.recent_messages = recent_messages
+        self.batch_messages = batch_messages
+        self.max_chars = max_chars
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="liora-summaries")
+        self._lock = threading.Lock()
+        self._pending_ids = set()
+
+    # Prompt context
+
+    def context(self, conversation: Dict) -> Tuple[str, List[Dict]]:
+        """(summary text, messages to include verbatim) for a conversation's prompt"""
+        messages = conversation["messages"]
+        summary = conversation.get("summary")
+        if not summary:
+            return "", messages[-self.recent_messages:]
+        # Every message after the summary is covered, even when the background update lags:
+        # the recent window verbatim, older unsummarized ones verbatim while they fit in
+        # max_chars, and whatever is left as a short extractive note after the summary
+        pending = messages[summary["upto"]:]
+        start = max(0, len(pending) - self.recent_messages - self.batch_messages)
+        budget = self.max_chars
+        while start > 0 and len(pending[start - 1]["content"]) <= budget:
+            start -= 1
+            budget -= len(pending[start]["content"])
+        text = summary["text"]
+        if start > 0:
+            text = f"{text} {self.extractive_summary('', pending[:start])}".strip()
+        return text, pending[start:]
+
+    def unsummarized(self, conversation: Dict) -> List[Dict]:
+        """Messages that have left the recent window but are not in the summary yet"""
+        messages = conversation["messages"]
+        summary = conversation.get("summary")
+        upto = summary["upto"] if summary else 0
+        return messages[upto:max(upto, len(messages) - self.recent_messages)]
+
+    # Background updates
+
+    def request_update(self, store, conversation_id: str, model) -> bool:
+        """Fold messages that left the recent window into the summary, in the background"""
+        conversation = store.get(conversation_id)
+        if conversation is None or len(self.unsummarized(conversation)) < self.batch_messages:
+            return False
+        with self._lock:
+            if conversation_id in self._pending_ids:
+                return False
+            self._pending_ids.add(conversation_id)
+
+        self._executor.submit(self._update, store, conversation_id, model)
+        return True
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._pending_ids)
+
+    def summarize(self, previous: str, messages: List[Dict], model) -> str:
+        """Updated summary text with one blocking LLM call"""
+        transcript = "\n".join(
+            f"{'User' if message['role'] == 'user' else 'Liora'}: {message['content'][:800]}" for message in messages
+        )
+        summary_prompt = f"""You maintain a running summary of a chat between a user and Liora, an AI assistant.
+
+Current summary:
+{previous or '(none yet)'}
+
+New messages:
+{transcript}
+
+Rewrite the summary so it also covers the new messages. Keep facts about the user, their
+preferences, open questions and decisions; drop small talk. Use at most {self.max_chars // 6} words,
+plain prose, no preamble.
+
+Summary:"""
+        response = model.generate_content(summary_prompt)
+        text = response.text.strip()
+        if not text:
+            raise ValueError("empty summary")
+        return self.clip(text)
+
+    def extractive_summary(self, previous: str, messages: List[Dict]) -> str:
+        """Fallback summary: the first sentence of each new message appended to the old one"""
+        lines = []
+        for message in messages:
+            match = SENTENCE_PATTERN.match(message["content"].strip())
+            sentence = (match.group(1) if match else message["content"].strip())[:160]
+            lines.append(f"{'User' if message['role'] == 'user' else 'Liora'}: {sentence}")
+        return self.clip(" ".join(filter(None, [previous] + lines)), keep_end=True)
+
+    def clip(self, text: str, keep_end: bool = False) -> str:
+        if len(text) <= self.max_chars:
+            return text
+        # Extractive summaries grow at the end, so the oldest part goes first
+        return "…" + text[-self.max_chars + 1:] if keep_end else text[:self.max_chars - 1] + "…"
+
+    def _update(self, store, conversation_id: str, model):
+        try:
+            with telemetry.span('summarize'):
+                with store.lock:
+                    conversation = store.get(conversation_id)
+                    if conversation is None:
+                        return
+                    summary = conversation.get("summary") or {}
+                    previous = summary.get("text", "")
+                    start = summary.get("upto", 0)
+                    messages = list(self.unsummarized(conversation))
+                if not messages:
+                    return
+
+                try:
+                    if model is None:
+                        raise RuntimeError("no model available")
+                    text = self.summarize(previous, messages, model)
+                except Exception as e:
+                    print(f"Error summarizing conversation: {e}")
+                    text = self.extractive_summary(previous, messages)
+
+                store.set_summary(conversation_id, text, start + len(messages))
+        finally:
+            with self._lock:
+                self._pending_ids.discard(conversation_id)
+
+
+def summary_record(text: str, upto: int) -> Dict:
+    return {"text": text, "upto": upto, "updated_at": datetime.now()}
+
+
+# Global instance
+conversation_summarizer = ConversationSummarizer()
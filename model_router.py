@@ -0,0 +1,363 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from providers import ProviderError, ProviderUnavailableError
+from telemetry import telemetry
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class ModelStats:
+    """Rolling latency and error statistics for a single model"""
+
+    def __init__(self, window: int = 100):
+        self.ttft_samples = deque(maxlen=window)
+        # Non-streaming calls are timed to the full reply, so they are kept apart from TTFT
+        self.invoke_samples = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.total_requests = 0
+        self.total_errors = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+
+    def record_success(self, ttft: Optional[float] = None, invoke_latency: Optional[float] = None):
+        if ttft is not None:
+            self.ttft_samples.append(ttft)
+        if invoke_latency is not None:
+            self.invoke_samples.append(invoke_latency)
+        self.outcomes.append(True)
+        self.total_requests += 1
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        self.total_requests += 1
+        self.total_errors += 1
+
+    @property
+    def p50(self) -> Optional[float]:
+        return percentile(list(self.ttft_samples), 50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return percentile(list(self.ttft_samples), 95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def snapshot(self) -> Dict:
+        return {
+            'p50_ttft': self.p50,
+            'p95_ttft': self.p95,
+            'p50_invoke': percentile(list(self.invoke_samples), 50),
+            'p95_invoke': percentile(list(self.invoke_samples), 95),
+            'error_rate': self.error_rate,
+            'samples': len(self.outcomes),
+            'total_requests': self.total_requests,
+            'total_errors': self.total_errors,
+            'hedges_started': self.hedges_started,
+            'hedges_won': self.hedges_won
+        }
+
+
+class CircuitBreaker:
+    """Takes a provider out of rotation after repeated failures"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, error_rate_threshold: float = 0.5,
+                 min_samples: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def available(self) -> bool:
+        """Check whether a request may be sent to this provider"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        # Half-open lets exactly one probe through to test recovery
+        return self.state == self.HALF_OPEN and not self._probe_in_flight
+
+    def record_attempt(self):
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self, stats: ModelStats):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        too_many_failures = self.consecutive_failures >= self.failure_threshold
+        error_rate_tripped = (len(stats.outcomes) >= self.min_samples
+                              and stats.error_rate >= self.error_rate_threshold)
+        if self.state == self.HALF_OPEN or too_many_failures or error_rate_tripped:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class AllModelsFailedError(ProviderError):
+    """Raised when no model in rotation could serve a request"""
+
+
+class ModelRouter:
+    """Latency-aware routing with hedged requests and failover across MODELS
+
+    The sidebar choice is the preferred model; if it is tripped the request goes
+    to the fastest healthy alternative. When the first model misses its
+    time-to-first-token SLO, a duplicate request is sent to the next model and
+    whichever streams first wins. The loser is told to stop consuming its stream;
+    a request still blocked on the network finishes in the background and is
+    discarded. A winner that goes quiet for chunk_timeout seconds mid-stream is
+    abandoned and counted as a failure.
+    """
+
+    def __init__(self, model_factory: Callable[[str], Tuple[object, object]],
+                 model_names: List[str], latency_slo: float = 3.0, hedging: bool = True,
+                 first_token_timeout: float = 30.0, degraded_factor: float = 2.0, window: int = 100,
+                 chunk_timeout: float = 30.0):
+        self.model_factory = model_factory
+        self.model_names = list(model_names)
+        self.latency_slo = latency_slo
+        self.hedging = hedging
+        self.first_token_timeout = first_token_timeout
+        self.chunk_timeout = chunk_timeout
+        self.degraded_factor = degraded_factor
+        self.stats = {name: ModelStats(window) for name in self.model_names}
+        self.breakers = {name: CircuitBreaker() for name in self.model_names}
+        self._instances: Dict[str, Tuple[object, object]] = {}
+        self._lock = threading.Lock()
+
+    def get_instances(self, model_name: str) -> Tuple[object, object]:
+        """Get (model, llm) for a backend, building it on first use"""
+        with self._lock:
+            if model_name in self._instances:
+                return self._instances[model_name]
+        model, llm = self.model_factory(model_name)
+        if model is None:
+            raise RuntimeError(f"Failed to initialize {model_name}")
+        with self._lock:
+            self._instances[model_name] = (model, llm)
+        return model, llm
+
+    def set_instances(self, model_name: str, model, llm):
+        """Register already-built instances for a backend"""
+        with self._lock:
+            self._instances[model_name] = (model, llm)
+
+    def is_degraded(self, model_name: str) -> bool:
+        """Check whether a model's tail latency is well outside the SLO"""
+        p95 = self.stats[model_name].p95
+        return p95 is not None and p95 > self.latency_slo * self.degraded_factor
+
+    def candidates(self, preferred: str) -> List[str]:
+        """Models in the order they should be tried for a request"""
+        with self._lock:
+            healthy = [name for name in self.model_names if self.breakers[name].available()]
+
+        def rank(name):
+            p50 = self.stats[name].p50
+            return (self.is_degraded(name), p50 if p50 is not None else self.latency_slo)
+
+        ordered = sorted((name for name in healthy if name != preferred), key=rank)
+        if preferred in healthy:
+            ordered.insert(0, preferred)
+        return ordered
+
+    def stream(self, prompt: str, preferred: str, **generate_kwargs) -> Iterator:
+        """Stream chunks from the best available model, hedging slow first tokens"""
+        candidates = self.candidates(preferred)
+        if not candidates:
+            raise AllModelsFailedError("All models are temporarily out of rotation")
+
+        events = queue.Queue()
+        attempts = {}
+        next_candidate = 0
+        errors = []
+
+        def launch():
+            nonlocal next_candidate
+            while next_candidate < len(candidates):
+                name = candidates[next_candidate]
+                next_candidate += 1
+                try:
+                    model, _ = self.get_instances(name)
+                except Exception as e:
+                    self._record_failure(name)
+                    errors.append(f"{name}: {e}")
+                    continue
+                with self._lock:
+                    self.breakers[name].record_attempt()
+                cancel = threading.Event()
+                attempts[name] = {'cancel': cancel, 'started': time.monotonic()}
+                threading.Thread(
+                    target=self._run_attempt,
+                    args=(name, model, prompt, generate_kwargs, events, cancel),
+                    daemon=True
+                ).start()
+                return name
+            return None
+
+        if launch() is None:
+            raise AllModelsFailedError("; ".join(errors) or "No model could be initialized")
+
+        winner = None
+        first_chunk = None
+        winner_finished = False
+        hedged = False
+        deadline = time.monotonic() + self.first_token_timeout
+
+        while winner is None:
+            live = [name for name in attempts if not attempts[name].get('finished')]
+            if not live:
+                # Everything launched so far failed before its first token: fail over
+                if launch() is None:
+                    raise AllModelsFailedError("; ".join(errors) or "All models failed")
+                continue
+
+            wait = deadline - time.monotonic()
+            if self.hedging and not hedged and len(live) == 1:
+                wait = min(wait, attempts[live[0]]['started'] + self.latency_slo - time.monotonic())
+            try:
+                name, kind, payload = events.get(timeout=max(wait, 0.0))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    for name in live:
+                        attempts[name]['cancel'].set()
+                        self._record_failure(name)
+                    raise AllModelsFailedError("No model produced a first token in time")
+                # SLO missed: send a duplicate request to the next model
+                hedged = True
+                hedge = launch()
+                if hedge is not None:
+                    self.stats[hedge].hedges_started += 1
+                continue
+
+            if kind == 'chunk':
+                winner, first_chunk = name, payload
+            elif kind in ('error', 'done'):
+                attempts[name]['finished'] = True
+                if kind == 'error':
+                    self._record_failure(name)
+                    errors.append(f"{name}: {payload}")
+                else:
+                    # Finished without emitting anything: treat as an empty reply
+                    winner, winner_finished = name, True
+
+        ttft = time.monotonic() - attempts[winner]['started']
+        self._record_success(winner, ttft)
+        telemetry.observe('liora_model_first_token_seconds', ttft, model=winner)
+        telemetry.annotate(served_model=winner, hedged=hedged)
+        if hedged and winner != candidates[0]:
+            self.stats[winner].hedges_won += 1
+        for name, attempt in attempts.items():
+            if name != winner:
+                attempt['cancel'].set()
+
+        if winner_finished:
+            return iter(())
+        return self._relay(winner, first_chunk, events, attempts[winner]['cancel'])
+
+    def invoke(self, prompt: str, preferred: str):
+        """Non-streaming LLM call with failover down the candidate list"""
+        errors = []
+        for name in self.candidates(preferred):
+            with self._lock:
+                self.breakers[name].record_attempt()
+            try:
+                _, llm = self.get_instances(name)
+                # Timed from here so first-use model construction is not counted
+                started = time.monotonic()
+                response = llm.invoke(prompt)
+            except Exception as e:
+                self._record_failure(name)
+                errors.append(f"{name}: {e}")
+                continue
+            elapsed = time.monotonic() - started
+            self._record_success(name, invoke_latency=elapsed)
+            telemetry.observe('liora_model_invoke_seconds', elapsed, model=name)
+            telemetry.annotate(served_model=name)
+            return response
+        raise AllModelsFailedError("; ".join(errors) or "All models are temporarily out of rotation")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-model health for display and metrics"""
+        return {
+            name: dict(self.stats[name].snapshot(), circuit=self.breakers[name].state,
+                       degraded=self.is_degraded(name))
+            for name in self.model_names
+        }
+
+    def _relay(self, winner: str, first_chunk, events: queue.Queue, cancel: threading.Event) -> Iterator:
+        if first_chunk is not None:
+            yield first_chunk
+        deadline = time.monotonic() + self.chunk_timeout
+        while True:
+            try:
+                name, kind, payload = events.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                # Stalled mid-stream: stop waiting on it rather than hold the turn forever
+                cancel.set()
+                self._record_failure(winner)
+                raise ProviderUnavailableError(
+                    f"{winner} sent nothing for {self.chunk_timeout:g}s mid-stream", provider=winner
+                )
+            if name != winner:
+                continue
+            deadline = time.monotonic() + self.chunk_timeout
+            if kind == 'chunk':
+                yield payload
+            elif kind == 'done':
+                return
+            else:
+                # Mid-stream failure: part of the reply is already on screen, so no failover
+                self._record_failure(winner)
+                raise payload
+
+    def _run_attempt(self, name, model, prompt, generate_kwargs, events, cancel):
+        try:
+            response = model.generate_content(prompt, stream=True, **generate_kwargs)
+            for chunk in response:
+                if cancel.is_set():
+                    return
+                events.put((name, 'chunk', chunk))
+            if not cancel.is_set():
+                events.put((name, 'done', None))
+        except Exception as e:
+            if not cancel.is_set():
+                events.put((name, 'error', e))
+
+    def _record_success(self, name: str, ttft: Optional[float] = None, invoke_latency: Optional[float] = None):
+        with self._lock:
+            self.stats[name].record_success(ttft, invoke_latency)
+            self.breakers[name].record_success()
+
+    def _record_failure(self, name: str):
+        telemetry.inc('liora_model_errors_total', model=name)
+        with self._lock:
+            self.stats[name].record_failure()
+            self.breakers[name].record_failure(self.stats[name])
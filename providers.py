@@ -0,0 +1,244 @@
+from typing import Optional
+
+from rate_limiter import rate_limiters, retry_with_backoff, parse_retry_after
+from telemetry import telemetry
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+class ProviderError(Exception):
+    """Base class for errors returned by a model or search provider"""
+
+    retryable = False
+
+    def __init__(self, message: str, provider: str = "", status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class RateLimitError(ProviderError):
+    """The provider (or our own client-side limiter) refused the request for now"""
+    retryable = True
+
+
+class LocalRateLimitError(RateLimitError):
+    """Our own token bucket refused the request; retry_after says when it will allow one
+
+    Not retried: the bucket already waited as long as a call may, and retrying would
+    only queue behind the same bucket again.
+    """
+    retryable = False
+
+
+class ProviderUnavailableError(ProviderError):
+    """Timeouts, connection failures and 5xx responses"""
+    retryable = True
+
+
+class AuthenticationError(ProviderError):
+    """The API key was rejected"""
+
+
+class PaymentRequiredError(ProviderError):
+    """The account has run out of credits"""
+
+
+class BadRequestError(ProviderError):
+    """The provider rejected the request itself"""
+
+
+class InvalidResponseError(ProviderError):
+    """The provider answered with something we could not parse"""
+
+
+def error_from_status(provider: str, status_code: int, detail: str = "",
+                      retry_after: Optional[float] = None) -> ProviderError:
+    """Map an HTTP status code to a typed provider error"""
+    message = f"{provider} returned HTTP {status_code}" + (f": {detail[:200]}" if detail else "")
+    if status_code == 429:
+        return RateLimitError(message, provider, status_code, retry_after)
+    if status_code == 401 or status_code == 403:
+        return AuthenticationError(message, provider, status_code)
+    if status_code == 402:
+        return PaymentRequiredError(message, provider, status_code)
+    if status_code >= 500:
+        return ProviderUnavailableError(message, provider, status_code, retry_after)
+    return BadRequestError(message, provider, status_code)
+
+
+def call_with_limits(provider: str, api_key: Optional[str], func, max_wait: float = 10.0,
+                     max_retries: int = 3):
+    """Run a provider call behind its token bucket, retrying transient errors"""
+    bucket = rate_limiters.get(provider, api_key)
+
+    def attempt():
+        if not bucket.acquire(max_wait=max_wait):
+            raise LocalRateLimitError(f"{provider} client-side rate limit reached", provider,
+                                      retry_after=bucket.wait_time())
+        try:
+            return func()
+        except RateLimitError as e:
+            if e.retry_after:
+                bucket.penalize(e.retry_after)
+            raise
+
+    try:
+        return retry_with_backoff(
+            attempt,
+            is_retryable=lambda e: isinstance(e, ProviderError) and e.retryable,
+            retry_after=lambda e: getattr(e, 'retry_after', None),
+            max_retries=max_retries
+        )
+    except ProviderError as e:
+        telemetry.inc('liora_provider_errors_total', provider=provider, error=type(e).__name__)
+        raise
+
+
+def translate_gemini_error(error: Exception) -> Exception:
+    """Turn google.api_core exceptions into typed provider errors"""
+    if isinstance(error, ProviderError):
+        return error
+    status_code = getattr(error, 'code', None)
+    if isinstance(status_code, int):
+        return error_from_status('gemini', status_code, str(error))
+    if type(error).__name__ in ('ServiceUnavailable', 'DeadlineExceeded', 'RetryError'):
+        return ProviderUnavailableError(str(error), 'gemini')
+    return error
+
+
+class OpenRouterModel:
+    """Minimal generate_content-compatible client for OpenRouter chat completions"""
+
+    def __init__(self, api_key, model_name):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.base_url = OPENROUTER_URL
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://ardena.ai",
+            "X-Title": "Liora AI Assistant"
+        }
+
+    def complete(self, prompt, temperature=0.7, max_tokens=2048) -> str:
+        """Send one chat completion, raising a ProviderError on failure"""
+        data = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        return call_with_limits('openrouter', self.api_key, lambda: self._post(data))
+
+    def _post(self, data) -> str:
+        # Imported on first request so startup does not pay for it
+        import requests
+
+        try:
+            response = requests.post(self.base_url, headers=self.headers, json=data, timeout=30)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            raise ProviderUnavailableError(f"OpenRouter request failed: {e}", 'openrouter')
+
+        if response.status_code != 200:
+            raise error_from_status(
+                'openrouter', response.status_code, response.text,
+                parse_retry_after(response.headers.get('Retry-After'))
+            )
+
+        try:
+            result = response.json()
+            return result["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise InvalidResponseError("OpenRouter returned an unexpected response format", 'openrouter')
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        content = self.complete(
+            prompt,
+            temperature=kwargs.get("temperature", 0.7),
+            max_tokens=kwargs.get("max_tokens", 2048)
+        )
+
+        if stream:
+            # OpenRouter is called without server-side streaming; replay the reply word by word
+            return MockStream(content)
+        return TextResponse(content)
+
+
+class OpenRouterLLM:
+    """LangChain-style invoke() wrapper around OpenRouterModel"""
+
+    def __init__(self, api_key, model_name):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = OpenRouterModel(api_key, model_name)
+
+    def invoke(self, prompt):
+        return LLMResponse(self._model.complete(prompt, temperature=0.7, max_tokens=1000))
+
+
+class RateLimitedGeminiModel:
+    """Wraps a google.generativeai model with rate limiting and typed errors"""
+
+    def __init__(self, model, api_key):
+        self._model = model
+        self.api_key = api_key
+        self.model_name = getattr(model, 'model_name', 'gemini')
+
+    def generate_content(self, prompt, **kwargs):
+        def call():
+            try:
+                return self._model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                raise translate_gemini_error(e)
+        response = call_with_limits('gemini', self.api_key, call)
+        if kwargs.get('stream'):
+            return self._translate_stream(response)
+        return response
+
+    def _translate_stream(self, response):
+        try:
+            for chunk in response:
+                yield chunk
+        except Exception as e:
+            raise translate_gemini_error(e)
+
+
+class RateLimitedGeminiLLM:
+    """Wraps ChatGoogleGenerativeAI with rate limiting and typed errors"""
+
+    def __init__(self, llm, api_key):
+        self._llm = llm
+        self.api_key = api_key
+
+    def invoke(self, prompt):
+        def call():
+            try:
+                return self._llm.invoke(prompt)
+            except Exception as e:
+                raise translate_gemini_error(e)
+        return call_with_limits('gemini', self.api_key, call)
+
+
+class TextResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class LLMResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class MockStream:
+    """Yields a finished reply word by word, like a streamed response"""
+
+    def __init__(self, content):
+        self.content = content
+        self.words = content.split()
+
+    def __iter__(self):
+        for i, word in enumerate(self.words):
+            yield TextResponse(word + (' ' if i < len(self.words) - 1 else ''))
@@ -0,0 +1,144 @@
+import hashlib
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+# Requests per second and burst size per provider, kept under the free-tier quotas
+PROVIDER_RATE_LIMITS = {
+    'gemini': (15 / 60.0, 5),
+    'openrouter': (20 / 60.0, 5),
+    'tavily': (1.0, 5),
+}
+DEFAULT_RATE_LIMIT = (1.0, 5)
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short, non-reversible tag for an API key, safe to use in cache keys and logs"""
+    return hashlib.sha256((api_key or '').encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    """Thread-safe token bucket"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available, otherwise return the seconds to wait for them"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens would be available, without taking them"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (tokens - self.tokens) / self.rate)
+
+    def acquire(self, tokens: float = 1.0, max_wait: float = 10.0) -> bool:
+        """Block until tokens are available, giving up after max_wait seconds"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Drain the bucket so nobody sends again before the server allows it"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 1.0 - seconds * self.rate)
+
+
+class RateLimiterRegistry:
+    """One token bucket per provider and API key"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.limits = dict(PROVIDER_RATE_LIMITS if limits is None else limits)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, api_key: Optional[str] = None) -> TokenBucket:
+        # Only a fingerprint of the key is kept in memory
+        key = f"{provider}:{key_fingerprint(api_key)}"
+        with self._lock:
+            if key not in self._buckets:
+                rate, capacity = self.limits.get(provider, DEFAULT_RATE_LIMIT)
+                self._buckets[key] = TokenBucket(rate, capacity)
+            return self._buckets[key]
+
+    def configure(self, provider: str, rate: float, capacity: int, api_key: Optional[str] = None):
+        """Replace the bucket for one provider and key, e.g. to lift limits for local stand-ins"""
+        with self._lock:
+            self._buckets[f"{provider}:{key_fingerprint(api_key)}"] = TokenBucket(rate, capacity)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 20.0) -> float:
+    """Full-jitter exponential backoff delay for a retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_with_backoff(func: Callable, is_retryable: Callable[[Exception], bool],
+                       retry_after: Callable[[Exception], Optional[float]] = lambda e: None,
+                       max_retries: int = 3, base: float = 0.5, cap: float = 20.0,
+                       max_retry_after: float = 30.0, on_retry: Optional[Callable[[float], None]] = None):
+    """Call func, retrying retryable errors with jittered exponential backoff
+
+    A server-provided Retry-After takes precedence over the computed delay; if it
+    asks for more than max_retry_after the error is raised instead of waiting.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is not None:
+                if delay > max_retry_after:
+                    raise
+                delay += random.uniform(0, base)
+            else:
+                delay = backoff_delay(attempt, base, cap)
+            if on_retry:
+                on_retry(delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+# Global instance
+rate_limiters = RateLimiterRegistry()
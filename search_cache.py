@@ -0,0 +1,173 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Words that do not change what a search is about
+QUERY_STOPWORDS = {
+    'a', 'about', 'an', 'and', 'any', 'are', 'at', 'can', 'could', 'for', 'give', 'hey', 'i',
+    'in', 'is', 'me', 'of', 'on', 'please', 'show', 'tell', 'the', 'there', 'to', 'us', 'what',
+    'whats', 'with', 'you', 'liora'
+}
+
+# Freshness buckets in seconds; the first rule whose keywords appear in the query wins
+FRESHNESS_RULES = [
+    ({'breaking', 'live', 'just', 'now', 'score', 'scores'}, 5 * 60),
+    ({'stock', 'stocks', 'price', 'prices', 'weather', 'forecast', 'traffic', 'rate', 'rates'}, 10 * 60),
+    ({'news', 'latest', 'today', 'current', 'recent', 'update', 'updates', 'trending', 'viral',
+      'happened', 'tonight', 'yesterday'}, 10 * 60),
+    ({'week', 'month', 'year', 'season', 'election', 'schedule'}, 6 * 60 * 60),
+]
+EVERGREEN_TTL = 24 * 60 * 60
+
+
+def normalize_query(query: str) -> str:
+    """Reduce a query to a canonical form so near-identical searches share a key
+
+    Case, punctuation, spacing and stopwords are dropped, but word order is
+    kept: "flights from london to nairobi" is not the reverse trip.
+    """
+    words = re.findall(r"[a-z0-9]+", query.lower().replace("'", ""))
+    terms = [word for word in words if word not in QUERY_STOPWORDS]
+    return " ".join(terms) if terms else " ".join(words)
+
+
+def freshness_ttl(normalized_query: str) -> int:
+    """How long results for a query stay fresh"""
+    terms = set(normalized_query.split())
+    for keywords, ttl in FRESHNESS_RULES:
+        if terms & keywords:
+            return ttl
+    return EVERGREEN_TTL
+
+
+class SearchCache:
+    """Search result cache keyed by normalized query and freshness bucket
+
+    Results are shared across every session in the process. Concurrent lookups
+    for the same key wait on the one request already in flight instead of
+    sending their own.
+    """
+
+    def __init__(self, max_entries: int = 1000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def make_key(self, query: str, namespace: str = '', now: Optional[float] = None) -> Tuple[str, float]:
+        """Cache key for a query, plus the time at which its bucket expires"""
+        normalized = normalize_query(query)
+        ttl = freshness_ttl(normalized)
+        now = self.clock() if now is None else now
+        bucket = int(now // ttl)
+        return f"{namespace}|{normalized}|{ttl}|{bucket}", (bucket + 1) * ttl
+
+    def get(self, query: str, namespace: str = '') -> Optional[Any]:
+        """Look up a fresh result without fetching"""
+        key, _ = self.make_key(query, namespace)
+        with self._lock:
+            return self._lookup(key)
+
+    def get_or_fetch(self, query: str, fetch: Callable[[str], Any], namespace: str = '') -> Any:
+        """Return a fresh cached result or fetch it, coalescing concurrent callers"""
+        key, expires_at = self.make_key(query, namespace)
+
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch(query)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, expires_at, result)
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def put(self, query: str, result: Any, namespace: str = ''):
+        """Store a result for a query in its current freshness bucket"""
+        key, expires_at = self.make_key(query, namespace)
+        with self._lock:
+            self._store(key, expires_at, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.coalesced
+        # Coalesced callers were served without a request of their own
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict:
+        """Cache metrics for display and export"""
+        with self._lock:
+            size = len(self._entries)
+            in_flight = len(self._in_flight)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+            'size': size,
+            'in_flight': in_flight
+        }
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, key: str, expires_at: float, result: Any):
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Global instances: raw search results, and finished answers per personality
+search_cache = SearchCache()
+answer_cache = SearchCache()
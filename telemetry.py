@@ -0,0 +1,324 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers cache hits through slow provider streams
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'liora_stage_seconds': "Time spent in each pipeline stage",
+    'liora_turn_seconds': "Total chat turn latency by requested model",
+    'liora_turn_first_token_seconds': "Time from the start of a turn to its first reply chunk",
+    'liora_model_first_token_seconds': "Provider time to first token by serving model",
+    'liora_model_invoke_seconds': "Non-streaming model call latency by serving model",
+    'liora_turns_total': "Chat turns by outcome",
+    'liora_errors_total': "Exceptions raised inside a pipeline stage",
+    'liora_model_errors_total': "Failed model attempts by model",
+    'liora_provider_errors_total': "Rate-limited provider calls that failed after retries",
+    'liora_instant_answers_total': "Turns answered without calling a model",
+    'liora_cache_hits_total': "Cache hits by cache",
+    'liora_cache_misses_total': "Cache misses by cache",
+    'liora_cache_coalesced_total': "Requests that waited on an identical in-flight fetch",
+    'liora_cache_entries': "Entries currently held by each cache",
+    'liora_learning_events_total': "Learning events submitted by kind",
+    'liora_learning_lag_seconds': "Time from submitting a learning batch's first event to applying the batch",
+    'liora_learning_queue_depth': "Learning events waiting to be applied",
+    'liora_learning_events_applied_total': "Learning events applied",
+    'liora_learning_events_failed_total': "Learning events that raised while being applied",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def label_key(labels: Dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count for one labeled series"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        rows = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            running += count
+            rows.append(("+Inf" if bound == float('inf') else repr(bound), running))
+        return rows
+
+
+class Span:
+    """One timed stage inside a trace"""
+
+    def __init__(self, stage: str, depth: int):
+        self.stage = stage
+        self.depth = depth
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+
+class Trace:
+    """Every span recorded for one chat turn, plus attributes such as model and intent"""
+
+    def __init__(self, name: str, attributes: Dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = dict(attributes)
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self.depth = 0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict:
+        return {
+            "event": self.name,
+            "trace_id": self.trace_id,
+            "timestamp": self.started_at,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            **self.attributes,
+            "spans": [
+                dict({"stage": span.stage, "depth": span.depth, "ms": round(span.duration * 1000, 3)},
+                     **({"error": span.error} if span.error else {}))
+                for span in self.spans
+            ]
+        }
+
+
+class Telemetry:
+    """In-process tracing and metrics for the chat pipeline
+
+    Stages are timed with span(); each finished span feeds the
+    liora_stage_seconds histogram and, inside a trace(), is attached to the
+    current turn. When a trace ends it is written as one JSON line to the
+    log stream (if configured). Counters and histograms are exported in
+    Prometheus text format; collectors add values owned by other components,
+    such as cache statistics, at export time.
+    """
+
+    def __init__(self, enabled: bool = True, log_path: Optional[str] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self._collectors: List[Callable[[], List[Tuple[str, str, Dict, float]]]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._log_stream = None
+        self.set_log_path(log_path)
+
+    # Recording
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        if not self.enabled:
+            return
+        key = label_key(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = label_key(labels)
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[Optional[Span]]:
+        """Time a pipeline stage; exceptions are counted and re-raised"""
+        if not self.enabled:
+            yield None
+            return
+        trace = self.current_trace()
+        span = Span(stage, trace.depth if trace else 0)
+        if trace:
+            trace.spans.append(span)
+            trace.depth += 1
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                span.error = type(e).__name__
+                self.inc('liora_errors_total', stage=stage, error=span.error)
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.started
+            if trace:
+                trace.depth -= 1
+            self.observe('liora_stage_seconds', span.duration, stage=stage)
+
+    @contextmanager
+    def trace(self, name: str = "turn", **attributes) -> Iterator[Optional[Trace]]:
+        """Collect the spans of one turn on this thread and log them when it ends"""
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(name, attributes)
+        previous = getattr(self._local, 'trace', None)
+        self._local.trace = trace
+        try:
+            yield trace
+        except BaseException as e:
+            trace.set(error=type(e).__name__)
+            raise
+        finally:
+            self._local.trace = previous
+            self.write_log(trace.to_record())
+
+    def current_trace(self) -> Optional[Trace]:
+        return getattr(self._local, 'trace', None)
+
+    def annotate(self, **attributes):
+        """Attach attributes (intent, served model...) to the current trace, if any"""
+        trace = self.current_trace()
+        if trace:
+            trace.set(**attributes)
+
+    # JSON logs
+
+    def set_log_path(self, path: Optional[str]):
+        """Send one JSON line per trace to a file, or to stderr when path is "-" """
+        with self._log_lock:
+            if self._log_stream not in (None, sys.stderr):
+                self._log_stream.close()
+            if not path:
+                self._log_stream = None
+            elif path == "-":
+                self._log_stream = sys.stderr
+            else:
+                self._log_stream = open(path, 'a', buffering=1, encoding='utf-8')
+
+    def write_log(self, record: Dict):
+        with self._log_lock:
+            if self._log_stream is None:
+                return
+            try:
+                self._log_stream.write(json.dumps(record, default=str) + "\n")
+            except Exception as e:
+                print(f"Error writing telemetry log: {e}")
+
+    # Export
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, Dict, float]]]):
+        """Add a callable returning (name, type, labels, value) samples at export time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[Tuple[str, str, Dict, float]]:
+        samples = []
+        for collector in list(self._collectors):
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        return samples
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (histogram.cumulative(), histogram.sum, histogram.count)
+                       for key, histogram in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        collected: Dict[str, Tuple[str, Dict[Labels, float]]] = {}
+        for name, metric_type, labels, value in self.collect():
+            collected.setdefault(name, (metric_type, {}))[1][label_key(labels)] = value
+
+        lines = []
+        for name in sorted(set(counters) | set(collected)):
+            metric_type, series = collected.get(name, ('counter', counters.get(name, {})))
+            lines.extend(self._header(name, metric_type))
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{format_labels(key)} {value:g}")
+        for name in sorted(histograms):
+            lines.extend(self._header(name, 'histogram'))
+            for key, (buckets, total, count) in sorted(histograms[name].items()):
+                for bound, running in buckets:
+                    lines.append(f"{name}_bucket{format_labels(key, ('le', bound))} {running}")
+                lines.append(f"{name}_sum{format_labels(key)} {total:.6f}")
+                lines.append(f"{name}_count{format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        """Metrics as plain data for JSON export"""
+        with self._lock:
+            counters = {name: [dict(labels=dict(key), value=value) for key, value in series.items()]
+                        for name, series in self._counters.items()}
+            histograms = {
+                name: [dict(labels=dict(key), count=h.count, sum=h.sum,
+                            buckets=dict(h.cumulative())) for key, h in series.items()]
+                for name, series in self._histograms.items()
+            }
+        gauges = defaultdict(list)
+        for name, _, labels, value in self.collect():
+            gauges[name].append(dict(labels=labels, value=value))
+        return {"counters": counters, "histograms": histograms, "collected": dict(gauges)}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _header(name: str, metric_type: str) -> List[str]:
+        return [f"# HELP {name} {METRIC_HELP.get(name, name)}", f"# TYPE {name} {metric_type}"]
+
+
+def cache_metrics() -> List[Tuple[str, str, Dict, float]]:
+    """Hit, miss and size figures from the shared search and answer caches"""
+    from search_cache import answer_cache, search_cache
+
+    samples = []
+    for cache_name, cache in (('search', search_cache), ('answer', answer_cache)):
+        stats = cache.stats()
+        labels = {'cache': cache_name}
+        samples.append(('liora_cache_hits_total', 'counter', labels, stats.get('hits', 0)))
+        samples.append(('liora_cache_misses_total', 'counter', labels, stats.get('misses', 0)))
+        samples.append(('liora_cache_coalesced_total', 'counter', labels, stats.get('coalesced', 0)))
+        samples.append(('liora_cache_entries', 'gauge', labels, stats.get('size', 0)))
+    return samples
+
+
+# Global instance
+telemetry = Telemetry(
+    enabled=os.getenv("LIORA_TELEMETRY", "1") != "0",
+    log_path=os.getenv("LIORA_TELEMETRY_LOG")
+)
+telemetry.register_collector(cache_metrics)
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from conversation_intelligence import ConversationIntelligence
+from liora import archive
+from liora.archive import ArchiveImporter, export_archive, state_path
+from liora.storage import ConversationStore
+
+
+class Crash(Exception):
+    pass
+
+
+def build_source(directory):
+    store = ConversationStore(os.path.join(directory, "source.pkl"), full_text=False)
+    for number in range(3):
+        conversation = store.create(f"chat {number}")
+        for position in range(5):
+            store.restore_message(conversation["id"], {
+                "role": "user" if position % 2 == 0 else "assistant",
+                "content": f"message {position} of chat {number}"
+            })
+    intelligence = ConversationIntelligence(os.path.join(directory, "source"))
+    intelligence.interaction_count = 7
+    intelligence.successful_responses = 4
+    return store, intelligence
+
+
+def destination(directory):
+    os.makedirs(os.path.join(directory, "dest"), exist_ok=True)
+    return (ConversationStore(os.path.join(directory, "dest.pkl"), full_text=False),
+            ConversationIntelligence(os.path.join(directory, "dest")))
+
+
+def contents(store):
+    return {cid: (c["title"], [m["content"] for m in c["messages"]]) for cid, c in store.conversations.items()}
+
+
+@pytest.fixture
+def exported(tmp_path):
+    os.makedirs(tmp_path / "source")
+    store, intelligence = build_source(str(tmp_path))
+    path = str(tmp_path / "backup.jsonl.gz")
+    counts = export_archive(path, store, intelligence)
+    assert counts["conversation"] == 3 and counts["message"] == 15
+    return path, store
+
+
+def test_round_trip_and_skip_on_conflict(tmp_path, exported):
+    path, source = exported
+    store, intelligence = destination(str(tmp_path))
+    counts = ArchiveImporter(store, intelligence, chunk_size=4).run(path)
+    assert contents(store) == contents(source)
+    assert counts["message"] == 15
+    assert intelligence.interaction_count == 7
+    assert not os.path.exists(state_path(path))
+
+    counts = ArchiveImporter(store, intelligence).run(path)
+    assert counts["conversations_skipped"] == 3 and counts["messages_skipped"] == 15
+    assert contents(store) == contents(source)
+    # Merging adds counters
+    assert intelligence.interaction_count == 14
+
+
+@pytest.mark.parametrize("crash_at_commit", [1, 2, 3, 4, 5])
+def test_resume_after_a_crash_between_saving_the_store_and_the_checkpoint(
+        tmp_path, exported, monkeypatch, crash_at_commit):
+    path, source = exported
+    real_save = archive.save_import_state
+    checkpoints = []
+
+    def crash_before_checkpoint(archive_path, state):
+        if "pending" not in state:
+            checkpoints.append(state)
+            if len(checkpoints) == crash_at_commit:
+                raise Crash()
+        real_save(archive_path, state)
+
+    store, intelligence = destination(str(tmp_path))
+    monkeypatch.setattr(archive, "save_import_state", crash_before_checkpoint)
+    with pytest.raises(Crash):
+        ArchiveImporter(store, intelligence, chunk_size=4).run(path)
+    monkeypatch.setattr(archive, "save_import_state", real_save)
+
+    # A fresh process sees only what reached disk
+    store, intelligence = destination(str(tmp_path))
+    counts = ArchiveImporter(store, intelligence, chunk_size=4).run(path)
+    assert contents(store) == contents(source)
+    assert counts["conversation"] == 3 and counts["message"] == 15
+    assert counts["conversations_skipped"] == 0
+    assert intelligence.interaction_count == 7
+    assert intelligence.successful_responses == 4
+
+
+def test_replacing_learning_state_refreshes_the_few_shot_index(tmp_path, exported):
+    path, _ = exported
+    store, intelligence = destination(str(tmp_path))
+    intelligence.add_effective_response({"user_message": "how do I bake sourdough bread",
+                                         "assistant_response": "stale", "effectiveness_score": 0.9})
+    assert intelligence.get_few_shot_examples("bake sourdough bread")
+    ArchiveImporter(store, intelligence, learning=archive.LEARNING_REPLACE).run(path)
+    assert intelligence.get_few_shot_examples("bake sourdough bread") == []
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from liora.conversation_index import ConversationIndex
+
+START = datetime(2026, 1, 1)
+
+
+def conversation(cid, title, minutes):
+    return {"id": cid, "title": title, "messages": [], "last_updated": START + timedelta(minutes=minutes)}
+
+
+def test_pages_are_newest_first_and_follow_updates():
+    index = ConversationIndex()
+    index.rebuild({f"c{n}": conversation(f"c{n}", f"chat {n}", n) for n in range(10)})
+    assert index.page(0, 3) == ["c9", "c8", "c7"]
+    assert index.page(8, 5) == ["c1", "c0"]
+
+    index.upsert(conversation("c0", "chat 0", 60))
+    assert index.page(0, 2) == ["c0", "c9"]
+    index.remove("c9")
+    assert index.page(0, 2) == ["c0", "c8"]
+    assert len(index) == 9 and "c9" not in index
+
+
+def test_title_search_matches_every_term_with_the_last_as_a_prefix():
+    index = ConversationIndex()
+    index.rebuild({
+        "a": conversation("a", "Sourdough starter tips", 1),
+        "b": conversation("b", "Starting a garden", 2),
+        "c": conversation("c", "Sourdough troubleshooting", 3),
+    })
+    assert index.search("sourdough") == ["c", "a"]
+    assert index.search("star") == ["b", "a"]
+    assert index.search("sourdough star") == ["a"]
+    assert index.search("garden sour") == []
+
+
+def test_retitling_moves_a_conversation_between_search_results():
+    index = ConversationIndex()
+    index.rebuild({"a": conversation("a", "New Chat 10:30", 1)})
+    index.upsert(conversation("a", "Marathon training", 1))
+    assert index.search("marathon") == ["a"]
+    assert index.search("new chat") == []
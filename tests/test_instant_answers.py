@@ -0,0 +1,49 @@
+import time
+
+from instant_answers import InstantAnswerEngine, ArithmeticProvider, CachedFactProvider, TimeProvider
+from intent_router import build_default_router
+from search_cache import SearchCache
+
+router = build_default_router()
+
+
+def answer(engine, prompt):
+    return engine.answer(prompt, "Neutral Researcher", router.route(prompt))
+
+
+def test_bare_number_pairs_in_chat_are_not_arithmetic():
+    engine = InstantAnswerEngine([ArithmeticProvider()])
+    for prompt in ["24/7", "9/11", "50/50", "1990-2000", "1,2", "what is 1,2"]:
+        assert answer(engine, prompt) is None, prompt
+
+
+def test_explicit_arithmetic_is_answered():
+    engine = InstantAnswerEngine([ArithmeticProvider()])
+    assert "**3.4286**" in answer(engine, "calculate 24/7")
+    assert "**4**" in answer(engine, "2+2=")
+    assert "**1,235**" in answer(engine, "what is 1,234 + 1")
+
+
+def test_time_only_for_time_questions():
+    engine = InstantAnswerEngine([TimeProvider()])
+    assert answer(engine, "what date should I pick for my wedding") is None
+    assert "Tokyo" in answer(engine, "what time is it in tokyo")
+
+
+def test_cached_facts_only_replay_the_same_search():
+    cache = SearchCache()
+    engine = InstantAnswerEngine([CachedFactProvider(cache)])
+    cache.put("latest news did chelsea beat arsenal", "Chelsea won", namespace="Neutral Researcher")
+    assert "Chelsea won" in answer(engine, "latest news: did Chelsea beat Arsenal?")
+    assert answer(engine, "latest news did arsenal beat chelsea") is None
+
+
+def test_oversized_integer_results_are_refused_before_computing():
+    engine = InstantAnswerEngine([ArithmeticProvider()])
+    started = time.monotonic()
+    for prompt in ["calculate ((((9^99)^99)^99)^99)", "calculate (9^99)^99",
+                   "calculate 99999999999^99 * 99999999999^99 * 99999999999^99 * 99999999999^99"]:
+        assert answer(engine, prompt) is None, prompt
+    assert time.monotonic() - started < 1.0
+    assert "**8,589,934,592**" in answer(engine, "calculate 2^33")
+    assert answer(engine, "calculate 9^99") is not None
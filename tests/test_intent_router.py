@@ -0,0 +1,30 @@
+import pytest
+
+from intent_router import INTENT_CHAT, INTENT_SEARCH, INTENT_TIME, build_default_router
+
+router = build_default_router(use_classifier=False)
+
+
+@pytest.mark.parametrize("prompt", [
+    "what time is it in new york city",
+    "what's the time in los angeles california",
+    "time in rio de janeiro?",
+    "what time is it in the united kingdom right now",
+])
+def test_time_questions_name_places_of_several_words(prompt):
+    assert router.route(prompt).intent == INTENT_TIME
+
+
+@pytest.mark.parametrize("prompt", [
+    "I read the news today and felt sad",
+    "i watched the news last night and it scared me",
+    "I had a great time in Paris",
+    "what date should I pick for my wedding",
+])
+def test_talking_about_something_is_chat(prompt):
+    assert router.route(prompt).intent == INTENT_CHAT
+
+
+def test_news_requests_still_search():
+    assert router.route("latest news in kenya today").intent == INTENT_SEARCH
+    assert router.route("any news on the fuel shortage").intent == INTENT_SEARCH
@@ -0,0 +1,66 @@
+import threading
+
+from liora.learning_queue import LearningQueue
+
+
+class FakeIntelligence:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.learned = []
+        self.saves = 0
+        self.threads = set()
+
+    def learn_from_interaction(self, user_message, assistant_response, conversation_history, user_feedback, save):
+        assert save is False
+        if user_message == self.fail_on:
+            raise ValueError("bad event")
+        self.learned.append(user_message)
+        self.threads.add(threading.current_thread().name)
+
+    def learn_from_feedback(self, feedback, effectiveness_score):
+        self.learned.append((feedback, effectiveness_score))
+
+    def save_all(self):
+        self.saves += 1
+
+
+def submit_all(learning, intelligence, messages):
+    for message in messages:
+        learning.submit_interaction(intelligence, message, "reply", "history")
+
+
+def test_events_are_applied_in_order_off_the_calling_thread():
+    learning = LearningQueue(save_interval=60)
+    intelligence = FakeIntelligence()
+    submit_all(learning, intelligence, [f"m{n}" for n in range(100)])
+    learning.submit_feedback(intelligence, "good response", 1.0)
+    learning.flush()
+    assert intelligence.learned == [f"m{n}" for n in range(100)] + [("good response", 1.0)]
+    assert intelligence.threads == {"liora-learning"}
+    assert learning.stats() == (0, 101, 0)
+    # Saves wait for save_interval; close() saves what is left
+    assert intelligence.saves == 0
+    learning.close()
+    assert intelligence.saves == 1
+
+
+def test_a_failing_event_is_counted_and_the_rest_still_apply():
+    learning = LearningQueue(save_interval=0)
+    intelligence = FakeIntelligence(fail_on="m1")
+    submit_all(learning, intelligence, ["m0", "m1", "m2"])
+    learning.close()
+    assert intelligence.learned == ["m0", "m2"]
+    assert learning.stats() == (0, 2, 1)
+    assert intelligence.saves >= 1
+
+
+def test_inline_mode_and_events_after_close_apply_immediately():
+    inline = LearningQueue(background=False, save_interval=0)
+    intelligence = FakeIntelligence()
+    submit_all(inline, intelligence, ["m0"])
+    assert intelligence.learned == ["m0"] and intelligence.saves == 1
+
+    learning = LearningQueue()
+    learning.close()
+    submit_all(learning, intelligence, ["m1"])
+    assert intelligence.learned == ["m0", "m1"]
@@ -0,0 +1,50 @@
+from liora.memory import LongTermMemory
+
+TOPICS = ["sourdough starter feeding schedule", "marathon training plan for spring",
+          "repotting a fiddle leaf fig", "learning the cello as an adult"]
+
+
+def conversation(cid, texts):
+    return {"id": cid, "messages": [{"role": "user", "content": text} for text in texts]}
+
+
+def fill(memory, conversations):
+    memory.rebuild({c["id"]: c for c in conversations})
+
+
+def test_recall_finds_the_matching_conversation_and_honours_exclusion(tmp_path):
+    memory = LongTermMemory(str(tmp_path / "memory"), budget_ms=1000)
+    fill(memory, [conversation(f"c{n}", [f"Tell me about {topic}."]) for n, topic in enumerate(TOPICS)])
+    hits = memory.recall("what was that marathon training plan again", budget_ms=1000)
+    assert hits and hits[0].conversation_id == "c1"
+    assert all(hit.conversation_id != "c1"
+               for hit in memory.recall("marathon training plan", exclude_conversation="c1", budget_ms=1000))
+
+
+def test_removed_conversations_stay_removed_after_reopening(tmp_path):
+    directory = str(tmp_path / "memory")
+    memory = LongTermMemory(directory, budget_ms=1000)
+    fill(memory, [conversation(f"c{n}", [f"Tell me about {topic}."]) for n, topic in enumerate(TOPICS)])
+    memory.remove("c0")
+    assert len(memory) == 3
+    memory.close()
+
+    reopened = LongTermMemory(directory, budget_ms=1000)
+    assert len(reopened) == 3
+    assert all(hit.conversation_id != "c0" for hit in reopened.recall("sourdough starter feeding", budget_ms=1000))
+    reopened.close()
+
+
+def test_backfill_grows_past_the_initial_capacity(tmp_path):
+    directory = str(tmp_path / "memory")
+    memory = LongTermMemory(directory, budget_ms=1000)
+    count = memory.vectors.capacity + 50
+    fill(memory, [conversation("big", [f"Note number {n} about the garden shed" for n in range(count)])])
+    assert len(memory) == count
+    assert len(memory._owners) >= count and len(memory._mask) >= count
+    memory.remove("big")
+    assert len(memory) == 0
+    memory.close()
+    reopened = LongTermMemory(directory)
+    assert len(reopened) == 0
+    reopened.close()
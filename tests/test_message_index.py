@@ -0,0 +1,44 @@
+import pytest
+
+from liora.message_index import InvertedMessageIndex, SQLiteMessageIndex
+
+
+def backends():
+    yield InvertedMessageIndex
+    if SQLiteMessageIndex.available():
+        yield SQLiteMessageIndex
+
+
+def conversation(cid, *contents):
+    return {"id": cid, "messages": [{"role": "user" if n % 2 == 0 else "assistant", "content": content}
+                                    for n, content in enumerate(contents)]}
+
+
+@pytest.fixture(params=list(backends()), ids=lambda backend: backend.__name__)
+def index(request):
+    index = request.param()
+    index.rebuild({
+        "a": conversation("a", "How do I feed a sourdough starter?", "Feed it flour and water daily."),
+        "b": conversation("b", "Plan a marathon training schedule", "Start with three runs a week."),
+    })
+    return index
+
+
+def test_search_ranks_matches_and_marks_them_in_the_snippet(index):
+    hits = index.search("sourdough starter")
+    assert [(hit.conversation_id, hit.position, hit.role) for hit in hits] == [("a", 0, "user")]
+    assert "[sourdough]" in hits[0].snippet
+
+
+def test_last_term_is_a_prefix_and_every_term_must_match(index):
+    assert {hit.conversation_id for hit in index.search("marath")} == {"b"}
+    assert index.search("sourdough marathon") == []
+    assert index.search('" OR *') == []
+
+
+def test_appended_and_removed_messages_are_reflected(index):
+    index.add_message({"id": "b"}, 2, {"role": "user", "content": "What about hydration on race day?"})
+    assert [(hit.conversation_id, hit.position) for hit in index.search("hydration")] == [("b", 2)]
+    index.remove("b")
+    assert index.search("hydration") == [] and index.search("marathon") == []
+    assert len(index) == 2
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from model_router import AllModelsFailedError, ModelRouter
+from providers import ProviderError, ProviderUnavailableError
+
+
+class FakeModel:
+    def __init__(self, chunks=("hello", " world"), delay=0.0, stall_after=None, error=None):
+        self.chunks = chunks
+        self.delay = delay
+        self.stall_after = stall_after
+        self.error = error
+
+    def generate_content(self, prompt, stream=True, **kwargs):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        for index, chunk in enumerate(self.chunks):
+            if index == self.stall_after:
+                time.sleep(5)
+            yield chunk
+
+
+def make_router(models, **kwargs):
+    return ModelRouter(lambda name: (models[name], None), list(models), **kwargs)
+
+
+def test_streams_from_the_preferred_model():
+    router = make_router({"a": FakeModel(), "b": FakeModel(("other",))})
+    assert "".join(router.stream("hi", "a")) == "hello world"
+    assert router.stats["a"].total_requests == 1
+
+
+def test_fails_over_when_the_preferred_model_errors():
+    router = make_router({"a": FakeModel(error=ProviderError("down", "a")), "b": FakeModel(("backup",))})
+    assert "".join(router.stream("hi", "a")) == "backup"
+    assert router.stats["a"].total_errors == 1
+
+
+def test_hedges_a_slow_first_token():
+    router = make_router({"slow": FakeModel(("slow",), delay=1.0), "fast": FakeModel(("fast",))}, latency_slo=0.05)
+    assert "".join(router.stream("hi", "slow")) == "fast"
+    assert router.stats["fast"].hedges_started == 1
+
+
+def test_breaker_takes_a_failing_model_out_of_rotation():
+    router = make_router({"a": FakeModel(error=ProviderError("down", "a")), "b": FakeModel(("b",))}, hedging=False)
+    for _ in range(3):
+        "".join(router.stream("hi", "a"))
+    assert router.breakers["a"].state == "open"
+    assert router.candidates("a") == ["b"]
+
+
+def test_all_models_failing_raises():
+    router = make_router({"a": FakeModel(error=ProviderError("down", "a"))})
+    with pytest.raises(AllModelsFailedError):
+        "".join(router.stream("hi", "a"))
+
+
+def test_mid_stream_stall_times_out_and_counts_as_a_failure():
+    router = make_router({"a": FakeModel(stall_after=1)}, chunk_timeout=0.2)
+    chunks = router.stream("hi", "a")
+    assert next(chunks) == "hello"
+    started = time.monotonic()
+    with pytest.raises(ProviderUnavailableError):
+        next(chunks)
+    assert time.monotonic() - started < 2
+    assert router.stats["a"].total_errors == 1
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from providers import LocalRateLimitError, RateLimitError, call_with_limits
+from rate_limiter import RateLimiterRegistry, TokenBucket, key_fingerprint, rate_limiters, retry_with_backoff
+
+
+def test_bucket_allows_a_burst_then_reports_the_wait():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert 0.9 < bucket.try_acquire() <= 1.0
+    assert 0.9 < bucket.wait_time() <= 1.0
+
+
+def test_acquire_gives_up_instead_of_waiting_past_max_wait():
+    bucket = TokenBucket(rate=0.01, capacity=1)
+    bucket.try_acquire()
+    started = time.monotonic()
+    assert bucket.acquire(max_wait=0.1) is False
+    assert time.monotonic() - started < 0.1
+
+
+def test_penalize_drains_the_bucket_for_the_retry_after():
+    bucket = TokenBucket(rate=10.0, capacity=5)
+    bucket.penalize(2.0)
+    assert bucket.wait_time() == pytest.approx(2.0, abs=0.05)
+
+
+def test_registry_keeps_one_bucket_per_key_and_configure_only_touches_its_own():
+    registry = RateLimiterRegistry({'gemini': (1.0, 3)})
+    assert registry.get('gemini', 'one') is registry.get('gemini', 'one')
+    assert registry.get('gemini', 'one') is not registry.get('gemini', 'two')
+    real = registry.get('gemini', 'real')
+    registry.configure('gemini', 1e6, 1000, 'stub')
+    assert registry.get('gemini', 'real') is real
+    assert registry.get('gemini', 'stub').capacity == 1000
+    assert len(key_fingerprint('secret')) == 12 and 'secret' not in key_fingerprint('secret')
+
+
+def test_retry_with_backoff_retries_only_retryable_errors():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RateLimitError("busy", "x")
+        return "ok"
+
+    assert retry_with_backoff(flaky, lambda e: e.retryable, base=0.001) == "ok"
+    assert len(calls) == 3
+
+
+def test_local_bucket_refusal_fails_fast_with_the_wait():
+    rate_limiters.configure('test-provider', 0.01, 1, 'key')
+    assert call_with_limits('test-provider', 'key', lambda: "first", max_wait=0.05) == "first"
+    started = time.monotonic()
+    with pytest.raises(LocalRateLimitError) as error:
+        call_with_limits('test-provider', 'key', lambda: "second", max_wait=0.05)
+    # One bounded wait, no retries
+    assert time.monotonic() - started < 0.5
+    assert error.value.retry_after > 50
+    assert not error.value.retryable
@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from conversation_intelligence import (
+    ENGAGEMENT_INDICATORS, ENGAGING_PHRASES, NEGATIVE_WORDS, POSITIVE_WORDS, TOPIC_KEYWORDS,
+    ConversationIntelligence
+)
+from liora.engine import build_conversation_history
+from liora.reanalysis import ENGAGEMENT_LEVELS, TOPICS, Reanalysis, analyze_chunk
+
+WINDOW = 6
+WORDS = (["the", "a", "so", "then", "and"] + [word for words in TOPIC_KEYWORDS.values() for word in words]
+         + POSITIVE_WORDS + NEGATIVE_WORDS + ENGAGING_PHRASES
+         + [word for words in ENGAGEMENT_INDICATORS.values() for word in words])
+
+
+def random_conversations(seed: int, count: int = 12):
+    rng = random.Random(seed)
+    conversations = []
+    for number in range(count):
+        messages = []
+        for position in range(rng.randint(2, 16)):
+            # Lengths on both sides of the 50/100/200 character thresholds
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.choice([2, 8, 20, 45])))
+            messages.append(("user" if position % 2 == 0 else "assistant", text))
+        conversations.append((f"c{number}", messages))
+    return conversations
+
+
+def live_scores(conversations, intelligence):
+    """What learn_from_interaction computes for every turn"""
+    scores, topics, engagement = [], Counter(), Counter()
+    for _, messages in conversations:
+        for user in range(len(messages) - 1):
+            if messages[user][0] != "user" or messages[user + 1][0] != "assistant":
+                continue
+            window = [{"role": role, "content": content}
+                      for role, content in messages[max(0, user + 1 - WINDOW):user + 1]]
+            analysis = intelligence.analyze_conversation(build_conversation_history(window, WINDOW))
+            topics.update(analysis["topics"])
+            engagement[analysis["engagement_level"]] += 1
+            scores.append(intelligence.assess_response_effectiveness(
+                messages[user][1], messages[user + 1][1], analysis))
+    return scores, topics, engagement
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_bulk_scoring_matches_the_live_path(seed, tmp_path):
+    conversations = random_conversations(seed)
+    scores, topics, engagement = live_scores(conversations, ConversationIntelligence(str(tmp_path)))
+    result = analyze_chunk(0, conversations, window=WINDOW, keep_effective=1000)
+
+    assert result["turns"] == len(scores)
+    assert result["score_sum"] == pytest.approx(sum(scores))
+    assert result["effective_total"] == sum(1 for score in scores if score > 0.7)
+    assert dict(zip(TOPICS, result["topic_counts"])) == {topic: topics[topic] for topic in TOPICS}
+    assert dict(zip(ENGAGEMENT_LEVELS, result["engagement_counts"])) == {
+        level: engagement[level] for level in ENGAGEMENT_LEVELS}
+
+
+def test_applying_replaces_the_examples_the_few_shot_index_serves(tmp_path):
+    intelligence = ConversationIntelligence(str(tmp_path))
+    intelligence.add_effective_response({"user_message": "how do I bake sourdough bread",
+                                         "assistant_response": "stale", "effectiveness_score": 0.9})
+    assert intelligence.get_few_shot_examples("bake sourdough bread")
+
+    reanalysis = Reanalysis()
+    reanalysis._effective[0] = [{"user_message": "how do I tune a guitar", "assistant_response": "fresh",
+                                 "history": "User: how do I tune a guitar", "effectiveness_score": 0.8}]
+    reanalysis.apply(intelligence)
+    assert intelligence.get_few_shot_examples("bake sourdough bread") == []
+    assert [example["assistant_response"] for example in intelligence.get_few_shot_examples("tune a guitar")] == [
+        "fresh"]
@@ -0,0 +1,17 @@
+from search_cache import SearchCache, normalize_query
+
+
+def test_normalize_query_ignores_case_punctuation_and_stopwords():
+    assert normalize_query("What's the  LATEST news on the election?") == normalize_query("latest news election")
+
+
+def test_normalize_query_keeps_word_order():
+    assert normalize_query("flights from london to nairobi") != normalize_query("flights from nairobi to london")
+    assert normalize_query("did chelsea beat arsenal") != normalize_query("did arsenal beat chelsea")
+
+
+def test_reordered_query_is_a_cache_miss():
+    cache = SearchCache(clock=lambda: 0.0)
+    cache.put("did chelsea beat arsenal", "chelsea won")
+    assert cache.get("Did Chelsea beat Arsenal?") == "chelsea won"
+    assert cache.get("did arsenal beat chelsea") is None
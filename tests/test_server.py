@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import pytest
+
+from liora.server import LioraServer
+from liora.storage import ConversationStore
+from liora.stubs import StubLatency, build_stub_engine
+
+
+@pytest.fixture
+def server(tmp_path):
+    latency = StubLatency(first_token_latency=0, tokens_per_second=0, search_latency=0, wikipedia_latency=0)
+    path = str(tmp_path / "conversations.pkl")
+    server = LioraServer(build_stub_engine(latency, path), ConversationStore(path), workers=4)
+    yield server
+    server.executor.shutdown(wait=True)
+
+
+def serve(server, client):
+    """Run client(port) against the server on an ephemeral port"""
+    async def main():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        async with listener:
+            return await asyncio.wait_for(client(listener.sockets[0].getsockname()[1]), timeout=30)
+    return asyncio.run(main())
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), head.decode(), content.decode()
+
+
+def sse_events(content):
+    events = []
+    for block in content.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_chat_streams_tokens_and_the_turn_is_stored(server):
+    async def client(port):
+        status, head, content = await request(port, "POST", "/chat", {"message": "hello there", "session_id": "s1"})
+        assert status == 200 and "text/event-stream" in head
+        events = sse_events(content)
+        kinds = [kind for kind, _ in events]
+        assert kinds[0] == "session" and kinds[-1] == "done" and "token" in kinds
+        conversation_id = events[0][1]["conversation_id"]
+        reply = "".join(data["text"] for kind, data in events if kind == "token")
+
+        status, _, content = await request(port, "GET", f"/conversations/{conversation_id}")
+        messages = json.loads(content)["messages"]
+        assert status == 200
+        assert [message["content"] for message in messages] == ["hello there", reply]
+
+        # The same session continues the same conversation
+        _, _, content = await request(port, "POST", "/chat", {"message": "and again", "session_id": "s1"})
+        assert sse_events(content)[0][1]["conversation_id"] == conversation_id
+        listing = json.loads((await request(port, "GET", "/conversations"))[2])
+        assert listing["total"] == 1 and listing["conversations"][0]["message_count"] == 4
+        hits = json.loads((await request(port, "GET", "/search?q=again"))[2])["hits"]
+        assert [(hit["conversation_id"], hit["position"]) for hit in hits] == [(conversation_id, 2)]
+    serve(server, client)
+
+
+def test_bad_requests_get_json_errors(server):
+    async def client(port):
+        assert (await request(port, "GET", "/chat"))[0] == 405
+        assert (await request(port, "POST", "/chat", {"message": ""}))[0] == 400
+        assert (await request(port, "POST", "/chat", {"message": "hi", "mode": "nope"}))[0] == 400
+        assert (await request(port, "POST", "/chat", {"message": "hi", "conversation_id": "missing"}))[0] == 404
+        assert (await request(port, "GET", "/conversations/missing"))[0] == 404
+        assert (await request(port, "GET", "/search"))[0] == 400
+        assert (await request(port, "GET", "/nowhere"))[0] == 404
+        status, _, content = await request(port, "GET", "/health")
+        assert status == 200 and json.loads(content)["status"] == "ok"
+    serve(server, client)
+
+
+def test_turns_in_one_conversation_run_one_at_a_time(server):
+    async def client(port):
+        conversation_id = server.store.create()["id"]
+        replies = await asyncio.gather(*[
+            request(port, "POST", "/chat", {"message": f"message {n}", "conversation_id": conversation_id})
+            for n in range(3)
+        ])
+        assert all(status == 200 for status, _, _ in replies)
+        roles = [message["role"] for message in server.store.get(conversation_id)["messages"]]
+        assert roles == ["user", "assistant"] * 3
+        assert server._conversation_locks == {}
+    serve(server, client)
@@ -0,0 +1,22 @@
+import argparse
+
+from liora.engine import get_engine
+from liora.stubs import engine_from_args
+
+
+def real_args(**overrides):
+    return argparse.Namespace(**dict(dict(stub=False, record=None, replay=None, conversations_file=None), **overrides))
+
+
+def test_conversations_file_gets_its_own_engine(monkeypatch):
+    for name in ("GEMINI_API_KEY", "TAVILY_API_KEY", "OPENROUTER_API_KEY"):
+        monkeypatch.setenv(name, "test-key")
+    monkeypatch.delenv("LIORA_CONVERSATIONS_FILE", raising=False)
+    shared = get_engine()
+    before = shared.config.conversations_file
+
+    engine = engine_from_args(real_args(conversations_file="elsewhere.pkl"))
+    assert engine is not shared
+    assert engine.config.conversations_file == "elsewhere.pkl"
+    assert shared.config.conversations_file == before
+    assert engine_from_args(real_args()) is shared
@@ -0,0 +1,203 @@
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Words that never make a useful conversation title
+STOPWORDS = {
+    'a', 'about', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'can', 'could', 'did', 'do',
+    'does', 'for', 'from', 'give', 'has', 'have', 'hello', 'hey', 'hi', 'how', 'i', 'im',
+    'in', 'is', 'it', 'its', 'just', 'know', 'like', 'liora', 'me', 'my', 'of', 'on', 'or',
+    'please', 'so', 'some', 'tell', 'that', 'the', 'there', 'this', 'to', 'u', 'want',
+    'was', 'we', 'what', 'whats', 'when', 'where', 'which', 'who', 'why', 'will', 'with',
+    'would', 'you', 'your', 'yo', 'explain', 'think', 'thoughts', 'really', 'need', 'help'
+}
+
+DEFAULT_TITLE = "New Chat"
+
+
+def is_untitled(title: Optional[str]) -> bool:
+    """Check whether a conversation still carries a placeholder title"""
+    return not title or title.startswith(DEFAULT_TITLE)
+
+
+class TitleGenerator:
+    """Conversation titling that stays off the response critical path"""
+
+    def __init__(self, max_length: int = 25, max_workers: int = 1):
+        self.max_length = max_length
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="liora-titles")
+        self._lock = threading.Lock()
+        self._ready_titles: Dict[str, str] = {}
+        # Title each conversation had when its LLM title was requested; None means any placeholder
+        self._replaceable: Dict[str, Optional[str]] = {}
+        self._pending_ids = set()
+
+    def quick_title(self, message: str) -> str:
+        """Build an instant keyword-based title from a user message"""
+        words = re.findall(r"[A-Za-z0-9][A-Za-z0-9+#.-]*", message)
+        keywords = [word for word in words if word.lower().strip('.') not in STOPWORDS and len(word) > 1]
+
+        if not keywords:
+            keywords = words[:3]
+        if not keywords:
+            return DEFAULT_TITLE
+
+        # Keep the first occurrence of each keyword, in the order the user wrote them
+        counts = Counter(word.lower() for word in keywords)
+        seen = set()
+        ordered = []
+        for word in keywords:
+            key = word.lower()
+            if key not in seen:
+                seen.add(key)
+                ordered.append(word)
+
+        # Prefer repeated words, then fall back to message order
+        ordered.sort(key=lambda word: -counts[word.lower()])
+        title = " ".join(word if word.isupper() else word.capitalize() for word in ordered[:3])
+        return self.clean_title(title)
+
+    def clean_title(self, raw_title: str) -> str:
+        """Normalize a title produced by a model or the local titler"""
+        title = raw_title.strip().splitlines()[0] if raw_title.strip() else ""
+        title = re.sub(r"^(title|\d+[.):])\s*:?\s*", "", title, flags=re.IGNORECASE)
+        title = title.replace('"', '').replace("'", "").replace("*", "").strip()
+        title = title[:self.max_length].strip()
+        return title or DEFAULT_TITLE
+
+    def request_title(self, conversation_id: str, first_message: str, model,
+                      current_title: Optional[str] = None) -> bool:
+        """Refine a conversation title with the LLM in the background
+
+        The result only replaces current_title (the quick title, usually); if
+        the user renames the chat in the meantime, their title is kept.
+        """
+        with self._lock:
+            if conversation_id in self._pending_ids:
+                return False
+            self._pending_ids.add(conversation_id)
+            self._replaceable[conversation_id] = current_title
+
+        self._executor.submit(self._generate_title, conversation_id, first_message, model)
+        return True
+
+    def request_batch_titles(self, untitled: Dict[str, str], model) -> bool:
+        """Title many conversations with a single LLM call in the background
+
+        Args:
+            untitled: Mapping of conversation id to its first user message
+            model: Model instance exposing generate_content
+        """
+        with self._lock:
+            batch = {cid: msg for cid, msg in untitled.items() if cid not in self._pending_ids and msg}
+            self._pending_ids.update(batch)
+            self._replaceable.update({cid: None for cid in batch})
+
+        if not batch:
+            return False
+
+        self._executor.submit(self._generate_batch_titles, batch, model)
+        return True
+
+    def apply_ready_titles(self, conversations: Dict[str, Dict]) -> List[str]:
+        """Copy finished titles onto their conversations, returning the updated ids"""
+        with self._lock:
+            ready = self._ready_titles
+            self._ready_titles = {}
+            replaceable = {cid: self._replaceable.pop(cid, None) for cid in ready}
+
+        updated = []
+        for conversation_id, title in ready.items():
+            conversation = conversations.get(conversation_id)
+            if conversation is None or conversation.get("title") == title:
+                continue
+            # Never overwrite a title the user set while the LLM was working
+            expected = replaceable[conversation_id]
+            current = conversation.get("title")
+            still_ours = is_untitled(current) if expected is None else current == expected
+            if not still_ours:
+                continue
+            conversation["title"] = title
+            updated.append(conversation_id)
+        return updated
+
+    def has_pending(self) -> bool:
+        """Check whether any title is still being generated"""
+        with self._lock:
+            return bool(self._pending_ids) or bool(self._ready_titles)
+
+    def generate_title(self, first_message: str, model) -> str:
+        """Title a conversation with one blocking LLM call"""
+        title_prompt = f"""Generate a short, contextual title (max {self.max_length} characters) for a conversation that starts with: '{first_message}'
+
+            Rules:
+            - Be specific and contextual to the topic
+            - Use 2-4 words maximum
+            - No quotes or special characters
+            - Examples: "Python Programming", "Travel Plans", "Recipe Ideas", "Book Discussion"
+            - If it's a question, focus on the subject, not the question format
+
+            Title:"""
+        title_response = model.generate_content(title_prompt)
+        return self.clean_title(title_response.text)
+
+    def _generate_title(self, conversation_id: str, first_message: str, model):
+        try:
+            title = self.generate_title(first_message, model)
+            self._finish({conversation_id: title}, [conversation_id])
+        except Exception as e:
+            print(f"Error generating title: {e}")
+            self._finish({}, [conversation_id])
+
+    def _generate_batch_titles(self, batch: Dict[str, str], model):
+        conversation_ids = list(batch)
+        numbered = "\n".join(
+            f"{i}. {batch[cid][:200]}" for i, cid in enumerate(conversation_ids, 1)
+        )
+        title_prompt = f"""Generate a short, contextual title (max {self.max_length} characters, 2-4 words) for each conversation below, based on its opening message.
+
+Reply with exactly one line per conversation in the form "<number>. <title>", no quotes.
+
+{numbered}
+
+Titles:"""
+        titles = {}
+        try:
+            title_response = model.generate_content(title_prompt)
+            for line in title_response.text.splitlines():
+                match = re.match(r"\s*(\d+)[.):]\s*(.+)", line)
+                if not match:
+                    continue
+                index = int(match.group(1)) - 1
+                if 0 <= index < len(conversation_ids):
+                    titles[conversation_ids[index]] = self.clean_title(match.group(2))
+        except Exception as e:
+            print(f"Error generating batch titles: {e}")
+
+        # Anything the model skipped still gets a local title
+        for cid in conversation_ids:
+            if cid not in titles:
+                titles[cid] = self.quick_title(batch[cid])
+        self._finish(titles, conversation_ids)
+
+    def _finish(self, titles: Dict[str, str], conversation_ids: List[str]):
+        with self._lock:
+            self._ready_titles.update(titles)
+            self._pending_ids.difference_update(conversation_ids)
+            for conversation_id in conversation_ids:
+                if conversation_id not in titles:
+                    self._replaceable.pop(conversation_id, None)
+
+
+def first_user_message(conversation: Dict) -> Optional[str]:
+    """Get the first message the user sent in a conversation"""
+    for message in conversation.get("messages", []):
+        if message.get("role") == "user":
+            return message.get("content")
+    return None
+
+
+# Global instance
+title_generator = TitleGenerator()
@@ -1,12 +1,20 @@
-import wikipedia
 from typing import List, Dict, Optional
 import random
 
 class WikipediaRetriever:
     def __init__(self, language='en'):
         """Initialize Wikipedia retriever with specified language."""
-        wikipedia.set_lang(language)
         self.language = language
+        self._wikipedia = None
+
+    @property
+    def wikipedia(self):
+        """The wikipedia module, imported and configured on first use"""
+        if self._wikipedia is None:
+            import wikipedia
+            wikipedia.set_lang(self.language)
+            self._wikipedia = wikipedia
+        return self._wikipedia
     
     def search_wikipedia(self, query: str, max_results: int = 3) -> List[Dict]:
         """
@@ -21,14 +29,14 @@ class WikipediaRetriever:
         """
         try:
             # Search for articles
-            search_results = wikipedia.search(query, results=max_results)
+            search_results = self.wikipedia.search(query, results=max_results)
             articles = []
             
             for title in search_results:
                 try:
                     # Get page summary
-                    page = wikipedia.page(title, auto_suggest=False)
-                    summary = wikipedia.summary(title, sentences=2, auto_suggest=False)
+                    page = self.wikipedia.page(title, auto_suggest=False)
+                    summary = self.wikipedia.summary(title, sentences=2, auto_suggest=False)
                     
                     articles.append({
                         'title': title,